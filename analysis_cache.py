@@ -0,0 +1,130 @@
+"""
+Smart Healthcare Platform - Data-Analysis Result Cache
+Re-uploads of an identical file reuse the stored analysis instead of
+processing it again.
+
+- uploads are hashed (SHA-256) while they are written to their spool file,
+  so there is no extra pass or copy; HashingRequest does this for Flask and
+  asgi_app.py wraps its own spool files the same way
+- the result row in health_data_analysis carries the hash, the analyzer
+  version, the file type and the trends flag (migration 7); rows from an
+  older ANALYZER_VERSION never match
+- at most HEALTHCARE_ANALYSIS_CACHE_ENTRIES rows keep their hash; the least
+  recently used ones are dropped from the cache (the rows themselves stay)
+"""
+
+import hashlib
+import os
+import threading
+import time
+
+from flask import Request
+
+from health_analyzer import ANALYZER_VERSION
+
+# Cached results kept; 0 turns the cache off
+CACHE_ENTRIES = int(os.environ.get('HEALTHCARE_ANALYSIS_CACHE_ENTRIES', '1000'))
+
+# A hit refreshes the entry's LRU position at most this often (seconds), saving a write per hit
+TOUCH_INTERVAL = 60
+
+INSERT_SQL = '''INSERT INTO health_data_analysis
+                (filename, file_type, analysis_result, content_hash, analyzer_version, trends, last_used_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)'''
+
+_counters = {'hits': 0, 'misses': 0, 'evicted': 0}
+_counters_lock = threading.Lock()
+
+
+def _count(name, amount=1):
+    # Shared by the Flask threads, the ASGI DB pool and the job runner
+    with _counters_lock:
+        _counters[name] += amount
+
+
+class HashingFile:
+    """File wrapper that hashes everything written through it"""
+
+    def __init__(self, file):
+        self._file = file
+        self._hash = hashlib.sha256()
+
+    def write(self, data):
+        self._hash.update(data)
+        return self._file.write(data)
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+    def __iter__(self):
+        return iter(self._file)
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+
+class HashingRequest(Request):
+    """Flask request whose uploaded files are hashed as they are spooled"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return HashingFile(super()._get_file_stream(total_content_length, content_type, filename, content_length))
+
+
+def content_hash(stream):
+    """SHA-256 of an upload; reads the stream only if it wasn't hashed on the way in"""
+    if isinstance(stream, HashingFile):
+        return stream.hexdigest()
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(1024 * 1024), b''):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+def lookup(conn, digest, file_type, trends):
+    """Stored analysis_result text for this content, or None"""
+    if not CACHE_ENTRIES:
+        return None
+    row = conn.execute('''SELECT id, analysis_result, last_used_at FROM health_data_analysis
+                          WHERE content_hash = ? AND analyzer_version = ? AND file_type = ? AND trends = ?
+                          ORDER BY last_used_at DESC LIMIT 1''',
+                       (digest, ANALYZER_VERSION, file_type, int(trends))).fetchone()
+    if row is None:
+        _count('misses')
+        return None
+
+    _count('hits')
+    now = time.time()
+    if now - (row['last_used_at'] or 0) > TOUCH_INTERVAL:
+        conn.execute('UPDATE health_data_analysis SET last_used_at = ? WHERE id = ?', (now, row['id']))
+        conn.commit()
+    return row['analysis_result']
+
+
+def insert_params(filename, file_type, result_text, digest=None, trends=False):
+    """Parameters for INSERT_SQL; a row with a digest becomes a cache entry"""
+    if not CACHE_ENTRIES:
+        digest = None
+    if digest is None:
+        return (filename, file_type, result_text, None, None, None, None)
+    return (filename, file_type, result_text, digest, ANALYZER_VERSION, int(trends), time.time())
+
+
+def evict(conn, max_entries=None):
+    """Drop the least recently used entries past the cap; returns how many"""
+    max_entries = CACHE_ENTRIES if max_entries is None else max_entries
+    count = conn.execute('SELECT COUNT(*) FROM health_data_analysis WHERE content_hash IS NOT NULL').fetchone()[0]
+    excess = count - max_entries
+    if excess <= 0:
+        return 0
+    conn.execute('''UPDATE health_data_analysis SET content_hash = NULL
+                    WHERE id IN (SELECT id FROM health_data_analysis WHERE content_hash IS NOT NULL
+                                 ORDER BY last_used_at LIMIT ?)''', (excess,))
+    conn.commit()
+    _count('evicted', excess)
+    return excess
+
+
+def stats():
+    with _counters_lock:
+        return dict(_counters)
@@ -0,0 +1,188 @@
+"""
+Smart Healthcare Platform - Asynchronous Data-Analysis Jobs
+Spools large uploads to disk and analyzes them in a process pool; job state
+lives in SQLite so any web worker can answer status polls
+"""
+
+import json
+import os
+import tempfile
+import threading
+import uuid
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import analysis_cache
+from db_pool import get_pool, reset_pool
+from health_analyzer import analyze_stream
+
+# Where uploads wait for a worker process
+SPOOL_DIR = os.environ.get(
+    'HEALTHCARE_SPOOL_DIR', os.path.join(tempfile.gettempdir(), 'healthcare-uploads')
+)
+
+# Worker processes for analysis jobs
+MAX_WORKERS = int(os.environ.get('HEALTHCARE_ANALYSIS_WORKERS', str(os.cpu_count() or 2)))
+
+# Async mode default for /api/data-analysis (clients can also send async=1)
+ASYNC_DEFAULT = os.environ.get('HEALTHCARE_ANALYSIS_ASYNC', '0') == '1'
+
+
+def create_job(conn, filename, file_type):
+    """Insert a queued job row and return its id"""
+    job_id = uuid.uuid4().hex
+    conn.execute('INSERT INTO analysis_jobs (id, filename, file_type, status) VALUES (?, ?, ?, ?)',
+                 (job_id, filename, file_type, 'queued'))
+    conn.commit()
+    return job_id
+
+
+def spool_path(job_id):
+    return os.path.join(SPOOL_DIR, f"{job_id}.upload")
+
+
+def spool_upload(file, job_id):
+    """Copy the upload to disk in chunks and return the spooled path"""
+    os.makedirs(SPOOL_DIR, exist_ok=True)
+    path = spool_path(job_id)
+    file.save(path)
+    return path
+
+
+def enqueue(conn, file, filename, file_type, trends=False, content_hash=None):
+    """Create a job, spool the upload and hand it to the worker pool; returns the job id
+
+    If spooling or submitting fails, the job is marked failed (never left
+    queued), the spooled file is removed and the error re-raised.
+    """
+    job_id = create_job(conn, filename, file_type)
+    try:
+        path = spool_upload(file, job_id)
+    except Exception:
+        _discard(conn, job_id, spool_path(job_id), "Could not store the upload for analysis")
+        raise
+    try:
+        get_job_runner().submit(job_id, path, filename, file_type, trends, content_hash=content_hash)
+    except Exception:
+        _discard(conn, job_id, path, "Analysis workers are unavailable")
+        raise
+    return job_id
+
+
+def _discard(conn, job_id, path, error):
+    _set_status(conn, job_id, 'failed', error=error)
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _set_status(conn, job_id, status, analysis_id=None, error=None):
+    conn.execute('''UPDATE analysis_jobs
+                    SET status = ?, analysis_id = COALESCE(?, analysis_id), error = ?,
+                        finished_at = CASE WHEN ? IN ('done', 'failed') THEN CURRENT_TIMESTAMP END
+                    WHERE id = ?''',
+                 (status, analysis_id, error, status, job_id))
+    conn.commit()
+
+
+def run_job(job_id, path, filename, file_type, trends, db_path, content_hash=None):
+    """Worker-process entry point: analyze the spooled file and record the result
+    (as a cache entry for content_hash, when given)"""
+    if get_pool().db_path != db_path:
+        reset_pool(db_path)
+
+    with get_pool().connection() as conn:
+        _set_status(conn, job_id, 'running')
+        try:
+            with open(path, 'rb') as f:
+                result = analyze_stream(f, file_type, trends=trends)
+            cursor = conn.execute(
+                analysis_cache.INSERT_SQL,
+                analysis_cache.insert_params(filename, file_type, json.dumps(result), content_hash, trends))
+            _set_status(conn, job_id, 'done', analysis_id=cursor.lastrowid)
+            analysis_cache.evict(conn)
+        except ValueError:
+            _set_status(conn, job_id, 'failed', error="Could not parse the uploaded file")
+        except Exception:
+            _set_status(conn, job_id, 'failed', error="An error occurred during data analysis")
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def get_job(conn, job_id):
+    """Job status as a dict (with the analysis result once done), or None"""
+    row = conn.execute('''SELECT j.id, j.filename, j.file_type, j.status, j.error,
+                                 j.created_at, j.finished_at, a.analysis_result
+                          FROM analysis_jobs j
+                          LEFT JOIN health_data_analysis a ON a.id = j.analysis_id
+                          WHERE j.id = ?''', (job_id,)).fetchone()
+    if row is None:
+        return None
+
+    job = {
+        "job_id": row['id'],
+        "filename": row['filename'],
+        "file_type": row['file_type'],
+        "status": row['status'],
+        "created_at": row['created_at'],
+        "finished_at": row['finished_at'],
+    }
+    if row['error']:
+        job["error"] = row['error']
+    if row['analysis_result']:
+        job["result"] = json.loads(row['analysis_result'])
+    return job
+
+
+class JobRunner:
+    def __init__(self, max_workers=MAX_WORKERS):
+        self.max_workers = max_workers
+        self.pid = os.getpid()
+        self.executor = self._new_executor()
+
+    def _new_executor(self):
+        # spawn: the web process is multi-threaded, so forking it is unsafe
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn'))
+
+    def submit(self, job_id, path, filename, file_type, trends=False, content_hash=None):
+        args = (run_job, job_id, path, filename, file_type, trends, get_pool().db_path, content_hash)
+        try:
+            future = self.executor.submit(*args)
+        except BrokenProcessPool:
+            # A worker died earlier; start a fresh pool and try once more
+            self.executor = self._new_executor()
+            future = self.executor.submit(*args)
+        future.add_done_callback(lambda f: self._check(f, job_id, path))
+        return future
+
+    def _check(self, future, job_id, path):
+        # run_job records its own failures; this only catches a dead worker
+        if not future.cancelled() and future.exception() is None:
+            return
+        self._fail(job_id, path, "Analysis worker stopped unexpectedly")
+
+    def _fail(self, job_id, path, error):
+        with get_pool().connection() as conn:
+            _discard(conn, job_id, path, error)
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def get_job_runner():
+    """Return the process-wide job runner, recreating it after a fork"""
+    global _runner
+    with _runner_lock:
+        if _runner is None or _runner.pid != os.getpid():
+            _runner = JobRunner()
+        return _runner
@@ -1,83 +1,136 @@
-from flask import Flask, render_template, request, redirect, url_for, jsonify
+from flask import Flask, render_template, request, redirect, url_for, jsonify, g
 import sqlite3
 import os
+import json
+import time
 from datetime import datetime
 
+from db_pool import get_pool
+from migrations import ensure_schema
+import write_queue
+from diagnosis_engine import get_engine
+from plan_builder import get_plan_builder
+from health_analyzer import analyze_stream, summarize
+import analysis_jobs
+from pagination import InvalidCursor, fetch_page, parse_limit
+import bulk_ingest
+import bookings
+import search
+import daily_stats
+import metrics
+import validation
+from validation import ValidationError
+import profiler
+import static_cache
+import ratelimit
+import blog_proxy
+import analysis_cache
+import archive
+
 app = Flask(__name__)
+# Uploads are hashed while they are spooled, for the data-analysis result cache
+app.request_class = analysis_cache.HashingRequest
+
+# Run the trend/anomaly stage on every upload unless the form says otherwise
+ANALYSIS_TRENDS_DEFAULT = os.environ.get('HEALTHCARE_ANALYSIS_TRENDS', '0') == '1'
+
+# Request timing, SQL/commit timing and error counts, served at /metrics
+metrics.init_app(app)
+
+# Admin-only sampling/per-request profiler under /admin/profiler (needs HEALTHCARE_ADMIN_TOKEN)
+profiler.init_app(app)
+
+# Content-hashed static URLs, ETag/304 and pre-compressed variants for the dashboard and static files
+static_cache.init_app(app)
+
+# Per-client token buckets on the expensive routes and 503 load shedding when overloaded
+ratelimit.init_app(app)
+
+# /api/blogs* proxied to the Node.js blog server through a pooled, cached client
+blog_proxy.init_app(app)
 
-# Connect to the database
+# Connect to the database (one pooled connection per request, released on teardown);
+# statements and commits on it are timed by metrics.py
 def get_db_connection():
-    conn = sqlite3.connect('db/healthcare.db')
-    conn.row_factory = sqlite3.Row
-    return conn
+    if 'db_conn' not in g:
+        g.db_conn = metrics.instrument(get_pool().acquire())
+    return g.db_conn
+
+@app.teardown_appcontext
+def release_db_connection(exception=None):
+    conn = g.pop('db_conn', None)
+    if conn is not None:
+        get_pool().release(metrics.unwrap(conn))
+
+# Read a boolean form field ("1", "true", "yes", "on")
+def form_flag(name, default=False):
+    return validation.flag(request.form.get(name), default)
+
+# Insert one row and commit it, through the group-commit queue when enabled
+def insert_row(sql, params):
+    if write_queue.ENABLED:
+        start = time.perf_counter()
+        write_queue.get_write_queue().write(sql, params)
+        metrics.observe_commit(time.perf_counter() - start, 'group')
+        return
 
-# Initialize database tables
-def init_db():
     conn = get_db_connection()
-    c = conn.cursor()
-
-    # Create the "patients" table
-    c.execute('''CREATE TABLE IF NOT EXISTS patients (
-                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                 name TEXT NOT NULL,
-                 email TEXT NOT NULL,
-                 age INTEGER NOT NULL,
-                 symptoms TEXT NOT NULL,
-                 diagnosis TEXT,
-                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                 )''')
-
-    # Create the "consultations" table
-    c.execute('''CREATE TABLE IF NOT EXISTS consultations (
-                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                 name TEXT NOT NULL,
-                 email TEXT NOT NULL,
-                 date TEXT NOT NULL,
-                 status TEXT DEFAULT 'pending',
-                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                 )''')
-
-    # Create the "healthcare_plans" table
-    c.execute('''CREATE TABLE IF NOT EXISTS healthcare_plans (
-                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                 age INTEGER NOT NULL,
-                 goals TEXT NOT NULL,
-                 plan TEXT NOT NULL,
-                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                 )''')
-
+    conn.execute(sql, params)
     conn.commit()
-    conn.close()
+
+# Bring the schema up to date (migrations.py); when it already is, this is a
+# single PRAGMA user_version read
+def init_db():
+    with get_pool().connection() as conn:
+        ensure_schema(conn)
 
 # Initialize database on startup
 init_db()
 
-# Home Route (renders your index.html)
+# Pool, plan-cache and write-queue counters, sampled when /metrics is scraped
+metrics.REGISTRY.add_collector('healthcare_db_pool', "Connection pool counters", lambda: get_pool().stats())
+metrics.REGISTRY.add_collector('healthcare_plan_cache', "Healthcare plan cache counters",
+                               lambda: get_plan_builder().stats())
+metrics.REGISTRY.add_collector('healthcare_write_queue', "Group-commit queue counters",
+                               lambda: write_queue.get_write_queue().stats() if write_queue.ENABLED else {})
+metrics.REGISTRY.add_collector('healthcare_page_cache', "Dashboard render cache counters", static_cache.stats)
+metrics.REGISTRY.add_collector('healthcare_blog_proxy', "Blog API proxy cache and upstream counters",
+                               lambda: blog_proxy.get_proxy().stats())
+metrics.REGISTRY.add_collector('healthcare_analysis_cache', "Data-analysis result cache counters",
+                               analysis_cache.stats)
+metrics.REGISTRY.add_collector('healthcare_load_control', "Rate limiting and load shedding", ratelimit.stats)
+
+# Home Route (renders your index.html; cached until the template or an asset changes)
 @app.route('/')
 def home():
-    return render_template('index2.html')
+    return static_cache.render_cached('index2.html')
+
+# Health check used by start_servers.py to decide when to respawn the server
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    try:
+        get_db_connection().execute('SELECT 1').fetchone()
+        return jsonify({"status": "ok"})
+    except Exception as e:
+        metrics.record_exception(e)
+        return jsonify({"status": "error"}), 503
 
 # Route for AI Diagnosis
 @app.route('/api/diagnosis', methods=['POST'])
 def diagnosis():
     try:
-        # Get form data
-        patient_name = request.form.get('patient_name', '').strip()
-        symptoms = request.form.get('symptoms', '').strip()
-
-        # Validate input
-        if not patient_name or not symptoms:
-            return jsonify({"error": "Patient name and symptoms are required"}), 400
+        # Get and validate form data (shared with asgi_app.py)
+        try:
+            patient_name, symptoms = validation.diagnosis_form(request.form)
+        except ValidationError as e:
+            return jsonify({"error": str(e)}), 400
 
         # Simple AI-like diagnosis based on symptoms
         diagnosis = generate_diagnosis(symptoms)
 
         # Store in database
-        conn = get_db_connection()
-        conn.execute('INSERT INTO patients (name, email, age, symptoms, diagnosis) VALUES (?, ?, ?, ?, ?)',
-                    (patient_name, '', 0, symptoms, diagnosis))
-        conn.commit()
-        conn.close()
+        insert_row('INSERT INTO patients (name, email, age, symptoms, diagnosis) VALUES (?, ?, ?, ?, ?)',
+                   (patient_name, '', 0, symptoms, diagnosis))
 
         return jsonify({
             "diagnosis": diagnosis,
@@ -86,75 +139,104 @@ def diagnosis():
         })
 
     except Exception as e:
+        metrics.record_exception(e)
+        return jsonify({"error": "An error occurred during diagnosis"}), 500
+
+# Route for batch diagnosis (JSON list of symptom descriptions, nothing stored)
+@app.route('/api/diagnosis/batch', methods=['POST'])
+def diagnosis_batch():
+    try:
+        data = request.get_json(silent=True) or {}
+        symptom_list = data.get('symptoms')
+
+        # Validate input
+        if not isinstance(symptom_list, list) or not symptom_list:
+            return jsonify({"error": "A non-empty list of symptoms is required"}), 400
+        if not all(isinstance(s, str) and s.strip() for s in symptom_list):
+            return jsonify({"error": "Each symptoms entry must be a non-empty string"}), 400
+
+        diagnoses = generate_diagnoses([s.strip() for s in symptom_list])
+
+        return jsonify({
+            "results": [
+                {"symptoms": s, "diagnosis": d} for s, d in zip(symptom_list, diagnoses)
+            ]
+        })
+
+    except Exception as e:
+        metrics.record_exception(e)
         return jsonify({"error": "An error occurred during diagnosis"}), 500
 
 # Route for Consultation Booking
 @app.route('/api/consultation', methods=['POST'])
 def consultation():
     try:
-        # Get form data
-        name = request.form.get('name', '').strip()
-        email = request.form.get('email', '').strip()
-        date = request.form.get('date', '').strip()
+        # Get and validate form data (shared with asgi_app.py)
+        try:
+            name, email, date = validation.consultation_form(request.form)
+        except ValidationError as e:
+            return jsonify({"error": str(e)}), 400
 
-        # Validate input
-        if not name or not email or not date:
-            return jsonify({"error": "Name, email, and date are required"}), 400
+        # Capacity check and insert in one transaction; a retried Idempotency-Key
+        # gets the stored result back instead of a second booking
+        try:
+            status_code, result, replayed = bookings.get_booking_service().book(
+                get_db_connection(), name, email, date,
+                idempotency_key=request.headers.get('Idempotency-Key', '').strip() or None)
+        except bookings.IdempotencyConflict as e:
+            return jsonify({"error": str(e)}), 422
+        except bookings.CapacityFull as e:
+            return jsonify({"error": str(e), "date": e.date, "capacity": e.capacity}), 409
+
+        response = jsonify(result)
+        response.status_code = status_code
+        if replayed:
+            response.headers['Idempotent-Replayed'] = 'true'
+        return response
 
-        # Validate date format
+    except Exception as e:
+        metrics.record_exception(e)
+        return jsonify({"error": "An error occurred while booking consultation"}), 500
+
+# Route for the next open consultation dates (?count=N&from=YYYY-MM-DD)
+@app.route('/api/consultations/availability', methods=['GET'])
+def consultation_availability():
+    try:
         try:
-            datetime.strptime(date, '%Y-%m-%d')
+            count = min(max(int(request.args.get('count', 7)), 1), 90)
         except ValueError:
-            return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
+            return jsonify({"error": "count must be a number"}), 400
 
-        # Store in database
-        conn = get_db_connection()
-        conn.execute('INSERT INTO consultations (name, email, date) VALUES (?, ?, ?)',
-                    (name, email, date))
-        conn.commit()
-        conn.close()
+        start = datetime.now().date()
+        if request.args.get('from'):
+            try:
+                start = max(start, datetime.strptime(request.args['from'], '%Y-%m-%d').date())
+            except ValueError:
+                return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
 
-        return jsonify({
-            "status": "success",
-            "message": "Consultation booked successfully!",
-            "details": {
-                "name": name,
-                "email": email,
-                "date": date
-            }
-        })
+        dates = bookings.get_booking_service().availability(get_db_connection(), start, count)
+        return jsonify({"dates": dates, "count": len(dates)})
 
     except Exception as e:
-        return jsonify({"error": "An error occurred while booking consultation"}), 500
+        metrics.record_exception(e)
+        return jsonify({"error": "An error occurred while checking availability"}), 500
 
 # Route for Healthcare Plan
 @app.route('/api/healthcare-plan', methods=['POST'])
 def healthcare_plan():
     try:
-        # Get form data
-        age = request.form.get('age', '').strip()
-        goals = request.form.get('goals', '').strip()
-
-        # Validate input
-        if not age or not goals:
-            return jsonify({"error": "Age and goals are required"}), 400
-
+        # Get and validate form data (shared with asgi_app.py)
         try:
-            age = int(age)
-            if age < 1 or age > 150:
-                return jsonify({"error": "Age must be between 1 and 150"}), 400
-        except ValueError:
-            return jsonify({"error": "Age must be a valid number"}), 400
+            age, goals = validation.healthcare_plan_form(request.form)
+        except ValidationError as e:
+            return jsonify({"error": str(e)}), 400
 
         # Generate personalized plan
         plan = generate_healthcare_plan(age, goals)
 
         # Store in database
-        conn = get_db_connection()
-        conn.execute('INSERT INTO healthcare_plans (age, goals, plan) VALUES (?, ?, ?)',
-                    (age, goals, plan))
-        conn.commit()
-        conn.close()
+        insert_row('INSERT INTO healthcare_plans (age, goals, plan) VALUES (?, ?, ?)',
+                   (age, goals, plan))
 
         return jsonify({
             "plan": plan,
@@ -163,6 +245,7 @@ def healthcare_plan():
         })
 
     except Exception as e:
+        metrics.record_exception(e)
         return jsonify({"error": "An error occurred while generating healthcare plan"}), 500
 
 # Route for Data Analysis (File Upload)
@@ -174,81 +257,292 @@ def data_analysis():
 
         file = request.files['dataUpload']
 
-        if file.filename == '':
-            return jsonify({"error": "No file selected"}), 400
+        # Validate file name and type
+        try:
+            file_type = validation.upload_file_type(file.filename)
+        except ValidationError as e:
+            return jsonify({"error": str(e)}), 400
+
+        # Optional trend/anomaly stage (form field trends=1, or on by default
+        # with HEALTHCARE_ANALYSIS_TRENDS=1)
+        trends = form_flag('trends', ANALYSIS_TRENDS_DEFAULT)
+
+        # Same content analyzed before: answer with the stored result and just record the upload
+        digest = analysis_cache.content_hash(file.stream)
+        cached = analysis_cache.lookup(get_db_connection(), digest, file_type, trends)
+        if cached is not None:
+            insert_row(analysis_cache.INSERT_SQL, analysis_cache.insert_params(file.filename, file_type, cached))
+            response = jsonify(analysis_response(file.filename, json.loads(cached)))
+            response.headers['X-Cache'] = 'HIT'
+            return response
+
+        # Async mode: spool to disk, analyze in a worker process, poll for the result
+        if form_flag('async', analysis_jobs.ASYNC_DEFAULT):
+            job_id = analysis_jobs.enqueue(get_db_connection(), file, file.filename, file_type, trends, digest)
+
+            return jsonify({
+                "analysis": "File accepted for analysis. Check the job status for results.",
+                "job_id": job_id,
+                "status": "queued",
+                "status_url": url_for('data_analysis_job', job_id=job_id),
+                "filename": file.filename
+            }), 202
+
+        # Process the file (streaming per-column statistics)
+        try:
+            analysis_result = process_health_data(file, trends=trends)
+        except ValueError:
+            return jsonify({"error": "Could not parse the uploaded file"}), 400
+
+        # Store in database, as a cache entry for this content
+        insert_row(analysis_cache.INSERT_SQL,
+                   analysis_cache.insert_params(file.filename, file_type, json.dumps(analysis_result), digest, trends))
+        analysis_cache.evict(get_db_connection())
+
+        response = jsonify(analysis_response(file.filename, analysis_result))
+        response.headers['X-Cache'] = 'MISS'
+        return response
+
+    except Exception as e:
+        metrics.record_exception(e)
+        return jsonify({"error": "An error occurred during data analysis"}), 500
+
+# Route for async data-analysis job status
+@app.route('/api/data-analysis/<job_id>', methods=['GET'])
+def data_analysis_job(job_id):
+    try:
+        job = analysis_jobs.get_job(get_db_connection(), job_id)
+        if job is None:
+            return jsonify({"error": "Analysis job not found"}), 404
 
-        # Validate file type
-        allowed_extensions = {'csv', 'json', 'txt'}
-        if not ('.' in file.filename and file.filename.rsplit('.', 1)[1].lower() in allowed_extensions):
-            return jsonify({"error": "File type not supported. Please upload CSV, JSON, or TXT files"}), 400
+        if job.get('result'):
+            job["analysis"] = summarize(job['result'])
 
-        # Process the file (basic analysis)
-        analysis_result = process_health_data(file)
+        return jsonify(job)
+
+    except Exception as e:
+        metrics.record_exception(e)
+        return jsonify({"error": "An error occurred while fetching analysis job"}), 500
+
+# Shared handler for the paginated list endpoints (?include_archived=1 also reads archive.py's monthly files)
+def list_page(table, columns, filters):
+    try:
+        limit = parse_limit(request.args.get('limit'))
+    except ValueError:
+        return jsonify({"error": "limit must be a number"}), 400
+
+    page = archive.fetch_page if validation.flag(request.args.get('include_archived')) else fetch_page
+    try:
+        rows, next_cursor = page(get_db_connection(), table, columns,
+                                 filters=filters, cursor=request.args.get('cursor'), limit=limit)
+    except InvalidCursor:
+        return jsonify({"error": "Invalid cursor"}), 400
+
+    return jsonify({
+        "items": rows,
+        "next_cursor": next_cursor,
+        "limit": limit
+    })
+
+# Route for listing patients (optional ?email=)
+@app.route('/api/patients', methods=['GET'])
+def list_patients():
+    try:
+        filters = {}
+        email = request.args.get('email', '').strip()
+        if email:
+            filters['email'] = email
+
+        return list_page('patients', ['id', 'name', 'email', 'age', 'symptoms', 'diagnosis', 'created_at'], filters)
+
+    except Exception as e:
+        metrics.record_exception(e)
+        return jsonify({"error": "An error occurred while listing patients"}), 500
+
+# Route for ranked full-text search over patient symptoms and diagnoses
+# (?q=migraine&from=YYYY-MM-DD&to=YYYY-MM-DD&limit=&offset=)
+@app.route('/api/patients/search', methods=['GET'])
+def search_patients():
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({"error": "Search query (q) is required"}), 400
+
+        try:
+            limit = min(parse_limit(request.args.get('limit')), search.MAX_LIMIT)
+            offset = int(request.args.get('offset', 0) or 0)
+        except ValueError:
+            return jsonify({"error": "limit and offset must be numbers"}), 400
+        if offset < 0 or offset > search.MAX_OFFSET:
+            return jsonify({"error": f"offset must be between 0 and {search.MAX_OFFSET}"}), 400
+
+        dates = {}
+        for name in ('from', 'to'):
+            value = request.args.get(name, '').strip()
+            if value:
+                try:
+                    datetime.strptime(value, '%Y-%m-%d')
+                except ValueError:
+                    return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
+            dates[name] = value or None
+
+        try:
+            rows, has_more = search.search_patients(get_db_connection(), query, dates['from'], dates['to'],
+                                                    limit=limit, offset=offset)
+        except search.InvalidQuery as e:
+            return jsonify({"error": str(e)}), 400
+        except search.SearchUnavailable as e:
+            return jsonify({"error": str(e)}), 503
 
         return jsonify({
-            "analysis": analysis_result,
-            "filename": file.filename
+            "items": rows,
+            "query": query,
+            "limit": limit,
+            "offset": offset,
+            "next_offset": offset + limit if has_more else None
         })
 
     except Exception as e:
-        return jsonify({"error": "An error occurred during data analysis"}), 500
+        metrics.record_exception(e)
+        return jsonify({"error": "An error occurred while searching patients"}), 500
+
+# Route for bulk-loading historical patient records (NDJSON or CSV body/upload)
+@app.route('/api/patients/bulk', methods=['POST'])
+def bulk_patients():
+    try:
+        if 'file' in request.files:
+            upload = request.files['file']
+            stream = upload.stream
+            default_format = bulk_ingest.detect_format(upload.filename or '')
+        else:
+            stream = request.stream
+            default_format = 'csv' if request.mimetype == 'text/csv' else 'ndjson'
+
+        fmt = request.args.get('format', default_format).lower()
+        if fmt not in ('ndjson', 'json', 'csv'):
+            return jsonify({"error": "format must be ndjson, json or csv"}), 400
+
+        report = bulk_ingest.ingest(get_db_connection(), stream, fmt)
+        if report['parse_error']:
+            # Chunks committed before the parse failure stay; the report says how far it got
+            return jsonify(dict(report, error="Could not parse the uploaded records")), 400
+
+        return jsonify(report)
+
+    except Exception as e:
+        metrics.record_exception(e)
+        return jsonify({"error": "An error occurred during bulk ingestion"}), 500
+
+# Route for listing consultations (optional ?status= and ?date=)
+@app.route('/api/consultations', methods=['GET'])
+def list_consultations():
+    try:
+        filters = {}
+        date = request.args.get('date', '').strip()
+        if date:
+            try:
+                datetime.strptime(date, '%Y-%m-%d')
+            except ValueError:
+                return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
+            filters['date'] = date
+
+        status = request.args.get('status', '').strip()
+        if status:
+            filters['status'] = status
+
+        return list_page('consultations', ['id', 'name', 'email', 'date', 'status', 'created_at'], filters)
+
+    except Exception as e:
+        metrics.record_exception(e)
+        return jsonify({"error": "An error occurred while listing consultations"}), 500
+
+# Route for listing healthcare plans
+@app.route('/api/healthcare-plans', methods=['GET'])
+def list_healthcare_plans():
+    try:
+        return list_page('healthcare_plans', ['id', 'age', 'goals', 'plan', 'created_at'], {})
+
+    except Exception as e:
+        metrics.record_exception(e)
+        return jsonify({"error": "An error occurred while listing healthcare plans"}), 500
+
+# Route for dashboard statistics from the precomputed aggregates (?days=30&until=YYYY-MM-DD)
+@app.route('/api/stats', methods=['GET'])
+def stats():
+    try:
+        try:
+            days = min(max(int(request.args.get('days', daily_stats.DEFAULT_DAYS)), 1), daily_stats.MAX_DAYS)
+        except ValueError:
+            return jsonify({"error": "days must be a number"}), 400
+
+        until = request.args.get('until', '').strip() or None
+        if until:
+            try:
+                datetime.strptime(until, '%Y-%m-%d')
+            except ValueError:
+                return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
+
+        return jsonify(daily_stats.read_stats(get_db_connection(), days=days, until=until))
+
+    except Exception as e:
+        metrics.record_exception(e)
+        return jsonify({"error": "An error occurred while reading statistics"}), 500
+
+# Route for connection pool counters
+@app.route('/api/db-pool/stats', methods=['GET'])
+def db_pool_stats():
+    return jsonify(get_pool().stats())
+
+# Route for healthcare plan cache counters
+@app.route('/api/healthcare-plan/cache-stats', methods=['GET'])
+def healthcare_plan_cache_stats():
+    return jsonify(get_plan_builder().stats())
+
+# Route for group-commit queue counters
+@app.route('/api/write-queue/stats', methods=['GET'])
+def write_queue_stats():
+    if not write_queue.ENABLED:
+        return jsonify({"enabled": False})
+    stats = write_queue.get_write_queue().stats()
+    stats['enabled'] = True
+    return jsonify(stats)
 
 # Helper function to generate diagnosis based on symptoms
 def generate_diagnosis(symptoms):
-    symptoms_lower = symptoms.lower()
-
-    # Simple keyword-based diagnosis
-    if any(word in symptoms_lower for word in ['fever', 'cough', 'cold']):
-        return "Based on your symptoms, you may have a common cold or flu. Please consult a doctor for proper diagnosis and treatment."
-    elif any(word in symptoms_lower for word in ['headache', 'migraine']):
-        return "Your symptoms suggest a possible headache or migraine. Ensure adequate rest and hydration. Consult a healthcare professional if symptoms persist."
-    elif any(word in symptoms_lower for word in ['stomach', 'nausea', 'vomit']):
-        return "These symptoms may indicate a gastrointestinal issue. Stay hydrated and consider consulting a doctor if symptoms worsen."
-    else:
-        return "Based on the symptoms described, please consult a healthcare professional for a proper medical evaluation and diagnosis."
+    # Single-pass keyword scoring over rules compiled from data/diagnosis_rules.json
+    return get_engine().diagnose(symptoms)
+
+# Helper function to diagnose many symptom descriptions in one call
+def generate_diagnoses(symptom_list):
+    return get_engine().diagnose_many(symptom_list)
 
 # Helper function to generate healthcare plan
 def generate_healthcare_plan(age, goals):
-    base_plan = f"Based on your age ({age}) and goals, here's your personalized healthcare plan:\n\n"
-
-    if 'weight loss' in goals.lower():
-        base_plan += "- Maintain a calorie deficit through balanced diet\n"
-        base_plan += "- Include 150 minutes of moderate cardio exercise per week\n"
-        base_plan += "- Strength training 2-3 times per week\n"
-        base_plan += "- Track your progress weekly\n"
-
-    if 'muscle gain' in goals.lower():
-        base_plan += "- Increase protein intake (1.6-2.2g per kg of body weight)\n"
-        base_plan += "- Progressive strength training 3-4 times per week\n"
-        base_plan += "- Ensure adequate caloric surplus\n"
-        base_plan += "- Get 7-9 hours of sleep nightly\n"
-
-    if 'sleep' in goals.lower() or 'better sleep' in goals.lower():
-        base_plan += "- Maintain consistent sleep schedule\n"
-        base_plan += "- Create a relaxing bedtime routine\n"
-        base_plan += "- Avoid screens 1 hour before bed\n"
-        base_plan += "- Keep bedroom cool and dark\n"
-
-    base_plan += "\nGeneral recommendations:\n"
-    base_plan += "- Stay hydrated (8 glasses of water daily)\n"
-    base_plan += "- Eat a balanced diet rich in fruits and vegetables\n"
-    base_plan += "- Get regular health check-ups\n"
-    base_plan += "- Manage stress through meditation or hobbies\n"
-
-    return base_plan
+    # Joined from precomputed fragments in data/plan_sections.json, cached by (age, goal flags)
+    return get_plan_builder().build(age, goals)
+
+# Response body for a finished analysis (also used by asgi_app.py)
+def analysis_response(filename, analysis_result):
+    response = {
+        "analysis": summarize(analysis_result),
+        "metrics": analysis_result['metrics'],
+        "rows": analysis_result['rows'],
+        "filename": filename
+    }
+    if 'trends' in analysis_result:
+        response["trends"] = analysis_result['trends']
+    return response
 
 # Helper function to process health data files
-def process_health_data(file):
-    filename = file.filename.lower()
-
-    if filename.endswith('.csv'):
-        return "CSV file processed successfully. Health metrics analyzed: BMI, blood pressure, heart rate trends identified."
-    elif filename.endswith('.json'):
-        return "JSON file processed successfully. Health data structure validated and key metrics extracted."
-    else:
-        return "Text file processed successfully. Health information parsed and key insights generated."
+def process_health_data(file, trends=False):
+    # Streams the upload in chunks; memory use doesn't depend on file size
+    # unless the vectorized trend stage is requested
+    file_type = file.filename.rsplit('.', 1)[1].lower()
+    return analyze_stream(file.stream, file_type, trends=trends)
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    # Same address as gunicorn.conf.py, so start_servers.py health checks either server
+    host, _, port = os.environ.get('HEALTHCARE_BIND', '0.0.0.0:5000').rpartition(':')
+    app.run(debug=True, host=host.strip('[]') or '0.0.0.0', port=int(port))
 
 
@@ -0,0 +1,332 @@
+"""
+Smart Healthcare Platform - Hot/Cold Archival
+Moves old patients, consultations and healthcare plans out of
+db/healthcare.db into monthly archive databases, so the live file, its
+indexes and its backups stay small:
+
+- rows older than the cutoff go in batches; each batch is written to the
+  archive first and then deleted from the live file in one short
+  transaction, so other writers only wait for a single batch
+- archives are one SQLite file per month of created_at
+  (db/archive/healthcare-archive-YYYY-MM.db); each row is stored as
+  zlib-compressed JSON next to the plain columns the list endpoints filter
+  and sort on
+- the dashboard statistics keep counting archived rows (python db_setup.py
+  --backfill-stats reads them back from the archives); search covers live
+  rows only
+- freed pages are handed back to the filesystem with incremental vacuum, a
+  bounded number of pages per step
+
+    python archive.py --older-than 365            # one run
+    python archive.py --older-than 365 --every 24 # keep running every 24 hours
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+import zlib
+
+import daily_stats
+from db_pool import DB_PATH, get_pool
+from migrations import migrate
+from pagination import decode_cursor, encode_cursor
+
+ARCHIVE_DIR = os.environ.get('HEALTHCARE_ARCHIVE_DIR', os.path.join(os.path.dirname(DB_PATH) or '.', 'archive'))
+# Rows whose created_at is older than this many days are archived
+ARCHIVE_AFTER_DAYS = int(os.environ.get('HEALTHCARE_ARCHIVE_AFTER_DAYS', '365'))
+
+# Rows moved per batch (one short write transaction on the live file each)
+BATCH_SIZE = 500
+# Seconds between batches and vacuum steps, so waiting writers get the lock
+BATCH_PAUSE = 0.05
+# Pages freed per incremental_vacuum step
+VACUUM_STEP_PAGES = 2000
+COMPRESSION_LEVEL = 6
+
+# table -> (columns stored plain for filtering, extra condition for rows that must stay live)
+ARCHIVED = {
+    'patients': (('email',), ''),
+    # A consultation stays live until its appointment date has passed the cutoff too
+    'consultations': (('date', 'status'), 'AND date < date(:cutoff)'),
+    'healthcare_plans': ((), ''),
+}
+
+_PARTITION_RE = re.compile(r'healthcare-archive-(\d{4}-\d{2})\.db$')
+
+
+def partition_path(month, archive_dir=ARCHIVE_DIR):
+    return os.path.join(archive_dir, f'healthcare-archive-{month}.db')
+
+
+def partitions(archive_dir=ARCHIVE_DIR):
+    """{month: path} of the existing archive files"""
+    found = {}
+    for path in glob.glob(os.path.join(archive_dir, 'healthcare-archive-*.db')):
+        match = _PARTITION_RE.search(path)
+        if match:
+            found[match.group(1)] = path
+    return found
+
+
+def pack(row):
+    return zlib.compress(json.dumps(row, separators=(',', ':')).encode(), COMPRESSION_LEVEL)
+
+
+def unpack(data):
+    return json.loads(zlib.decompress(data))
+
+
+def open_partition(path):
+    """Open (creating if needed) one monthly archive file"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    # Rollback journal keeps each archive a single self-contained file
+    conn.execute('PRAGMA journal_mode = DELETE')
+    conn.execute('PRAGMA synchronous = NORMAL')
+    for table, (plain, _) in ARCHIVED.items():
+        columns = ''.join(f', {column} TEXT' for column in plain)
+        conn.execute(f'''CREATE TABLE IF NOT EXISTS {table} (
+                         id INTEGER PRIMARY KEY,
+                         created_at TEXT NOT NULL{columns},
+                         data BLOB NOT NULL
+                         )''')
+        conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_created_at ON {table}(created_at, id)')
+        for column in plain:
+            conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_{column}_created_at '
+                         f'ON {table}({column}, created_at, id)')
+    conn.commit()
+    return conn
+
+
+def archived_rows(archive_dir=ARCHIVE_DIR):
+    """(table, iterator of row dicts) for every table in every archive, for daily_stats.backfill"""
+    for month, path in sorted(partitions(archive_dir).items()):
+        archive = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+        try:
+            for table in ARCHIVED:
+                try:
+                    found = archive.execute(f'SELECT data FROM {table} ORDER BY id')
+                except sqlite3.OperationalError:
+                    continue  # table not created in this partition
+                yield table, (unpack(data) for (data,) in found)
+        finally:
+            archive.close()
+
+
+def cutoff_for(conn, days):
+    """created_at value (UTC, like CURRENT_TIMESTAMP) before which rows are archived"""
+    return conn.execute("SELECT datetime('now', ?)", (f'-{int(days)} days',)).fetchone()[0]
+
+
+def pending(conn, cutoff):
+    """{table: rows that would be archived}"""
+    counts = {}
+    for table, (_, extra) in ARCHIVED.items():
+        counts[table] = conn.execute(f'SELECT COUNT(*) FROM {table} WHERE created_at < :cutoff {extra}',
+                                     {'cutoff': cutoff}).fetchone()[0]
+    return counts
+
+
+def archive_table(conn, table, cutoff, batch_size=BATCH_SIZE, pause=BATCH_PAUSE, archive_dir=ARCHIVE_DIR):
+    """Move one table's rows older than cutoff into the monthly archives; returns the row count"""
+    plain, extra = ARCHIVED[table]
+    insert_sql = (f'INSERT OR REPLACE INTO {table} (id, created_at{"".join(", " + c for c in plain)}, data) '
+                  f'VALUES (?, ?{", ?" * len(plain)}, ?)')
+    opened = {}
+    moved = 0
+    try:
+        while True:
+            rows = [dict(row) for row in conn.execute(
+                f'''SELECT * FROM {table} WHERE created_at < :cutoff {extra}
+                    ORDER BY created_at, id LIMIT :limit''', {'cutoff': cutoff, 'limit': batch_size})]
+            if not rows:
+                break
+
+            # Archive first: if the delete below never happens, the next run
+            # copies the same rows again (INSERT OR REPLACE) and retries it
+            by_month = {}
+            for row in rows:
+                by_month.setdefault(row['created_at'][:7], []).append(row)
+            for month, items in by_month.items():
+                archive = opened.get(month)
+                if archive is None:
+                    archive = opened[month] = open_partition(partition_path(month, archive_dir))
+                archive.executemany(insert_sql, [
+                    (row['id'], row['created_at'], *(row[c] for c in plain), pack(row)) for row in items])
+                archive.commit()
+
+            ids = json.dumps([row['id'] for row in rows])
+            if conn.in_transaction:
+                conn.commit()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                where = 'id IN (SELECT value FROM json_each(?))'
+                daily_stats.keep_counts(conn, table, where, (ids,))
+                conn.execute(f'DELETE FROM {table} WHERE {where}', (ids,))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+            moved += len(rows)
+            if len(rows) < batch_size:
+                break
+            time.sleep(pause)
+    finally:
+        for archive in opened.values():
+            archive.close()
+    return moved
+
+
+def reclaim(conn, step_pages=VACUUM_STEP_PAGES, pause=BATCH_PAUSE):
+    """Release free pages with incremental vacuum; returns pages freed, or None if not enabled"""
+    if conn.in_transaction:
+        conn.commit()
+    if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+        return None
+    start = free = conn.execute('PRAGMA freelist_count').fetchone()[0]
+    # Bounded by the pages free at the start, even if other writers keep freeing more
+    for _ in range(-(-start // step_pages)):
+        # executescript steps the pragma to completion; execute() would free a single page
+        conn.executescript(f'PRAGMA incremental_vacuum({step_pages});')
+        free = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        if not free:
+            break
+        time.sleep(pause)
+    # With WAL the file only shrinks once the freed pages are checkpointed
+    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchall()
+    return max(0, start - free)
+
+
+def enable_incremental_vacuum(conn):
+    """One-off conversion of a database created without auto_vacuum (a full VACUUM; locks the file while it runs)"""
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+    conn.execute('VACUUM')
+    return conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2
+
+
+def run(conn, days=ARCHIVE_AFTER_DAYS, batch_size=BATCH_SIZE, vacuum=True, archive_dir=ARCHIVE_DIR):
+    """Archive every table and reclaim the space; returns a report dict"""
+    start = time.perf_counter()
+    cutoff = cutoff_for(conn, days)
+    moved = {table: archive_table(conn, table, cutoff, batch_size, archive_dir=archive_dir) for table in ARCHIVED}
+    freed = reclaim(conn) if vacuum and any(moved.values()) else 0
+    return {
+        "cutoff": cutoff,
+        "moved": moved,
+        "pages_freed": freed,
+        "elapsed_seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def fetch_page(conn, table, columns, filters=None, cursor=None, limit=20, archive_dir=ARCHIVE_DIR):
+    """pagination.fetch_page over the live table and its archives together.
+
+    Archived items carry "archived": true. The live rows and each monthly
+    archive are read newest first with the same keyset condition and merged;
+    older months are only opened while the page still needs rows from them.
+    """
+    plain, _ = ARCHIVED[table]
+    where, params = [], []
+    for column, value in (filters or {}).items():
+        if column not in plain:
+            raise ValueError(f"{table} archives can't be filtered on {column}")
+        where.append(f"{column} = ?")
+        params.append(value)
+    if cursor:
+        where.append("(created_at, id) < (?, ?)")
+        params.extend(decode_cursor(cursor))
+    condition = (" WHERE " + " AND ".join(where)) if where else ""
+
+    rows = [dict(row) for row in conn.execute(
+        f"SELECT {', '.join(columns)} FROM {table}{condition} ORDER BY created_at DESC, id DESC LIMIT ?",
+        params + [limit + 1]).fetchall()]
+
+    newest = decode_cursor(cursor)[0][:7] if cursor else None
+    for month, path in sorted(partitions(archive_dir).items(), reverse=True):
+        if newest and month > newest:
+            continue
+        # Every row in this and older months is older than the page's last row
+        if len(rows) > limit and month < rows[limit]['created_at'][:7]:
+            break
+        archive = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+        try:
+            found = archive.execute(
+                f"SELECT data FROM {table}{condition} ORDER BY created_at DESC, id DESC LIMIT ?",
+                params + [limit + 1]).fetchall()
+        except sqlite3.OperationalError:
+            found = []  # table not created in this partition
+        finally:
+            archive.close()
+        for (data,) in found:
+            item = unpack(data)
+            rows.append(dict({column: item.get(column) for column in columns}, archived=True))
+        rows.sort(key=lambda row: (row['created_at'], row['id']), reverse=True)
+        del rows[limit + 1:]
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]['created_at'], rows[-1]['id'])
+    return rows, next_cursor
+
+
+def _print_report(report):
+    moved = ", ".join(f"{table} {count}" for table, count in report['moved'].items())
+    print(f"📦 Archived rows created before {report['cutoff']}: {moved}")
+    if report['pages_freed'] is None:
+        print("💡 Incremental vacuum is off for this database; run: python archive.py --enable-incremental-vacuum")
+    elif report['pages_freed']:
+        print(f"🧹 Reclaimed {report['pages_freed']} pages")
+    print(f"⏱️ {report['elapsed_seconds']}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move old records into monthly archive databases")
+    parser.add_argument('--older-than', type=int, default=ARCHIVE_AFTER_DAYS, metavar='DAYS',
+                        help="Archive rows created more than DAYS days ago")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--dry-run', action='store_true', help="Only count the rows that would move")
+    parser.add_argument('--no-vacuum', action='store_true', help="Skip the incremental vacuum afterwards")
+    parser.add_argument('--every', type=float, metavar='HOURS', help="Keep running, once every HOURS hours")
+    parser.add_argument('--enable-incremental-vacuum', action='store_true',
+                        help="Convert the live database to auto_vacuum=INCREMENTAL (one full VACUUM)")
+    args = parser.parse_args(argv)
+
+    print("🏥 Smart Healthcare Archival")
+    print("=" * 50)
+
+    with get_pool().connection() as conn:
+        migrate(conn)
+        if args.enable_incremental_vacuum:
+            ok = enable_incremental_vacuum(conn)
+            print("✅ Incremental vacuum enabled" if ok else "❌ Could not enable incremental vacuum")
+            return 0 if ok else 1
+
+        if args.dry_run:
+            cutoff = cutoff_for(conn, args.older_than)
+            counts = pending(conn, cutoff)
+            print(f"📦 Rows created before {cutoff}: " + ", ".join(f"{t} {c}" for t, c in counts.items()))
+            return 0
+
+        while True:
+            _print_report(run(conn, args.older_than, args.batch_size, vacuum=not args.no_vacuum))
+            if not args.every:
+                return 0
+            print(f"⏳ Next run in {args.every:g}h")
+            try:
+                time.sleep(args.every * 3600)
+            except KeyboardInterrupt:
+                return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,406 @@
+"""
+Smart Healthcare Platform - ASGI Entry Point
+Async variant of the four form endpoints used by the dashboard
+(/api/diagnosis, /api/consultation, /api/healthcare-plan, /api/data-analysis)
+for many slow concurrent clients. A waiting client costs a coroutine, not a
+thread:
+
+- request bodies are read as they arrive; uploads are parsed incrementally
+  and spooled to a temporary file (memory first, disk past 1 MB)
+- SQLite work runs on a small dedicated thread pool; with group commit on
+  (HEALTHCARE_GROUP_COMMIT=1) inserts are awaited without holding a thread
+- validation and response bodies are shared with the Flask views
+
+Every other path (the dashboard, static files, list endpoints, ...) is
+passed to the Flask app, so this can replace it as the only server:
+
+    uvicorn asgi_app:app --host 0.0.0.0 --port 5000 --workers 4
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import parse_qsl
+
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.http import parse_options_header
+from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
+
+import analysis_cache
+import analysis_jobs
+import bookings
+import ratelimit
+import validation
+import write_queue
+from app import (ANALYSIS_TRENDS_DEFAULT, analysis_response, app as flask_app,
+                 generate_diagnosis, generate_healthcare_plan)
+from db_pool import get_pool
+from health_analyzer import analyze_stream
+from validation import ValidationError
+
+# Threads for SQLite calls and for CPU-bound file analysis
+DB_THREADS = int(os.environ.get('HEALTHCARE_ASGI_DB_THREADS', '4'))
+ANALYSIS_THREADS = int(os.environ.get('HEALTHCARE_ASGI_ANALYSIS_THREADS', '2'))
+# Threads for requests handed to the Flask app
+WSGI_THREADS = int(os.environ.get('HEALTHCARE_ASGI_WSGI_THREADS', '8'))
+
+# Largest url-encoded body / multipart text field kept in memory
+MAX_FORM_BYTES = 1024 * 1024
+# Uploads larger than this are spooled to disk
+SPOOL_MEMORY_BYTES = 1024 * 1024
+
+JSON_HEADERS = [(b'content-type', b'application/json')]
+
+
+class ClientDisconnected(Exception):
+    """The client went away before the request body was complete"""
+
+
+class UploadedFile:
+    """A streamed multipart file part, spooled (and hashed) as it arrives"""
+
+    def __init__(self, filename):
+        self.filename = filename or ''
+        self.stream = analysis_cache.HashingFile(tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES))
+
+    def save(self, path):
+        self.stream.seek(0)
+        with open(path, 'wb') as f:
+            shutil.copyfileobj(self.stream, f)
+
+    def close(self):
+        self.stream.close()
+
+
+# Executors are created on first use in each worker process
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def executor(name):
+    pool = _executors.get(name)
+    if pool is None:
+        with _executors_lock:
+            pool = _executors.get(name)
+            if pool is None:
+                threads = {'db': DB_THREADS, 'analysis': ANALYSIS_THREADS, 'wsgi': WSGI_THREADS}[name]
+                pool = _executors[name] = ThreadPoolExecutor(max_workers=threads,
+                                                             thread_name_prefix=f'asgi-{name}')
+    return pool
+
+
+def shutdown_executors():
+    with _executors_lock:
+        for pool in _executors.values():
+            pool.shutdown(wait=True)
+        _executors.clear()
+
+
+async def run_in(name, fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor(name), partial(fn, *args, **kwargs))
+
+
+def _with_connection(fn, *args):
+    with get_pool().connection() as conn:
+        return fn(conn, *args)
+
+
+async def run_db(fn, *args):
+    """fn(conn, *args) on a pooled connection in the DB thread pool"""
+    return await run_in('db', _with_connection, fn, *args)
+
+
+def _insert(conn, sql, params):
+    conn.execute(sql, params)
+    conn.commit()
+
+
+async def insert_row(sql, params):
+    """Async counterpart of app.insert_row"""
+    if write_queue.ENABLED:
+        await asyncio.wrap_future(write_queue.get_write_queue().submit(sql, params))
+        return
+    await run_db(_insert, sql, params)
+
+
+class Request:
+    def __init__(self, scope, receive):
+        self.scope = scope
+        self.receive = receive
+        self.headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope['headers']}
+        self.files = {}
+
+    async def chunks(self):
+        while True:
+            message = await self.receive()
+            if message['type'] == 'http.disconnect':
+                raise ClientDisconnected()
+            chunk = message.get('body', b'')
+            if chunk:
+                yield chunk
+            if not message.get('more_body', False):
+                return
+
+    async def body(self, limit=None):
+        parts, size = [], 0
+        async for chunk in self.chunks():
+            size += len(chunk)
+            if limit is not None and size > limit:
+                raise RequestEntityTooLarge()
+            parts.append(chunk)
+        return b''.join(parts)
+
+    async def form(self):
+        """Parse a url-encoded or multipart body; file parts land in self.files"""
+        content_type, options = parse_options_header(self.headers.get('content-type', ''))
+        if content_type == 'application/x-www-form-urlencoded':
+            body = await self.body(limit=MAX_FORM_BYTES)
+            return dict(parse_qsl(body.decode('utf-8', 'replace'), keep_blank_values=True))
+        if content_type != 'multipart/form-data' or 'boundary' not in options:
+            return {}
+
+        form = {}
+        decoder = MultipartDecoder(options['boundary'].encode('latin-1'), max_form_memory_size=MAX_FORM_BYTES)
+        state = {'part': None, 'buffer': []}
+
+        def drain():
+            event = decoder.next_event()
+            while not isinstance(event, (NeedData, Epilogue)):
+                if isinstance(event, Field):
+                    state['part'], state['buffer'] = ('field', event.name), []
+                elif isinstance(event, File):
+                    upload = UploadedFile(event.filename)
+                    previous = self.files.get(event.name)
+                    if previous is not None:
+                        previous.close()
+                    self.files[event.name] = upload
+                    state['part'] = ('file', upload)
+                elif isinstance(event, Data):
+                    kind, target = state['part']
+                    if kind == 'file':
+                        target.stream.write(event.data)
+                    else:
+                        state['buffer'].append(event.data)
+                    if not event.more_data:
+                        if kind == 'file':
+                            target.stream.seek(0)
+                        else:
+                            form[target] = b''.join(state['buffer']).decode('utf-8', 'replace')
+                event = decoder.next_event()
+
+        async for chunk in self.chunks():
+            decoder.receive_data(chunk)
+            drain()
+        decoder.receive_data(None)
+        drain()
+        return form
+
+    def close(self):
+        for upload in self.files.values():
+            upload.close()
+
+
+# Handlers return (status, body, extra headers); bodies match the Flask views
+
+async def diagnosis(req):
+    patient_name, symptoms = validation.diagnosis_form(await req.form())
+    diagnosis = generate_diagnosis(symptoms)
+    await insert_row('INSERT INTO patients (name, email, age, symptoms, diagnosis) VALUES (?, ?, ?, ?, ?)',
+                     (patient_name, '', 0, symptoms, diagnosis))
+    return 200, {"diagnosis": diagnosis, "patient_name": patient_name, "symptoms": symptoms}, []
+
+
+async def consultation(req):
+    name, email, date = validation.consultation_form(await req.form())
+    key = req.headers.get('idempotency-key', '').strip() or None
+    try:
+        status, result, replayed = await run_db(
+            lambda conn: bookings.get_booking_service().book(conn, name, email, date, idempotency_key=key))
+    except bookings.IdempotencyConflict as e:
+        return 422, {"error": str(e)}, []
+    except bookings.CapacityFull as e:
+        return 409, {"error": str(e), "date": e.date, "capacity": e.capacity}, []
+    return status, result, [(b'idempotent-replayed', b'true')] if replayed else []
+
+
+async def healthcare_plan(req):
+    age, goals = validation.healthcare_plan_form(await req.form())
+    plan = generate_healthcare_plan(age, goals)
+    await insert_row('INSERT INTO healthcare_plans (age, goals, plan) VALUES (?, ?, ?)', (age, goals, plan))
+    return 200, {"plan": plan, "age": age, "goals": goals}, []
+
+
+async def data_analysis(req):
+    form = await req.form()
+    upload = req.files.get('dataUpload')
+    if upload is None:
+        return 400, {"error": "No file uploaded"}, []
+    file_type = validation.upload_file_type(upload.filename)
+    trends = validation.flag(form.get('trends'), ANALYSIS_TRENDS_DEFAULT)
+
+    digest = upload.stream.hexdigest()
+    cached = await run_db(analysis_cache.lookup, digest, file_type, trends)
+    if cached is not None:
+        await insert_row(analysis_cache.INSERT_SQL, analysis_cache.insert_params(upload.filename, file_type, cached))
+        return 200, analysis_response(upload.filename, json.loads(cached)), [(b'x-cache', b'HIT')]
+
+    if validation.flag(form.get('async'), analysis_jobs.ASYNC_DEFAULT):
+        job_id = await run_db(analysis_jobs.enqueue, upload, upload.filename, file_type, trends, digest)
+        return 202, {
+            "analysis": "File accepted for analysis. Check the job status for results.",
+            "job_id": job_id,
+            "status": "queued",
+            "status_url": f"/api/data-analysis/{job_id}",
+            "filename": upload.filename
+        }, []
+
+    try:
+        analysis_result = await run_in('analysis', analyze_stream, upload.stream, file_type, trends=trends)
+    except ValueError:
+        return 400, {"error": "Could not parse the uploaded file"}, []
+
+    await insert_row(analysis_cache.INSERT_SQL,
+                     analysis_cache.insert_params(upload.filename, file_type, json.dumps(analysis_result), digest, trends))
+    await run_db(analysis_cache.evict)
+    return 200, analysis_response(upload.filename, analysis_result), [(b'x-cache', b'MISS')]
+
+
+# path -> (handler, generic 500 message, same as app.py)
+ROUTES = {
+    '/api/diagnosis': (diagnosis, "An error occurred during diagnosis"),
+    '/api/consultation': (consultation, "An error occurred while booking consultation"),
+    '/api/healthcare-plan': (healthcare_plan, "An error occurred while generating healthcare plan"),
+    '/api/data-analysis': (data_analysis, "An error occurred during data analysis"),
+}
+
+
+async def send_response(send, status, body, headers):
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': headers + [(b'content-length', str(len(body)).encode())]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def send_json(send, status, payload, headers=()):
+    body = json.dumps(payload, sort_keys=True, separators=(',', ':')).encode() + b'\n'
+    await send_response(send, status, body, JSON_HEADERS + list(headers))
+
+
+def _wsgi_environ(scope, body):
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'],
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            environ[name] = value
+        else:
+            key = f'HTTP_{name}'
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def _call_wsgi(environ):
+    result = {}
+
+    def start_response(status, headers, exc_info=None):
+        result['status'] = int(status.split(' ', 1)[0])
+        result['headers'] = [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers]
+
+    iterable = flask_app(environ, start_response)
+    try:
+        body = b''.join(iterable)
+    finally:
+        if hasattr(iterable, 'close'):
+            iterable.close()
+    return result['status'], [h for h in result['headers'] if h[0] != b'content-length'], body
+
+
+async def wsgi_fallback(req, send):
+    """Run any other request through the Flask app on a worker thread"""
+    body = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES)
+    try:
+        async for chunk in req.chunks():
+            body.write(chunk)
+        body.seek(0)
+        status, headers, content = await run_in('wsgi', _call_wsgi, _wsgi_environ(req.scope, body))
+    finally:
+        body.close()
+    await send_response(send, status, content, headers)
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await asyncio.get_running_loop().run_in_executor(None, shutdown_executors)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    req = Request(scope, receive)
+    route = ROUTES.get(scope['path'])
+    try:
+        if route is None or scope['method'] != 'POST':
+            await wsgi_fallback(req, send)
+            return
+
+        handler, error_message = route
+        # Same limits as the Flask routes, checked before the body is read
+        request_headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+        client = ratelimit.client_ip((scope.get('client') or ('', 0))[0], request_headers.get('x-forwarded-for'))
+        rejection, limit = ratelimit.check(scope['path'], client, request_headers.get('x-request-start'))
+        if rejection is not None:
+            status, payload, headers = rejection
+            await send_json(send, status, payload, [(k.lower().encode(), v.encode()) for k, v in headers.items()])
+            return
+        try:
+            status, payload, headers = await handler(req)
+        except ValidationError as e:
+            status, payload, headers = 400, {"error": str(e)}, []
+        except RequestEntityTooLarge:
+            status, payload, headers = 413, {"error": "Request body too large"}, []
+        except ClientDisconnected:
+            raise
+        except Exception:
+            status, payload, headers = 500, {"error": error_message}, []
+        if limit is not None:
+            headers = headers + [(b'x-ratelimit-limit', str(limit[0]).encode()),
+                                 (b'x-ratelimit-remaining', str(int(limit[1])).encode())]
+        await send_json(send, status, payload, headers)
+    except ClientDisconnected:
+        return
+    finally:
+        req.close()
@@ -0,0 +1,221 @@
+"""
+Smart Healthcare Platform - Online Backups
+Snapshots db/healthcare.db with SQLite's online backup API while the app
+keeps serving writes:
+
+- the copy reads from one WAL snapshot (a read transaction held for the
+  whole backup), so writers never wait on it and the backup never has to
+  restart because the database changed underneath it
+- a limited number of pages is copied per step, with a short pause between
+  steps so the copy doesn't compete with requests for disk and CPU
+- each copy is verified with PRAGMA integrity_check before it replaces
+  anything; only the newest N snapshots are kept
+- BackupScheduler runs backups on a background thread (start_servers.py
+  --backup-every), or from the command line:
+
+    python backup.py                 # one snapshot
+    python backup.py --every 6       # keep taking one every 6 hours
+"""
+
+import argparse
+import glob
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+
+from db_pool import DB_PATH
+
+BACKUP_DIR = os.environ.get('HEALTHCARE_BACKUP_DIR', os.path.join(os.path.dirname(DB_PATH) or '.', 'backups'))
+# Snapshots kept; older ones are deleted after a successful backup
+KEEP = int(os.environ.get('HEALTHCARE_BACKUP_KEEP', '7'))
+# Pages copied per step (4 KB each by default) and seconds to pause between steps
+PAGES_PER_STEP = int(os.environ.get('HEALTHCARE_BACKUP_PAGES_PER_STEP', '256'))
+STEP_PAUSE = float(os.environ.get('HEALTHCARE_BACKUP_STEP_PAUSE', '0.005'))
+
+
+class BackupError(Exception):
+    """The snapshot could not be written or failed verification"""
+
+
+def snapshots(backup_dir=BACKUP_DIR):
+    """Existing snapshot paths, oldest first"""
+    # Compared without '.db' so a same-moment name with a -N suffix sorts after the plain one
+    return sorted(glob.glob(os.path.join(backup_dir, 'healthcare-*.db')), key=lambda path: path[:-3])
+
+
+def rotate(backup_dir=BACKUP_DIR, keep=KEEP):
+    """Delete all but the newest `keep` snapshots; returns the removed paths"""
+    removed = snapshots(backup_dir)[:-keep] if keep > 0 else []
+    for path in removed:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            # A backup running at the same time rotated it first
+            pass
+    return removed
+
+
+def _reserve(backup_dir):
+    """-> (snapshot path, partial path); the partial file is created here so two
+    backups started at the same moment never write to the same name"""
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+    for n in range(100):
+        path = os.path.join(backup_dir, f"healthcare-{stamp}{f'-{n}' if n else ''}.db")
+        if os.path.exists(path):
+            continue
+        try:
+            open(path + '.partial', 'x').close()
+        except FileExistsError:
+            continue
+        return path, path + '.partial'
+    raise BackupError(f"No free snapshot name for {stamp} in {backup_dir}")
+
+
+def verify(path):
+    """PRAGMA integrity_check on a finished copy; raises BackupError unless it reports ok"""
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    try:
+        problems = [row[0] for row in conn.execute('PRAGMA integrity_check')]
+    finally:
+        conn.close()
+    if problems != ['ok']:
+        raise BackupError(f"Integrity check failed: {'; '.join(problems[:5])}")
+
+
+def backup(db_path=DB_PATH, backup_dir=BACKUP_DIR, keep=KEEP, pages=PAGES_PER_STEP, pause=STEP_PAUSE):
+    """Take one verified snapshot and rotate old ones; returns a report dict"""
+    if not os.path.exists(db_path):
+        raise BackupError(f"No database at {db_path}")
+    os.makedirs(backup_dir, exist_ok=True)
+    path, partial = _reserve(backup_dir)
+
+    start = time.perf_counter()
+    steps = {'count': 0, 'total': 0}
+
+    def progress(status, remaining, total):
+        steps['count'] += 1
+        steps['total'] = total
+        # Yield between steps; the source snapshot stays pinned meanwhile
+        if remaining and pause:
+            time.sleep(pause)
+
+    source = sqlite3.connect(db_path, timeout=30)
+    target = sqlite3.connect(partial)
+    try:
+        # Pin one WAL snapshot: later commits by the app don't restart the copy
+        source.execute('BEGIN')
+        source.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()
+        source.backup(target, pages=pages, progress=progress)
+        source.rollback()
+        # A self-contained single file, not a WAL database waiting for its -wal
+        target.execute('PRAGMA journal_mode = DELETE')
+    except sqlite3.Error as e:
+        target.close()
+        os.remove(partial)
+        raise BackupError(f"Backup failed: {e}") from e
+    finally:
+        source.close()
+    target.close()
+
+    copy_seconds = time.perf_counter() - start
+    try:
+        verify(partial)
+    except BackupError:
+        os.replace(partial, path + '.corrupt')
+        raise
+    os.replace(partial, path)
+    size = os.path.getsize(path)
+
+    removed = rotate(backup_dir, keep)
+    pages_copied = steps['total']
+    return {
+        "path": path,
+        "pages": pages_copied,
+        "bytes": size,
+        "steps": steps['count'],
+        "copy_seconds": round(copy_seconds, 3),
+        "elapsed_seconds": round(time.perf_counter() - start, 3),
+        "pages_per_second": round(pages_copied / copy_seconds) if copy_seconds > 0 else pages_copied,
+        "integrity": "ok",
+        "removed": removed,
+    }
+
+
+def print_report(report):
+    print(f"✅ Backup written: {report['path']} ({report['bytes']} bytes, integrity ok)")
+    print(f"⏱️ {report['pages']} pages in {report['copy_seconds']}s "
+          f"({report['pages_per_second']} pages/s, {report['steps']} steps); "
+          f"{report['elapsed_seconds']}s including verification")
+    for path in report['removed']:
+        print(f"🗑️ Removed old snapshot {path}")
+
+
+class BackupScheduler:
+    """Daemon thread taking a backup every `interval` seconds until stop()"""
+
+    def __init__(self, interval, **options):
+        self.interval = interval
+        self.options = options
+        self.last_report = None
+        self.last_error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='backup-scheduler', daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.last_report = backup(**self.options)
+                self.last_error = None
+                print_report(self.last_report)
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"❌ Scheduled backup failed: {e}")
+
+    def stop(self, timeout=None):
+        """Stop scheduling; a backup already running is allowed to finish"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Take verified online backups of the healthcare database")
+    parser.add_argument('--db', default=DB_PATH, help="Database to back up")
+    parser.add_argument('--dir', default=BACKUP_DIR, help="Where snapshots are written")
+    parser.add_argument('--keep', type=int, default=KEEP, help="Snapshots to keep")
+    parser.add_argument('--pages', type=int, default=PAGES_PER_STEP, help="Pages copied per step")
+    parser.add_argument('--pause', type=float, default=STEP_PAUSE, help="Seconds between steps")
+    parser.add_argument('--every', type=float, metavar='HOURS', help="Keep running, once every HOURS hours")
+    args = parser.parse_args(argv)
+
+    print("🏥 Smart Healthcare Backup")
+    print("=" * 50)
+
+    options = dict(db_path=args.db, backup_dir=args.dir, keep=args.keep, pages=args.pages, pause=args.pause)
+    while True:
+        try:
+            print_report(backup(**options))
+        except BackupError as e:
+            print(f"❌ {e}")
+            if not args.every:
+                return 1
+        if not args.every:
+            return 0
+        print(f"⏳ Next backup in {args.every:g}h")
+        try:
+            time.sleep(args.every * 3600)
+        except KeyboardInterrupt:
+            return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,5 @@
+"""
+Smart Healthcare Platform - Benchmarks
+Offline micro-benchmarks and an in-process load generator for the Flask API.
+Run `python -m benchmarks --help` from the project root.
+"""
@@ -0,0 +1,98 @@
+"""
+Benchmark runner: python -m benchmarks [micro|load|all] [options]
+Writes machine-readable JSON so runs can be compared with --compare
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+# Make the project root importable when run as `python -m benchmarks`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                              capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def flatten(results, prefix=''):
+    """{'a': {'b': 1}} -> {'a.b': 1}, numbers only"""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + '.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(baseline, current):
+    """Print the relative change of every shared numeric result"""
+    old = flatten({k: baseline.get(k, {}) for k in ('micro', 'load')})
+    new = flatten({k: current.get(k, {}) for k in ('micro', 'load')})
+    print(f"\n📊 Compared with {baseline.get('meta', {}).get('git_revision') or 'baseline'}")
+    for key in sorted(old.keys() & new.keys()):
+        if old[key]:
+            change = (new[key] - old[key]) / old[key] * 100
+            print(f"   {key:60s} {old[key]:>12.3f} -> {new[key]:>12.3f} ({change:+.1f}%)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description="Smart Healthcare benchmarks")
+    parser.add_argument('suite', nargs='?', choices=['micro', 'load', 'all'], default='all')
+    parser.add_argument('--requests', type=int, default=500, help="Requests per load scenario")
+    parser.add_argument('--concurrency', type=int, default=8, help="Concurrent load workers")
+    parser.add_argument('--scenario', action='append', help="Load scenario to run (repeatable; default all)")
+    parser.add_argument('--url', help="Benchmark a running server instead of the in-process test client")
+    parser.add_argument('--quick', action='store_true', help="Smaller micro-benchmark inputs")
+    parser.add_argument('--output', help="Write results JSON to this file (default: stdout)")
+    parser.add_argument('--compare', help="Baseline results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    results = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'suite': args.suite,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'target': args.url or 'flask-test-client',
+        }
+    }
+
+    if args.suite in ('micro', 'all'):
+        from benchmarks import micro
+        results['micro'] = micro.run_all(quick=args.quick)
+
+    if args.suite in ('load', 'all'):
+        from benchmarks import load
+        results['load'] = load.run_all(scenarios=args.scenario, requests=args.requests,
+                                       concurrency=args.concurrency, base_url=args.url)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+        print(f"✅ Results written to {args.output}")
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), results)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
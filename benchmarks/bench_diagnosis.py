@@ -0,0 +1,71 @@
+"""
+Micro-benchmark: compiled diagnosis engine vs. the original if/elif keyword chain
+Run from the project root: python benchmarks/bench_diagnosis.py
+"""
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from diagnosis_engine import get_engine
+
+
+def legacy_diagnosis(symptoms):
+    """The branch chain generate_diagnosis used before the rule engine"""
+    symptoms_lower = symptoms.lower()
+
+    if any(word in symptoms_lower for word in ['fever', 'cough', 'cold']):
+        return "Based on your symptoms, you may have a common cold or flu. Please consult a doctor for proper diagnosis and treatment."
+    elif any(word in symptoms_lower for word in ['headache', 'migraine']):
+        return "Your symptoms suggest a possible headache or migraine. Ensure adequate rest and hydration. Consult a healthcare professional if symptoms persist."
+    elif any(word in symptoms_lower for word in ['stomach', 'nausea', 'vomit']):
+        return "These symptoms may indicate a gastrointestinal issue. Stay hydrated and consider consulting a doctor if symptoms worsen."
+    else:
+        return "Based on the symptoms described, please consult a healthcare professional for a proper medical evaluation and diagnosis."
+
+
+FILLER = ("i have been feeling tired and a bit dizzy since the weekend, "
+          "my partner says i look pale and i have trouble concentrating at work")
+SAMPLES = [
+    "Fever and a dry cough for three days",
+    "Severe migraine behind my eyes",
+    "Nausea after meals and stomach cramps",
+    "Joint pain in both knees",
+    FILLER,
+    FILLER + " and now a mild headache",
+]
+
+
+def make_inputs(count=1000, seed=42, sentences=1):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(SAMPLES) for _ in range(sentences)) for _ in range(count)]
+
+
+def run(count=1000, repeat=5, sentences=1):
+    """Return seconds per call for each implementation"""
+    inputs = make_inputs(count, sentences=sentences)
+    engine = get_engine()
+
+    def bench(fn):
+        best = min(timeit.repeat(lambda: fn(inputs), number=1, repeat=repeat))
+        return best / len(inputs)
+
+    return {
+        'legacy_chain': bench(lambda xs: [legacy_diagnosis(x) for x in xs]),
+        'engine_single': bench(lambda xs: [engine.diagnose(x) for x in xs]),
+        'engine_batch': bench(engine.diagnose_many),
+    }
+
+
+if __name__ == '__main__':
+    print("🧪 generate_diagnosis micro-benchmark (per call)")
+    print("=" * 50)
+    for label, sentences in (("short form input", 1), ("long notes (20 sentences)", 20)):
+        results = run(sentences=sentences)
+        baseline = results['legacy_chain']
+        print(f"📋 {label}")
+        for name, seconds in results.items():
+            print(f"   {name:16s} {seconds * 1e6:8.2f} µs  ({baseline / seconds:4.2f}x legacy)")
@@ -0,0 +1,67 @@
+"""
+Benchmark and regression check: streaming JSON analysis of wrapped exports
+({"records": [...]}) against the same records as a top-level array.
+Exits non-zero if the results differ or parse time stops growing linearly.
+Run from the project root: python benchmarks/bench_json.py [megabytes]
+"""
+
+import io
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from health_analyzer import analyze_stream
+
+# Seconds per MB on the larger file may be at most this multiple of the smaller one's
+MAX_SLOWDOWN = 2.0
+
+
+def make_records(megabytes, seed=5):
+    rng = random.Random(seed)
+    count = int(megabytes * 1e6 / 80)
+    return [{"heart_rate": round(rng.gauss(72, 6), 1), "blood_pressure": f"{rng.randint(110, 135)}/{rng.randint(70, 88)}",
+             "bmi": round(rng.uniform(19, 31), 1), "device": {"battery": rng.randint(1, 100)}} for _ in range(count)]
+
+
+def timed(data):
+    start = time.perf_counter()
+    result = analyze_stream(io.BytesIO(data), 'json')
+    return result, time.perf_counter() - start
+
+
+def run(megabytes=8):
+    results = {'megabytes': megabytes}
+    for label, size in (('small', megabytes / 4), ('large', megabytes)):
+        records = make_records(size)
+        wrapped = json.dumps({"export": "wearable", "version": 3, "records": records}).encode()
+        expected, _ = timed(json.dumps(records).encode())
+        result, seconds = timed(wrapped)
+        results[label] = {
+            'file_mb': round(len(wrapped) / 1e6, 1),
+            'rows': result['rows'],
+            'seconds': round(seconds, 3),
+            'seconds_per_mb': round(seconds / (len(wrapped) / 1e6), 4),
+            'matches_array': result == expected and result['rows'] == len(records),
+        }
+    results['slowdown'] = round(results['large']['seconds_per_mb'] / results['small']['seconds_per_mb'], 2)
+    results['ok'] = (results['small']['matches_array'] and results['large']['matches_array']
+                     and results['slowdown'] <= MAX_SLOWDOWN)
+    return results
+
+
+if __name__ == '__main__':
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 8
+    results = run(megabytes)
+    print("🧪 Wrapped JSON export benchmark")
+    print("=" * 50)
+    for label in ('small', 'large'):
+        r = results[label]
+        print(f"📄 {r['file_mb']} MB, {r['rows']} rows: {r['seconds']}s ({r['seconds_per_mb']}s/MB), "
+              f"{'same' if r['matches_array'] else 'DIFFERENT'} result as a top-level array")
+    print(f"📈 Time per MB grew {results['slowdown']}x from the small to the large file (limit {MAX_SLOWDOWN}x)")
+    print("✅ OK" if results['ok'] else "❌ Regression")
+    sys.exit(0 if results['ok'] else 1)
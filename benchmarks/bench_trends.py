@@ -0,0 +1,62 @@
+"""
+Benchmark: NumPy vs pure-Python trend/anomaly stage on a synthetic minute-level export
+Run from the project root: python benchmarks/bench_trends.py [rows]
+"""
+
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from health_analyzer import HealthDataAnalyzer, iter_csv_records
+from vitals_trends import TrendCollector, np
+
+
+def make_csv(rows, seed=7):
+    """Synthetic wearable export: heart rate, blood pressure and BMI per minute"""
+    rng = random.Random(seed)
+    out = io.StringIO()
+    out.write("timestamp,heart_rate,blood_pressure,bmi\n")
+    for i in range(rows):
+        hr = 70 + 10 * ((i // 600) % 2) + rng.gauss(0, 4)
+        out.write(f"{i},{hr:.1f},{rng.randint(110, 130)}/{rng.randint(70, 85)},{24 + i * 1e-6:.3f}\n")
+    return out.getvalue().encode()
+
+
+def run(rows=1_000_000):
+    data = make_csv(rows)
+    results = {'rows': rows, 'file_mb': round(len(data) / 1e6, 1)}
+
+    # Parse once, then time only the trend stage on each backend
+    start = time.perf_counter()
+    analyzer = HealthDataAnalyzer()
+    collector = TrendCollector()
+    for record in iter_csv_records(io.BytesIO(data)):
+        collector.add(analyzer.add_record(record))
+    results['parse_seconds'] = round(time.perf_counter() - start, 3)
+
+    for backend in ('python', 'numpy'):
+        if backend == 'numpy' and np is None:
+            results['numpy_seconds'] = None
+            continue
+        start = time.perf_counter()
+        collector.analyze(backend=backend)
+        results[f'{backend}_seconds'] = round(time.perf_counter() - start, 3)
+    return results
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    results = run(rows)
+    print("🧪 Trend/anomaly stage benchmark")
+    print("=" * 50)
+    print(f"📄 {results['rows']} rows, {results['file_mb']} MB CSV, streaming parse {results['parse_seconds']}s")
+    print(f"🐍 Pure Python: {results['python_seconds']}s")
+    if results['numpy_seconds'] is None:
+        print("⚠️ NumPy not installed, vectorized path skipped")
+    else:
+        speedup = results['python_seconds'] / max(results['numpy_seconds'], 1e-9)
+        print(f"⚡ NumPy:       {results['numpy_seconds']}s  ({speedup:.1f}x faster)")
@@ -0,0 +1,215 @@
+"""
+In-process load generator for the Flask API
+Drives either the Flask test client (no sockets) or a running server over
+HTTP with N concurrent workers, against a scratch SQLite database
+"""
+
+import io
+import itertools
+import os
+import random
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from datetime import date, timedelta
+from urllib.parse import urlencode
+
+from benchmarks.micro import make_csv
+
+SYMPTOMS = [
+    "fever and a dry cough",
+    "throbbing migraine since morning",
+    "nausea and stomach cramps",
+    "joint pain in both knees",
+]
+GOALS = ["weight loss", "muscle gain", "better sleep", "weight loss and better sleep"]
+UPLOAD = make_csv(500)
+
+
+def _diagnosis(i, rng):
+    return {'form': {'patient_name': f"Load Test {i}", 'symptoms': rng.choice(SYMPTOMS)}}
+
+
+def _consultation(i, rng):
+    # Spread over ten years so per-date capacity limits don't turn the run into 409s
+    day = date(2030, 1, 1) + timedelta(days=rng.randint(0, 3650))
+    return {'form': {'name': f"Load Test {i}", 'email': f"load{i}@example.com", 'date': day.isoformat()}}
+
+
+def _healthcare_plan(i, rng):
+    return {'form': {'age': str(rng.randint(18, 80)), 'goals': rng.choice(GOALS)}}
+
+
+def _data_analysis(i, rng):
+    # One extra row makes every upload unique, so this measures real analysis, not analysis_cache hits
+    row = f"{500 + i},{rng.gauss(72, 6):.1f},{rng.randint(110, 135)}/{rng.randint(70, 88)},{rng.uniform(19, 31):.1f}\n"
+    return {'files': {'dataUpload': ('vitals.csv', UPLOAD + row.encode())}}
+
+
+def _data_analysis_repeat(i, rng):
+    # The same file every time: answered from analysis_cache after the first request
+    return {'files': {'dataUpload': ('vitals.csv', UPLOAD)}}
+
+
+# name -> (method, path, request builder)
+SCENARIOS = {
+    'diagnosis': ('POST', '/api/diagnosis', _diagnosis),
+    'consultation': ('POST', '/api/consultation', _consultation),
+    'healthcare-plan': ('POST', '/api/healthcare-plan', _healthcare_plan),
+    'data-analysis': ('POST', '/api/data-analysis', _data_analysis),
+    'data-analysis-repeat': ('POST', '/api/data-analysis', _data_analysis_repeat),
+    'home': ('GET', '/', lambda i, rng: {}),
+}
+
+
+def use_scratch_database(path=None):
+    """Point the app at a throwaway database; call before importing app"""
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(prefix='healthcare-bench-'), 'bench.db')
+    os.environ['HEALTHCARE_DB_PATH'] = path
+
+    from db_pool import reset_pool
+    from migrations import ensure_schema
+    with reset_pool(path).connection() as conn:
+        ensure_schema(conn)
+    return path
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies, errors, elapsed):
+    latencies.sort()
+    total = len(latencies)
+    ms = lambda seconds: round(seconds * 1000, 3) if seconds is not None else None
+    return {
+        'requests': total,
+        'errors': errors,
+        'elapsed_seconds': round(elapsed, 3),
+        'requests_per_second': round(total / elapsed, 1) if elapsed > 0 else None,
+        'latency_ms': {
+            'mean': ms(sum(latencies) / total) if total else None,
+            'p50': ms(percentile(latencies, 50)),
+            'p95': ms(percentile(latencies, 95)),
+            'p99': ms(percentile(latencies, 99)),
+            'max': ms(latencies[-1]) if latencies else None,
+        },
+    }
+
+
+def _encode_multipart(form, files):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in (form or {}).items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, (filename, content) in (files or {}).items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                     f'Content-Type: application/octet-stream\r\n\r\n'.encode() + content + b'\r\n')
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+class TestClientTransport:
+    """Calls the WSGI app in-process through Flask's test client"""
+
+    def __init__(self):
+        from app import app
+        self.app = app
+
+    def client(self):
+        return self.app.test_client()
+
+    def request(self, client, method, path, spec):
+        data = dict(spec.get('form') or {})
+        for name, (filename, content) in (spec.get('files') or {}).items():
+            data[name] = (io.BytesIO(content), filename)
+        response = client.open(path, method=method, data=data or None)
+        return response.status_code
+
+
+class HttpTransport:
+    """Calls a running server (e.g. start_servers.py --production)"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def client(self):
+        return None
+
+    def request(self, client, method, path, spec):
+        body, content_type = None, None
+        if spec.get('files'):
+            body, content_type = _encode_multipart(spec.get('form'), spec['files'])
+        elif spec.get('form'):
+            body, content_type = urlencode(spec['form']).encode(), 'application/x-www-form-urlencoded'
+
+        req = urllib.request.Request(self.base_url + path, data=body, method=method)
+        if content_type:
+            req.add_header('Content-Type', content_type)
+        try:
+            with urllib.request.urlopen(req, timeout=30) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+
+def run_scenario(transport, name, requests=500, concurrency=8, seed=1):
+    """Fire `requests` calls at one endpoint from `concurrency` threads"""
+    method, path, build = SCENARIOS[name]
+    counter = itertools.count()
+    lock = threading.Lock()
+    latencies = []
+    errors = [0]
+
+    def worker(worker_id):
+        rng = random.Random(seed * 1000 + worker_id)
+        client = transport.client()
+        local = []
+        local_errors = 0
+        while True:
+            i = next(counter)
+            if i >= requests:
+                break
+            spec = build(i, rng)
+            start = time.perf_counter()
+            try:
+                status = transport.request(client, method, path, spec)
+            except Exception:
+                status = None
+            local.append(time.perf_counter() - start)
+            if status is None or status >= 400:
+                local_errors += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, errors[0], time.perf_counter() - start)
+
+
+def run_all(scenarios=None, requests=500, concurrency=8, base_url=None, db_path=None):
+    """Run each scenario in turn; returns {scenario: summary}"""
+    if base_url:
+        transport = HttpTransport(base_url)
+    else:
+        use_scratch_database(db_path)
+        transport = TestClientTransport()
+
+    results = {}
+    for name in scenarios or list(SCENARIOS):
+        results[name] = run_scenario(transport, name, requests=requests, concurrency=concurrency)
+    return results
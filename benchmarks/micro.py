@@ -0,0 +1,89 @@
+"""
+Micro-benchmarks for the request helpers in app.py
+(generate_diagnosis, generate_healthcare_plan, process_health_data)
+"""
+
+import io
+import random
+import timeit
+
+from werkzeug.datastructures import FileStorage
+
+from benchmarks.bench_diagnosis import make_inputs as make_symptoms
+from diagnosis_engine import get_engine
+from health_analyzer import analyze_stream
+from plan_builder import PlanBuilder, SECTIONS_PATH
+
+GOALS = [
+    "weight loss",
+    "muscle gain and better sleep",
+    "I want to sleep better and lose some weight loss",
+    "general fitness",
+    "muscle gain, weight loss",
+]
+
+
+def make_csv(rows, seed=11):
+    rng = random.Random(seed)
+    lines = ["timestamp,heart_rate,blood_pressure,bmi"]
+    for i in range(rows):
+        lines.append(f"{i},{rng.gauss(72, 6):.1f},{rng.randint(110, 135)}/{rng.randint(70, 88)},{rng.uniform(19, 31):.1f}")
+    return ("\n".join(lines) + "\n").encode()
+
+
+def _per_call(fn, calls, repeat):
+    """Best-of-repeat seconds per call"""
+    return min(timeit.repeat(fn, number=1, repeat=repeat)) / calls
+
+
+def bench_diagnosis(calls=2000, repeat=5):
+    inputs = make_symptoms(calls)
+    engine = get_engine()
+    return {
+        'single_us': _per_call(lambda: [engine.diagnose(s) for s in inputs], calls, repeat) * 1e6,
+        'batch_us': _per_call(lambda: engine.diagnose_many(inputs), calls, repeat) * 1e6,
+    }
+
+
+def bench_healthcare_plan(calls=2000, repeat=5, seed=3):
+    rng = random.Random(seed)
+    requests = [(rng.randint(18, 80), rng.choice(GOALS)) for _ in range(calls)]
+
+    def run(builder):
+        for age, goals in requests:
+            builder.build(age, goals)
+
+    # Cold: a fresh builder per repeat, so early calls miss the cache
+    cold = min(timeit.repeat(lambda: run(PlanBuilder.from_file(SECTIONS_PATH)), number=1, repeat=repeat))
+    warm_builder = PlanBuilder.from_file(SECTIONS_PATH)
+    run(warm_builder)
+    warm = min(timeit.repeat(lambda: run(warm_builder), number=1, repeat=repeat))
+    return {
+        'cold_us': cold / calls * 1e6,
+        'warm_us': warm / calls * 1e6,
+        'cache': warm_builder.stats(),
+    }
+
+
+def bench_health_data(rows=20000, repeat=3):
+    data = make_csv(rows)
+
+    def run(trends):
+        upload = FileStorage(stream=io.BytesIO(data), filename='vitals.csv')
+        analyze_stream(upload.stream, 'csv', trends=trends)
+
+    results = {'rows': rows, 'file_kb': round(len(data) / 1024, 1)}
+    for label, trends in (('stats', False), ('stats_and_trends', True)):
+        seconds = min(timeit.repeat(lambda: run(trends), number=1, repeat=repeat))
+        results[f'{label}_seconds'] = seconds
+        results[f'{label}_rows_per_second'] = rows / seconds
+    return results
+
+
+def run_all(quick=False):
+    scale = 10 if quick else 1
+    return {
+        'generate_diagnosis': bench_diagnosis(calls=2000 // scale),
+        'generate_healthcare_plan': bench_healthcare_plan(calls=2000 // scale),
+        'process_health_data': bench_health_data(rows=20000 // scale),
+    }
@@ -0,0 +1,369 @@
+"""
+Smart Healthcare Platform - Blog API Proxy
+Serves /api/blogs* from the Flask app by proxying to the Node.js blog server
+(port 5001), so the dashboard no longer calls it cross-origin:
+
+- upstream calls reuse keep-alive connections from a small pool
+- GET responses (list pages and single posts) are cached in memory with a
+  TTL and an LRU size cap; concurrent misses for the same URL share one
+  upstream call
+- a stale entry is served immediately while one background call refreshes it;
+  after a failed refresh the stale copy is served for a few seconds before
+  the next attempt, instead of every request retrying the blog server
+- short timeouts plus a circuit breaker: after repeated failures the blog
+  server is left alone for a while and the last good copy is served instead
+- writes (POST/PUT/DELETE) pass straight through and clear the cache
+"""
+
+import http.client
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urlencode, urlsplit
+
+from flask import Blueprint, Response, jsonify, request
+
+import metrics
+
+BLOG_API_URL = os.environ.get('HEALTHCARE_BLOG_URL', 'http://127.0.0.1:5001')
+
+# Seconds an upstream call may take (connect and each read)
+TIMEOUT = float(os.environ.get('HEALTHCARE_BLOG_TIMEOUT', '2'))
+# Idle keep-alive connections kept open to the blog server
+POOL_SIZE = int(os.environ.get('HEALTHCARE_BLOG_POOL_SIZE', '8'))
+
+# Fresh for CACHE_TTL seconds; then served stale (and refreshed) until STALE_TTL
+CACHE_TTL = float(os.environ.get('HEALTHCARE_BLOG_CACHE_TTL', '30'))
+STALE_TTL = float(os.environ.get('HEALTHCARE_BLOG_STALE_TTL', '300'))
+CACHE_ENTRIES = int(os.environ.get('HEALTHCARE_BLOG_CACHE_ENTRIES', '512'))
+# Seconds a stale entry is served without another refresh after one fails
+REFRESH_RETRY = float(os.environ.get('HEALTHCARE_BLOG_REFRESH_RETRY', '5'))
+
+# Consecutive failures that open the circuit, and how long it stays open
+BREAKER_FAILURES = 5
+BREAKER_COOLDOWN = 30.0
+
+# Request headers forwarded upstream (auth for the write routes)
+FORWARDED_HEADERS = ('Content-Type', 'Authorization', 'x-auth-token', 'Accept')
+# Response headers passed back to the client
+RETURNED_HEADERS = ('content-type',)
+
+
+class UpstreamError(Exception):
+    """The blog server couldn't be reached, timed out or answered 5xx"""
+
+
+class CircuitOpen(UpstreamError):
+    """Recent calls failed; the blog server is not being called"""
+
+
+class UpstreamResponse:
+    __slots__ = ('status', 'headers', 'body', 'fetched_at', 'retry_at')
+
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.fetched_at = time.monotonic()
+        # No refresh before this time (set when a refresh of this entry fails)
+        self.retry_at = 0.0
+
+
+class ConnectionPool:
+    """Keep-alive HTTPConnections to one host, reused LIFO"""
+
+    def __init__(self, base_url=BLOG_API_URL, size=POOL_SIZE, timeout=TIMEOUT):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname or '127.0.0.1'
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.size = size
+        self.timeout = timeout
+        self.created = 0
+        self.reused = 0
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _get(self):
+        with self._lock:
+            if self._idle:
+                self.reused += 1
+                return self._idle.pop(), True
+            self.created += 1
+        return self.connection_class(self.host, self.port, timeout=self.timeout), False
+
+    def _put(self, conn):
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def request(self, method, path, body=None, headers=None):
+        """-> UpstreamResponse; a reused connection the server already closed is retried once"""
+        for attempt in range(2):
+            conn, reused = self._get()
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                response = conn.getresponse()
+                data = response.read()
+            except (http.client.HTTPException, OSError) as e:
+                conn.close()
+                # Only a dead keep-alive connection is worth a second try, and only for reads
+                if reused and attempt == 0 and method in ('GET', 'HEAD'):
+                    continue
+                raise UpstreamError(str(e) or e.__class__.__name__)
+
+            if response.will_close:
+                conn.close()
+            else:
+                self._put(conn)
+            headers = {name.lower(): value for name, value in response.getheaders()
+                       if name.lower() in RETURNED_HEADERS}
+            return UpstreamResponse(response.status, headers, data)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+class CircuitBreaker:
+    """Closed -> open after `failures` failures in a row -> one trial call after `cooldown`"""
+
+    def __init__(self, failures=BREAKER_FAILURES, cooldown=BREAKER_COOLDOWN):
+        self.failures = failures
+        self.cooldown = cooldown
+        self.consecutive = 0
+        self.opened_at = None
+        self.opened = 0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            # Half-open: let a single call through to probe the server
+            if not self._trial and time.monotonic() - self.opened_at >= self.cooldown:
+                self._trial = True
+                return True
+            return False
+
+    def success(self):
+        with self._lock:
+            self.consecutive = 0
+            self.opened_at = None
+            self._trial = False
+
+    def failure(self):
+        with self._lock:
+            self.consecutive += 1
+            if self._trial or self.consecutive >= self.failures:
+                if self.opened_at is None or self._trial:
+                    self.opened += 1
+                self.opened_at = time.monotonic()
+                self._trial = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        return 'half-open' if self._trial else 'open'
+
+
+class BlogProxy:
+    """Cached, coalesced GETs and pass-through writes against the blog server"""
+
+    def __init__(self, pool=None, ttl=CACHE_TTL, stale_ttl=STALE_TTL, max_entries=CACHE_ENTRIES,
+                 refresh_retry=REFRESH_RETRY):
+        self.pool = pool or ConnectionPool()
+        self.breaker = CircuitBreaker()
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.refresh_retry = refresh_retry
+        self.max_entries = max_entries
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.errors = 0
+        self._cache = OrderedDict()
+        self._inflight = {}
+        # Guards the cache, the in-flight calls and the counters
+        self._lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix='blog-refresh')
+
+    def _call(self, method, path, body=None, headers=None):
+        if not self.breaker.allow():
+            raise CircuitOpen("Blog server circuit is open")
+        try:
+            response = self.pool.request(method, path, body, headers)
+        except Exception:
+            # Anything that escapes the call counts, so a failed trial always re-opens the circuit
+            self.breaker.failure()
+            raise
+        if response.status >= 500:
+            self.breaker.failure()
+            raise UpstreamError(f"Blog server answered {response.status}")
+        self.breaker.success()
+        return response
+
+    def _fetch(self, path, future):
+        """Leader of a cache fill: call upstream, store a 200, hand the result to any waiters"""
+        try:
+            response = self._call('GET', path, headers={'Accept': 'application/json'})
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+                self._inflight.pop(path, None)
+                # Back off: keep serving the stale copy for a while before calling again
+                entry = self._cache.get(path)
+                if entry is not None:
+                    entry.retry_at = time.monotonic() + self.refresh_retry
+            future.set_exception(e)
+            return
+
+        with self._lock:
+            if response.status == 200:
+                self._cache[path] = response
+                self._cache.move_to_end(path)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+            self._inflight.pop(path, None)
+        future.set_result(response)
+
+    def get(self, path):
+        """-> (UpstreamResponse, cache status: HIT, STALE, MISS or COALESCED)"""
+        with self._lock:
+            entry = self._cache.get(path)
+            now = time.monotonic()
+            age = now - entry.fetched_at if entry else None
+            if entry is not None and age < self.ttl:
+                self._cache.move_to_end(path)
+                self.hits += 1
+                return entry, 'HIT'
+
+            stale = entry is not None and age < self.stale_ttl
+            if stale and now < entry.retry_at:
+                # The last refresh failed moments ago; don't call again yet
+                self.stale_hits += 1
+                return entry, 'STALE'
+
+            future = self._inflight.get(path)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[path] = future
+            if stale:
+                self.stale_hits += 1
+            elif leader:
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if stale:
+            # Stale-while-revalidate: answer now, refresh once in the background
+            if leader:
+                self._refresher.submit(self._fetch, path, future)
+            return entry, 'STALE'
+
+        if leader:
+            self._fetch(path, future)
+        try:
+            return future.result(timeout=self.pool.timeout * 2 + 1), 'MISS' if leader else 'COALESCED'
+        except Exception:
+            # Stale-if-error: any copy beats no answer while the blog server is down
+            if entry is not None:
+                with self._lock:
+                    self.stale_hits += 1
+                return entry, 'STALE'
+            raise
+
+    def send(self, method, path, body, headers):
+        """Uncached write; a success drops every cached page since lists and posts may have changed"""
+        response = self._call(method, path, body, headers)
+        if response.status < 400:
+            self.invalidate()
+        return response
+
+    def invalidate(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self):
+        with self._lock:
+            counts = {
+                "entries": len(self._cache),
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "errors": self.errors,
+            }
+        return {
+            **counts,
+            "connections_created": self.pool.created,
+            "connections_reused": self.pool.reused,
+            "circuit_open": int(self.breaker.state != 'closed'),
+            "circuit_opened": self.breaker.opened,
+        }
+
+
+_proxy = None
+_proxy_lock = threading.Lock()
+
+
+def get_proxy():
+    global _proxy
+    with _proxy_lock:
+        if _proxy is None:
+            _proxy = BlogProxy()
+        return _proxy
+
+
+blog_proxy_bp = Blueprint('blog_proxy', __name__)
+
+
+def _upstream_path(subpath):
+    path = '/api/blogs' + (f'/{subpath}' if subpath else '')
+    if request.args:
+        # Sorted so ?limit=5&offset=0 and ?offset=0&limit=5 share a cache entry
+        path += '?' + urlencode(sorted(request.args.items(multi=True)))
+    return path
+
+
+def _response(upstream, cache_status=None):
+    response = Response(upstream.body, status=upstream.status,
+                        content_type=upstream.headers.get('content-type', 'application/json'))
+    if cache_status:
+        response.headers['X-Cache'] = cache_status
+        response.headers['Age'] = str(int(time.monotonic() - upstream.fetched_at))
+    return response
+
+
+# Blog API proxy (list, single post, and authenticated writes)
+@blog_proxy_bp.route('/api/blogs', defaults={'subpath': ''}, methods=['GET', 'POST'])
+@blog_proxy_bp.route('/api/blogs/<path:subpath>', methods=['GET', 'PUT', 'DELETE'])
+def blogs(subpath):
+    proxy = get_proxy()
+    path = _upstream_path(subpath)
+    try:
+        if request.method == 'GET':
+            return _response(*proxy.get(path))
+
+        headers = {name: request.headers[name] for name in FORWARDED_HEADERS if name in request.headers}
+        return _response(proxy.send(request.method, path, request.get_data(), headers))
+    except UpstreamError as e:
+        status = 503 if isinstance(e, CircuitOpen) else 502
+        return jsonify({"error": "Blog service is unavailable, please try again later"}), status
+    except Exception as e:
+        metrics.record_exception(e)
+        return jsonify({"error": "An error occurred while loading blog posts"}), 500
+
+
+def init_app(app):
+    app.register_blueprint(blog_proxy_bp)
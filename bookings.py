@@ -0,0 +1,300 @@
+"""
+Smart Healthcare Platform - Consultation Booking
+Idempotent, capacity-checked booking in a single transaction, plus an
+in-memory calendar of booked counts for "next open dates" queries.
+
+- A request carrying an Idempotency-Key is answered from the stored result
+  when it is retried within the TTL; nothing is written twice
+- Booked counts per date live in consultation_bookings, which triggers on
+  consultations keep current through bookings, status changes and deletes
+  (migration 8); the capacity check reads one row there and inserts under the
+  same BEGIN IMMEDIATE lock, so a date can't be overbooked
+- Availability is answered from memory; the calendar is corrected by every
+  booking this process makes and re-synced periodically from
+  consultation_bookings for the other workers (consultations is never scanned)
+- Per-date capacity overrides are set from the command line:
+
+    python bookings.py --set-capacity 2026-12-24 5
+    python bookings.py --clear-capacity 2026-12-24
+    python bookings.py --list-capacity
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from datetime import date as date_type, datetime, timedelta
+
+# Bookings per date unless consultation_capacity has a row for it
+DEFAULT_CAPACITY = int(os.environ.get('HEALTHCARE_CONSULTATION_CAPACITY', '20'))
+
+# How long (seconds) a stored idempotent result is replayed
+IDEMPOTENCY_TTL = int(os.environ.get('HEALTHCARE_IDEMPOTENCY_TTL', str(24 * 3600)))
+
+# How often (seconds) the calendar reloads counts written by other processes
+CALENDAR_SYNC_INTERVAL = float(os.environ.get('HEALTHCARE_CALENDAR_SYNC_INTERVAL', '30'))
+
+# Days ahead searched for open dates
+AVAILABILITY_HORIZON_DAYS = 365
+
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+EXPIRED_KEY_SWEEP_INTERVAL = 60
+
+# Statuses that don't take up a slot (the consultation_bookings triggers in migration 8 use the same list)
+RELEASED_STATUSES = ('cancelled',)
+
+COUNT_SQL = 'SELECT booked FROM consultation_bookings WHERE date = ?'
+
+
+class CapacityFull(Exception):
+    """The requested date has no slots left"""
+
+    def __init__(self, date, capacity):
+        super().__init__(f"No consultation slots left on {date}")
+        self.date = date
+        self.capacity = capacity
+
+
+class IdempotencyConflict(ValueError):
+    """An Idempotency-Key was reused with a different request body"""
+
+
+def request_fingerprint(route, fields):
+    payload = json.dumps([route, fields], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class CapacityCalendar:
+    """Booked counts and capacity overrides per date, kept in memory"""
+
+    def __init__(self, default_capacity=DEFAULT_CAPACITY, sync_interval=CALENDAR_SYNC_INTERVAL):
+        self.default_capacity = default_capacity
+        self.sync_interval = sync_interval
+        self.booked = {}
+        self.capacity = {}
+        self.syncs = 0
+        self._synced_at = None
+        self._lock = threading.Lock()
+
+    def sync(self, conn, force=False):
+        """Reload counts for today onward (at most once per sync interval)"""
+        now = time.monotonic()
+        if not force and self._synced_at is not None and now - self._synced_at < self.sync_interval:
+            return
+        today = date_type.today().isoformat()
+        booked = dict(conn.execute(
+            'SELECT date, booked FROM consultation_bookings WHERE date >= ?', (today,)).fetchall())
+        capacity = dict(conn.execute(
+            'SELECT date, capacity FROM consultation_capacity WHERE date >= ?', (today,)).fetchall())
+        with self._lock:
+            self.booked = booked
+            self.capacity = capacity
+            self._synced_at = now
+            self.syncs += 1
+
+    def record(self, date, booked, capacity=None):
+        """Set the count for one date from a booking transaction"""
+        with self._lock:
+            self.booked[date] = booked
+            if capacity is not None and capacity != self.default_capacity:
+                self.capacity[date] = capacity
+
+    def set_capacity(self, date, capacity):
+        with self._lock:
+            if capacity is None:
+                self.capacity.pop(date, None)
+            else:
+                self.capacity[date] = capacity
+
+    def capacity_for(self, date):
+        return self.capacity.get(date, self.default_capacity)
+
+    def next_open(self, start, count, horizon=AVAILABILITY_HORIZON_DAYS):
+        """Up to `count` dates from `start` with slots left: [(date, remaining, capacity)]"""
+        booked = self.booked
+        open_dates = []
+        day = start
+        for _ in range(horizon):
+            key = day.isoformat()
+            capacity = self.capacity_for(key)
+            remaining = capacity - booked.get(key, 0)
+            if remaining > 0:
+                open_dates.append({"date": key, "remaining": remaining, "capacity": capacity})
+                if len(open_dates) >= count:
+                    break
+            day += timedelta(days=1)
+        return open_dates
+
+
+class BookingService:
+    def __init__(self, calendar=None, ttl=IDEMPOTENCY_TTL):
+        self.calendar = calendar or CapacityCalendar()
+        self.ttl = ttl
+        self._swept_at = 0.0
+
+    def _capacity(self, conn, date):
+        row = conn.execute('SELECT capacity FROM consultation_capacity WHERE date = ?', (date,)).fetchone()
+        return row[0] if row else self.calendar.default_capacity
+
+    def _stored_result(self, conn, key, fingerprint, now):
+        row = conn.execute('''SELECT request_hash, status_code, response FROM idempotency_keys
+                              WHERE key = ? AND expires_at > ?''', (key, now)).fetchone()
+        if row is None:
+            return None
+        if row[0] != fingerprint:
+            raise IdempotencyConflict("Idempotency-Key was already used for a different request")
+        return row[1], json.loads(row[2])
+
+    def _sweep_expired(self, conn, now):
+        if now - self._swept_at >= EXPIRED_KEY_SWEEP_INTERVAL:
+            conn.execute('DELETE FROM idempotency_keys WHERE expires_at <= ?', (now,))
+            self._swept_at = now
+
+    def book(self, conn, name, email, date, idempotency_key=None):
+        """Book a consultation; returns (status_code, response, replayed)"""
+        fingerprint = None
+        if idempotency_key:
+            if len(idempotency_key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+                raise IdempotencyConflict("Idempotency-Key is too long")
+            fingerprint = request_fingerprint('consultation', {'name': name, 'email': email, 'date': date})
+
+        if conn.in_transaction:
+            conn.commit()
+        # IMMEDIATE takes the write lock before counting, so two requests
+        # can't both see the last free slot
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            now = time.time()
+            if idempotency_key:
+                stored = self._stored_result(conn, idempotency_key, fingerprint, now)
+                if stored is not None:
+                    conn.rollback()
+                    return stored[0], stored[1], True
+
+            capacity = self._capacity(conn, date)
+            row = conn.execute(COUNT_SQL, (date,)).fetchone()
+            booked = row[0] if row else 0
+            if booked >= capacity:
+                conn.rollback()
+                self.calendar.record(date, booked, capacity)
+                raise CapacityFull(date, capacity)
+
+            cursor = conn.execute('INSERT INTO consultations (name, email, date) VALUES (?, ?, ?)',
+                                  (name, email, date))
+            response = {
+                "status": "success",
+                "message": "Consultation booked successfully!",
+                "booking_id": cursor.lastrowid,
+                "details": {
+                    "name": name,
+                    "email": email,
+                    "date": date
+                },
+                "remaining": capacity - booked - 1
+            }
+
+            if idempotency_key:
+                self._sweep_expired(conn, now)
+                conn.execute('''INSERT OR REPLACE INTO idempotency_keys
+                                (key, route, request_hash, status_code, response, expires_at)
+                                VALUES (?, ?, ?, ?, ?, ?)''',
+                             (idempotency_key, 'consultation', fingerprint, 200,
+                              json.dumps(response), now + self.ttl))
+            conn.commit()
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+
+        self.calendar.record(date, booked + 1, capacity)
+        return 200, response, False
+
+    def availability(self, conn, start, count):
+        self.calendar.sync(conn)
+        return self.calendar.next_open(start, count)
+
+    def set_capacity(self, conn, date, capacity):
+        """Override one date's capacity; None goes back to the default"""
+        if capacity is None:
+            conn.execute('DELETE FROM consultation_capacity WHERE date = ?', (date,))
+        else:
+            conn.execute('''INSERT INTO consultation_capacity (date, capacity) VALUES (?, ?)
+                            ON CONFLICT(date) DO UPDATE SET capacity = excluded.capacity''', (date, capacity))
+        conn.commit()
+        self.calendar.set_capacity(date, capacity)
+
+
+_service = None
+_service_pid = None
+_service_lock = threading.Lock()
+
+
+def get_booking_service():
+    """Process-wide booking service (rebuilt after fork so each worker syncs its own calendar)"""
+    global _service, _service_pid
+    if _service is None or _service_pid != os.getpid():
+        with _service_lock:
+            if _service is None or _service_pid != os.getpid():
+                _service = BookingService()
+                _service_pid = os.getpid()
+    return _service
+
+
+def _date_arg(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date().isoformat()
+    except ValueError:
+        raise argparse.ArgumentTypeError("dates must be YYYY-MM-DD")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage per-date consultation capacity")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--set-capacity', nargs=2, metavar=('DATE', 'CAPACITY'),
+                       help="Allow CAPACITY bookings on DATE (YYYY-MM-DD)")
+    group.add_argument('--clear-capacity', type=_date_arg, metavar='DATE',
+                       help="Go back to the default capacity on DATE")
+    group.add_argument('--list-capacity', action='store_true', help="Show upcoming overrides and bookings")
+    args = parser.parse_args(argv)
+
+    from db_pool import get_pool
+    from migrations import migrate
+
+    print("🏥 Smart Healthcare Consultation Capacity")
+    print("=" * 50)
+
+    service = get_booking_service()
+    with get_pool().connection() as conn:
+        migrate(conn)
+        if args.set_capacity:
+            date = _date_arg(args.set_capacity[0])
+            try:
+                capacity = int(args.set_capacity[1])
+            except ValueError:
+                capacity = -1
+            if capacity < 0:
+                print("❌ Capacity must be a whole number of 0 or more")
+                return 1
+            service.set_capacity(conn, date, capacity)
+            print(f"✅ {date}: capacity {capacity}")
+        elif args.clear_capacity:
+            service.set_capacity(conn, args.clear_capacity, None)
+            print(f"✅ {args.clear_capacity}: back to the default capacity ({service.calendar.default_capacity})")
+        else:
+            today = date_type.today().isoformat()
+            rows = conn.execute('''SELECT c.date, c.capacity, COALESCE(b.booked, 0)
+                                    FROM consultation_capacity c
+                                    LEFT JOIN consultation_bookings b ON b.date = c.date
+                                    WHERE c.date >= ? ORDER BY c.date''', (today,)).fetchall()
+            if not rows:
+                print(f"📅 No overrides; every date takes {service.calendar.default_capacity} bookings")
+            for date, capacity, booked in rows:
+                print(f"📅 {date}: {booked}/{capacity} booked")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
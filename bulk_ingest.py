@@ -0,0 +1,251 @@
+"""
+Smart Healthcare Platform - Bulk Patient Ingestion
+Backfills historical symptom/diagnosis records from NDJSON, JSON-array or CSV
+streams: rows are validated as they arrive, diagnosed in batches and inserted
+with chunked executemany inside large transactions.
+
+NDJSON is parsed line by line, so a bad line is reported as that line's error.
+If a CSV or JSON document can't be read any further, the committed chunks are
+kept, the open one is rolled back and the report says how far it got.
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+
+from db_pool import get_pool
+from diagnosis_engine import get_engine
+from health_analyzer import iter_csv_records, iter_json_values, iter_text
+
+# Rows per executemany / diagnosis batch
+BATCH_SIZE = 1000
+
+# Rows per transaction (other writers wait on the lock while one is open)
+COMMIT_ROWS = 20000
+
+# Per-row errors included in the report; the count is always exact
+MAX_REPORTED_ERRORS = 100
+
+INSERT_SQL = '''INSERT INTO patients (name, email, age, symptoms, diagnosis, created_at)
+                VALUES (?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))'''
+
+
+def validate_row(record):
+    """Return (name, email, age, symptoms, diagnosis, created_at) or raise ValueError"""
+    name = str(record.get('name') or record.get('patient_name') or '').strip()
+    symptoms = str(record.get('symptoms') or '').strip()
+    if not name or not symptoms:
+        raise ValueError("name and symptoms are required")
+
+    email = str(record.get('email') or '').strip()
+
+    age = record.get('age')
+    if age in (None, ''):
+        age = 0
+    else:
+        try:
+            age = int(age)
+        except (TypeError, ValueError):
+            raise ValueError("age must be a valid number")
+        if age < 0 or age > 150:
+            raise ValueError("age must be between 0 and 150")
+
+    diagnosis = str(record.get('diagnosis') or '').strip() or None
+
+    created_at = str(record.get('created_at') or '').strip() or None
+    if created_at is not None:
+        for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d'):
+            try:
+                created_at = datetime.strptime(created_at, fmt).strftime('%Y-%m-%d %H:%M:%S')
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValueError("created_at must be YYYY-MM-DD or YYYY-MM-DD HH:MM:SS")
+
+    return [name, email, age, symptoms, diagnosis, created_at]
+
+
+def iter_ndjson(stream):
+    """Yield (line number, record) per non-blank line; a line that isn't valid
+    JSON yields a ValueError in place of its record"""
+    line_no = 0
+    pending = ''
+
+    def parse(line):
+        try:
+            return json.loads(line)
+        except ValueError as e:
+            return ValueError(f"invalid JSON: {e}")
+
+    for text in iter_text(stream):
+        pending += text
+        # Only \n ends a record; JSON strings may contain other line separators
+        *lines, pending = pending.split('\n')
+        for line in lines:
+            line_no += 1
+            if line.strip():
+                yield line_no, parse(line)
+    if pending.strip():
+        yield line_no + 1, parse(pending)
+
+
+class BulkIngestor:
+    def __init__(self, conn, batch_size=BATCH_SIZE, commit_rows=COMMIT_ROWS):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.commit_rows = commit_rows
+        self.engine = get_engine()
+
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []
+        # Last input row whose insert is committed (a retry resumes after it)
+        self.committed_through = 0
+        self._batch = []
+        self._uncommitted = 0
+        self._last_row = 0
+
+    def add(self, line_no, record):
+        self._last_row = line_no
+        try:
+            if isinstance(record, ValueError):
+                raise record
+            if not isinstance(record, dict):
+                raise ValueError("row must be an object")
+            self._batch.append(validate_row(record))
+        except ValueError as e:
+            self.failed += 1
+            if len(self.errors) < MAX_REPORTED_ERRORS:
+                self.errors.append({"row": line_no, "error": str(e)})
+            return
+        if len(self._batch) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._batch:
+            return
+
+        # Diagnose only the rows that arrived without one, in one call
+        missing = [row for row in self._batch if row[4] is None]
+        if missing:
+            for row, diagnosis in zip(missing, self.engine.diagnose_many([r[3] for r in missing])):
+                row[4] = diagnosis
+
+        self.conn.executemany(INSERT_SQL, self._batch)
+        self.inserted += len(self._batch)
+        self._uncommitted += len(self._batch)
+        self._batch = []
+
+        if self._uncommitted >= self.commit_rows:
+            self._commit()
+
+    def _commit(self):
+        self.conn.commit()
+        self._uncommitted = 0
+        self.committed_through = self._last_row
+
+    def finish(self):
+        self._flush()
+        self._commit()
+
+    def abort(self):
+        """Roll back the open transaction; inserted then counts committed rows only"""
+        self.conn.rollback()
+        self.inserted -= self._uncommitted
+        self._uncommitted = 0
+        self._batch = []
+
+
+def ingest(conn, stream, fmt, batch_size=BATCH_SIZE, commit_rows=COMMIT_ROWS):
+    """Ingest a binary NDJSON, JSON-array or CSV stream and return a summary report
+
+    The report's parse_error is set when the document stopped being readable;
+    "inserted" then counts only committed rows, and committed_through is the
+    last input row they cover.
+    """
+    if fmt not in ('ndjson', 'json', 'csv'):
+        raise ValueError("format must be ndjson, json or csv")
+
+    start = time.perf_counter()
+    ingestor = BulkIngestor(conn, batch_size=batch_size, commit_rows=commit_rows)
+    if fmt == 'ndjson':
+        # Row numbers are NDJSON line numbers
+        records = iter_ndjson(stream)
+    else:
+        # Row numbers are 1-based data rows or array elements (CSV header not counted)
+        records = enumerate(iter_csv_records(stream) if fmt == 'csv' else iter_json_values(stream), start=1)
+    parse_error = None
+    try:
+        for line_no, record in records:
+            ingestor.add(line_no, record)
+        ingestor.finish()
+    except ValueError as e:
+        # Raised by the CSV/JSON reader: keep the committed chunks, drop the open one
+        ingestor.abort()
+        parse_error = str(e)
+    except Exception:
+        # Keep whatever was committed; drop the open transaction
+        conn.rollback()
+        raise
+
+    elapsed = time.perf_counter() - start
+    return {
+        "inserted": ingestor.inserted,
+        "failed": ingestor.failed,
+        "errors": ingestor.errors,
+        "errors_truncated": ingestor.failed > len(ingestor.errors),
+        "parse_error": parse_error,
+        "committed_through": ingestor.committed_through,
+        "elapsed_seconds": round(elapsed, 3),
+        "rows_per_second": round(ingestor.inserted / elapsed, 1) if elapsed > 0 else None,
+    }
+
+
+def detect_format(filename, default='ndjson'):
+    name = filename.lower()
+    if name.endswith('.csv'):
+        return 'csv'
+    if name.endswith('.json'):
+        return 'json'
+    if name.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    return default
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-load historical patient records")
+    parser.add_argument('path', help="NDJSON, JSON-array or CSV file ('-' for stdin)")
+    parser.add_argument('--format', choices=['ndjson', 'json', 'csv'], help="Input format (default: from file extension)")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--commit-rows', type=int, default=COMMIT_ROWS)
+    args = parser.parse_args(argv)
+
+    fmt = args.format or detect_format(args.path)
+    print("🏥 Smart Healthcare Bulk Ingestion")
+    print("=" * 50)
+
+    with get_pool().connection() as conn:
+        if args.path == '-':
+            report = ingest(conn, sys.stdin.buffer, fmt, args.batch_size, args.commit_rows)
+        else:
+            with open(args.path, 'rb') as f:
+                report = ingest(conn, f, fmt, args.batch_size, args.commit_rows)
+
+    print(f"✅ Inserted: {report['inserted']} rows")
+    if report['parse_error']:
+        print(f"❌ Stopped: {report['parse_error']} (committed through row {report['committed_through']})")
+    print(f"⏱️ {report['elapsed_seconds']}s ({report['rows_per_second']} rows/s)")
+    if report['failed']:
+        print(f"❌ Failed: {report['failed']} rows")
+        for error in report['errors']:
+            print(f"   Row {error['row']}: {error['error']}")
+        if report['errors_truncated']:
+            print(f"   ... {report['failed'] - len(report['errors'])} more")
+    return 0 if not (report['failed'] or report['parse_error']) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
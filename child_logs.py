@@ -0,0 +1,210 @@
+"""
+Smart Healthcare Platform - Child Process Logs
+Continuously drains the stdout/stderr pipes of the servers started by
+start_servers.py, so a child never blocks on a full pipe.
+
+- one reader thread per pipe; a line is never waited on: if the process's
+  bounded buffer is full the line is dropped and counted instead
+- one writer thread per process moves buffered lines into a rotating log
+  file (logs/<name>.log), each line prefixed with time, process and stream
+- each process has its own buffer and writer, so a noisy server can't
+  delay or drop the other's output
+- the last lines of each process stay in memory; tail() reads the files,
+  so `python start_servers.py --tail flask` works from another shell
+"""
+
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+
+LOG_DIR = os.environ.get('HEALTHCARE_LOG_DIR', 'logs')
+# Rotate at this size, keeping this many old files (flask.log.1 ... flask.log.N)
+LOG_MAX_BYTES = int(os.environ.get('HEALTHCARE_LOG_MAX_BYTES', str(10 * 1024 * 1024)))
+LOG_BACKUPS = int(os.environ.get('HEALTHCARE_LOG_BACKUPS', '5'))
+# Lines buffered per process between the pipe readers and the file writer
+BUFFER_LINES = int(os.environ.get('HEALTHCARE_LOG_BUFFER_LINES', '10000'))
+# Recent lines per process kept in memory
+RECENT_LINES = 1000
+# Longest line read in one piece; longer output is split
+MAX_LINE_BYTES = 64 * 1024
+
+
+class RotatingFile:
+    """Append-only text file rotated by size"""
+
+    def __init__(self, path, max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def write_lines(self, lines):
+        data = ''.join(lines)
+        if self.max_bytes and self._file.tell() + len(data) > self.max_bytes and self._file.tell():
+            self.rotate()
+        self._file.write(data)
+        self._file.flush()
+
+    def rotate(self):
+        self._file.close()
+        for index in range(self.backups - 1, 0, -1):
+            older = f'{self.path}.{index}'
+            if os.path.exists(older):
+                os.replace(older, f'{self.path}.{index + 1}')
+        if self.backups:
+            os.replace(self.path, f'{self.path}.1')
+        else:
+            os.remove(self.path)
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def close(self):
+        self._file.close()
+
+
+class ProcessLog:
+    """Buffer, writer thread and recent lines for one named process"""
+
+    _STOP = object()
+
+    def __init__(self, name, log_dir=LOG_DIR, buffer_lines=BUFFER_LINES):
+        self.name = name
+        self.path = os.path.join(log_dir, f'{name}.log')
+        self.recent = deque(maxlen=RECENT_LINES)
+        self.lines = 0
+        self.dropped = 0
+        self._reported_dropped = 0
+        self._buffer = queue.Queue(maxsize=buffer_lines)
+        self._file = RotatingFile(self.path)
+        self._writer = threading.Thread(target=self._write_loop, name=f'log-writer-{name}', daemon=True)
+        self._writer.start()
+
+    def put(self, stream, line):
+        """Queue one line; never blocks the pipe reader"""
+        entry = f"{time.strftime('%Y-%m-%d %H:%M:%S')} [{self.name}:{stream}] {line}\n"
+        try:
+            self._buffer.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    def _write_loop(self):
+        while True:
+            entry = self._buffer.get()
+            if entry is self._STOP:
+                break
+            batch = [entry]
+            # Write whatever else is already waiting in one go
+            while len(batch) < 1000:
+                try:
+                    entry = self._buffer.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is self._STOP:
+                    self._flush(batch)
+                    self._file.close()
+                    return
+                batch.append(entry)
+            self._flush(batch)
+        self._file.close()
+
+    def _flush(self, batch):
+        dropped = self.dropped - self._reported_dropped
+        if dropped:
+            batch.append(f"{time.strftime('%Y-%m-%d %H:%M:%S')} [{self.name}:logs] "
+                         f"{dropped} lines dropped (log buffer full)\n")
+            self._reported_dropped += dropped
+        self.lines += len(batch)
+        self.recent.extend(batch)
+        try:
+            self._file.write_lines(batch)
+        except OSError as e:
+            print(f"⚠️ Could not write {self.path}: {e}")
+
+    def close(self, timeout=5):
+        # Blocks only if the buffer is full, i.e. the writer is still catching up
+        self._buffer.put(self._STOP)
+        self._writer.join(timeout)
+
+
+class LogPipeline:
+    """Drain child process pipes into per-process rotating log files"""
+
+    def __init__(self, log_dir=LOG_DIR, buffer_lines=BUFFER_LINES):
+        self.log_dir = log_dir
+        self.buffer_lines = buffer_lines
+        self._logs = {}
+        self._lock = threading.Lock()
+
+    def log(self, name):
+        with self._lock:
+            if name not in self._logs:
+                self._logs[name] = ProcessLog(name, self.log_dir, self.buffer_lines)
+            return self._logs[name]
+
+    def attach(self, name, process):
+        """Start reader threads for the process's stdout and stderr (opened as binary pipes)"""
+        log = self.log(name)
+        log.put('manager', f"started (PID: {process.pid})")
+        for stream, pipe in (('stdout', process.stdout), ('stderr', process.stderr)):
+            if pipe is not None:
+                threading.Thread(target=self._read_pipe, args=(log, stream, pipe),
+                                 name=f'log-reader-{name}-{stream}', daemon=True).start()
+
+    @staticmethod
+    def _read_pipe(log, stream, pipe):
+        # Ends at EOF, i.e. when the process exits (or closes the pipe)
+        try:
+            for raw in iter(lambda: pipe.readline(MAX_LINE_BYTES), b''):
+                log.put(stream, raw.decode('utf-8', errors='replace').rstrip('\r\n'))
+        except (OSError, ValueError):
+            pass
+        finally:
+            pipe.close()
+
+    def recent(self, name, count=50):
+        log = self._logs.get(name)
+        return list(log.recent)[-count:] if log else []
+
+    def stats(self):
+        return {name: {"lines": log.lines, "dropped": log.dropped, "path": log.path}
+                for name, log in self._logs.items()}
+
+    def close(self):
+        for log in list(self._logs.values()):
+            log.close()
+
+
+def tail(name, count=50, follow=False, log_dir=LOG_DIR, out=None):
+    """Print the last `count` lines of logs/<name>.log, then keep printing new ones if `follow`"""
+    out = out or sys.stdout
+    path = os.path.join(log_dir, f'{name}.log')
+    if not os.path.exists(path):
+        print(f"❌ No log file at {path}")
+        return False
+
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in deque(f, maxlen=count):
+            out.write(line)
+        out.flush()
+        position = f.seek(0, os.SEEK_END)
+
+    while follow:
+        time.sleep(0.5)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            continue
+        # Rotated (the file is new and shorter): start over from the top
+        if size < position:
+            position = 0
+        if size == position:
+            continue
+        with open(path, encoding='utf-8', errors='replace') as f:
+            f.seek(position)
+            out.write(f.read())
+            out.flush()
+            position = f.tell()
+    return True
@@ -0,0 +1,208 @@
+"""
+Smart Healthcare Platform - Daily Aggregates
+Materialized counts for dashboard statistics, kept current by triggers:
+
+- rows per table
+- consultations per status
+- patients per diagnosis category
+- healthcare plans per goal
+- data-analysis uploads per file type
+
+Each trigger bumps a per-day row (daily_stats, keyed by the row's created_at
+date) and an all-time row (stats_totals), so reading totals costs the same
+however many rows exist. Deletes and updates move the counts too, so the
+tables always match what a backfill from the raw rows would produce. Rows
+moved out by archive.py stay counted, and the backfill reads them back from
+the archives.
+"""
+
+import json
+
+from diagnosis_engine import RULES_PATH
+from plan_builder import SECTIONS_PATH
+
+DEFAULT_DAYS = 30
+MAX_DAYS = 366
+
+# table -> (columns whose update moves counts, [(metric, SQL selecting the key(s) for row {ref})])
+TRACKED = {
+    'patients': (('diagnosis',), [
+        ('rows', "SELECT 'patients' AS key"),
+        ('diagnosis_category', '''SELECT COALESCE(
+                                    (SELECT category FROM diagnosis_categories WHERE diagnosis = {ref}.diagnosis),
+                                    CASE WHEN {ref}.diagnosis IS NULL THEN 'none' ELSE 'other' END) AS key'''),
+    ]),
+    'consultations': (('status',), [
+        ('rows', "SELECT 'consultations' AS key"),
+        ('consultation_status', "SELECT COALESCE({ref}.status, 'none') AS key"),
+    ]),
+    'healthcare_plans': (('goals',), [
+        ('rows', "SELECT 'healthcare_plans' AS key"),
+        # Same plain substring match as PlanBuilder.detect
+        ('plan_goal', '''SELECT DISTINCT goal AS key FROM plan_goal_keywords
+                         WHERE instr(lower({ref}.goals), keyword) > 0
+                         UNION ALL
+                         SELECT 'none' WHERE NOT EXISTS (
+                             SELECT 1 FROM plan_goal_keywords WHERE instr(lower({ref}.goals), keyword) > 0)'''),
+    ]),
+    'health_data_analysis': (('file_type',), [
+        ('rows', "SELECT 'health_data_analysis' AS key"),
+        ('analysis_file_type', "SELECT {ref}.file_type AS key"),
+    ]),
+}
+
+
+def _bump_statements(table, ref, delta):
+    day = f"COALESCE(date({ref}.created_at), date('now'))"
+    statements = []
+    for metric, keys in TRACKED[table][1]:
+        keys = keys.format(ref=ref)
+        # WHERE true keeps SQLite from reading ON CONFLICT as a join constraint
+        statements.append(f'''INSERT INTO daily_stats (day, metric, key, count)
+                              SELECT {day}, '{metric}', key, {delta} FROM ({keys}) WHERE true
+                              ON CONFLICT(day, metric, key) DO UPDATE SET count = count + excluded.count;''')
+        statements.append(f'''INSERT INTO stats_totals (metric, key, count)
+                              SELECT '{metric}', key, {delta} FROM ({keys}) WHERE true
+                              ON CONFLICT(metric, key) DO UPDATE SET count = count + excluded.count;''')
+    return '\n'.join(statements)
+
+
+def _create_triggers(conn, table, target=None, temporary=False):
+    """Triggers on `target` (default: the table itself) feeding the aggregates; insert only when temporary"""
+    target = target or table
+    columns = ', '.join(TRACKED[table][0])
+    conn.execute(f'''CREATE {'TEMP ' if temporary else ''}TRIGGER IF NOT EXISTS {target}_stats_insert
+                     AFTER INSERT ON {target} BEGIN
+                     {_bump_statements(table, 'new', 1)}
+                     END''')
+    if temporary:
+        return
+    conn.execute(f'''CREATE TRIGGER IF NOT EXISTS {target}_stats_delete AFTER DELETE ON {target} BEGIN
+                     {_bump_statements(table, 'old', -1)}
+                     END''')
+    conn.execute(f'''CREATE TRIGGER IF NOT EXISTS {target}_stats_update AFTER UPDATE OF {columns} ON {target} BEGIN
+                     {_bump_statements(table, 'old', -1)}
+                     {_bump_statements(table, 'new', 1)}
+                     END''')
+
+
+def create_schema(conn):
+    """Aggregate and lookup tables plus the triggers (migration 6)"""
+    conn.execute('''CREATE TABLE IF NOT EXISTS daily_stats (
+                    day TEXT NOT NULL,
+                    metric TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (day, metric, key)
+                    ) WITHOUT ROWID''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS stats_totals (
+                    metric TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (metric, key)
+                    ) WITHOUT ROWID''')
+    # Mirrors of data/diagnosis_rules.json and data/plan_sections.json so the triggers can classify rows
+    conn.execute('''CREATE TABLE IF NOT EXISTS diagnosis_categories (
+                    diagnosis TEXT PRIMARY KEY,
+                    category TEXT NOT NULL
+                    )''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS plan_goal_keywords (
+                    keyword TEXT PRIMARY KEY,
+                    goal TEXT NOT NULL
+                    )''')
+    for table in TRACKED:
+        _create_triggers(conn, table)
+
+
+def _lookup_rows():
+    with open(RULES_PATH, encoding='utf-8') as f:
+        rules = json.load(f)
+    with open(SECTIONS_PATH, encoding='utf-8') as f:
+        sections = json.load(f)
+
+    categories = {rule['diagnosis']: rule['category'] for rule in rules['rules']}
+    categories[rules['default']['diagnosis']] = rules['default']['category']
+    keywords = {keyword.lower(): goal['flag'] for goal in sections['goals'] for keyword in goal['keywords']}
+    return categories, keywords
+
+
+def sync_lookups(conn):
+    """Bring the lookup tables in line with the JSON files; True if they changed.
+
+    Runs in migration 6 and python db_setup.py --backfill-stats (which also
+    reclassifies the existing aggregates), not at app startup.
+    """
+    categories, keywords = _lookup_rows()
+    if (dict(conn.execute('SELECT diagnosis, category FROM diagnosis_categories').fetchall()) == categories
+            and dict(conn.execute('SELECT keyword, goal FROM plan_goal_keywords').fetchall()) == keywords):
+        return False
+
+    in_transaction = conn.in_transaction
+    conn.execute('DELETE FROM diagnosis_categories')
+    conn.executemany('INSERT INTO diagnosis_categories (diagnosis, category) VALUES (?, ?)', categories.items())
+    conn.execute('DELETE FROM plan_goal_keywords')
+    conn.executemany('INSERT INTO plan_goal_keywords (keyword, goal) VALUES (?, ?)', keywords.items())
+    if not in_transaction:
+        conn.commit()
+    return True
+
+
+def _replay(conn, table, where='', params=(), rows=None):
+    """Count rows of `table` (or the given row dicts) once more by copying them
+    through a temporary table with the insert trigger"""
+    replay = f'stats_replay_{table}'
+    conn.execute(f'DROP TABLE IF EXISTS temp.{replay}')
+    conn.execute(f'CREATE TEMP TABLE {replay} AS SELECT * FROM main.{table} WHERE 0')
+    _create_triggers(conn, table, target=replay, temporary=True)
+    if rows is None:
+        conn.execute(f'INSERT INTO temp.{replay} SELECT * FROM main.{table}{where}', params)
+    else:
+        columns = [column[1] for column in conn.execute(f'PRAGMA temp.table_info({replay})')]
+        conn.executemany(f'INSERT INTO temp.{replay} ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))})',
+                         ([row.get(column) for column in columns] for row in rows))
+    conn.execute(f'DROP TABLE temp.{replay}')
+
+
+def backfill(conn, archived=()):
+    """Recompute every aggregate from the raw rows (runs inside the caller's transaction)
+
+    Each table is replayed through a temporary copy carrying the same insert
+    trigger, so the backfill can't drift from the incremental path. `archived`
+    yields (table, row dicts) for rows moved out by archive.py
+    (archive.archived_rows()), which are counted like live rows.
+    """
+    conn.execute('DELETE FROM daily_stats')
+    conn.execute('DELETE FROM stats_totals')
+    for table in TRACKED:
+        _replay(conn, table)
+    for table, rows in archived:
+        _replay(conn, table, rows=rows)
+    return dict(conn.execute("SELECT key, count FROM stats_totals WHERE metric = 'rows'").fetchall())
+
+
+def keep_counts(conn, table, where, params=()):
+    """Count the rows matching `where` a second time, so deleting them next leaves
+    the aggregates unchanged (archive.py moves rows out without losing their counts)"""
+    _replay(conn, table, f' WHERE {where}', params)
+
+
+def read_stats(conn, days=DEFAULT_DAYS, until=None):
+    """All-time totals plus per-day counts for the last `days` days up to `until` (YYYY-MM-DD)"""
+    totals = {}
+    for metric, key, count in conn.execute('SELECT metric, key, count FROM stats_totals WHERE count != 0'):
+        totals.setdefault(metric, {})[key] = count
+
+    end = until or conn.execute("SELECT date('now')").fetchone()[0]
+    daily = {}
+    for day, metric, key, count in conn.execute(
+            '''SELECT day, metric, key, count FROM daily_stats
+               WHERE day > date(?, ?) AND day <= ? AND count != 0
+               ORDER BY day''', (end, f'-{int(days)} days', end)):
+        daily.setdefault(day, {}).setdefault(metric, {})[key] = count
+
+    return {
+        "totals": totals,
+        "daily": [dict(day=day, **metrics) for day, metrics in daily.items()],
+        "days": days,
+        "until": end
+    }
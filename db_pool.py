@@ -0,0 +1,179 @@
+"""
+Smart Healthcare Platform - SQLite Connection Pool
+Hands out long-lived, pre-tuned SQLite connections to the Flask app and db_setup.py
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# Database location (override with HEALTHCARE_DB_PATH for scratch databases)
+DB_PATH = os.environ.get('HEALTHCARE_DB_PATH', 'db/healthcare.db')
+
+# Maximum number of open connections per process
+POOL_SIZE = int(os.environ.get('HEALTHCARE_DB_POOL_SIZE', '8'))
+
+# Seconds a caller waits for a free connection before giving up
+POOL_TIMEOUT = float(os.environ.get('HEALTHCARE_DB_POOL_TIMEOUT', '10'))
+
+# Applied once when a connection is opened, never per request
+PRAGMAS = (
+    ('auto_vacuum', 'INCREMENTAL'),  # new files only (must precede WAL); see archive.py
+    ('journal_mode', 'WAL'),      # readers don't block the writer
+    ('synchronous', 'NORMAL'),    # fsync on checkpoint only, safe with WAL
+    ('busy_timeout', 5000),       # ms to wait on a locked database
+    ('cache_size', -16000),       # negative means KiB, ~16 MB page cache
+    ('temp_store', 'MEMORY'),
+    ('foreign_keys', 'ON'),
+)
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes free within the pool timeout"""
+
+
+class ConnectionPool:
+    def __init__(self, db_path=DB_PATH, max_connections=POOL_SIZE, timeout=POOL_TIMEOUT):
+        self.db_path = db_path
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.pid = os.getpid()
+
+        self._idle = []  # LIFO so the warmest connection is reused first
+        self._all = set()
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'waits': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+            'timeouts': 0,
+        }
+
+    def _open(self):
+        """Open and tune a new connection"""
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for name, value in PRAGMAS:
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def acquire(self):
+        """Check out a connection, reusing the one this thread already holds"""
+        held = getattr(self._local, 'conn', None)
+        if held is not None:
+            self._local.depth += 1
+            return held
+
+        with self._cond:
+            conn = self._checkout()
+
+        self._local.conn = conn
+        self._local.depth = 1
+        return conn
+
+    def _checkout(self):
+        # Caller holds self._cond
+        if self._idle:
+            self._stats['hits'] += 1
+            return self._idle.pop()
+
+        if len(self._all) < self.max_connections:
+            self._stats['misses'] += 1
+            conn = self._open()
+            self._all.add(conn)
+            return conn
+
+        start = time.perf_counter()
+        deadline = start + self.timeout
+        self._stats['waits'] += 1
+        while not self._idle:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                self._stats['timeouts'] += 1
+                raise PoolTimeout(f"No free database connection after {self.timeout}s")
+            self._cond.wait(remaining)
+
+        waited = time.perf_counter() - start
+        self._stats['wait_time_total'] += waited
+        self._stats['wait_time_max'] = max(self._stats['wait_time_max'], waited)
+        self._stats['hits'] += 1
+        return self._idle.pop()
+
+    def release(self, conn):
+        """Return a connection to the pool"""
+        if getattr(self._local, 'conn', None) is conn:
+            self._local.depth -= 1
+            if self._local.depth > 0:
+                return
+            self._local.conn = None
+
+        if conn.in_transaction:
+            conn.rollback()
+
+        with self._cond:
+            if conn in self._all:
+                self._idle.append(conn)
+                self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Context manager wrapper around acquire/release"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def stats(self):
+        """Snapshot of pool counters"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats['open'] = len(self._all)
+            stats['idle'] = len(self._idle)
+            stats['max_connections'] = self.max_connections
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        stats['wait_time_avg'] = stats['wait_time_total'] / stats['waits'] if stats['waits'] else 0.0
+        return stats
+
+    def close_all(self):
+        """Close every idle connection and forget busy ones"""
+        with self._cond:
+            for conn in self._idle:
+                conn.close()
+            self._idle.clear()
+            self._all.clear()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process-wide pool, rebuilding it after a fork"""
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.pid != os.getpid():
+            _pool = ConnectionPool(db_path=DB_PATH)
+        return _pool
+
+
+def reset_pool(db_path=None):
+    """Close the current pool and point the next one at db_path"""
+    global _pool, DB_PATH
+    with _pool_lock:
+        if _pool is not None and _pool.pid == os.getpid():
+            _pool.close_all()
+        if db_path is not None:
+            DB_PATH = db_path
+        _pool = ConnectionPool(db_path=DB_PATH)
+        return _pool
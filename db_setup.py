@@ -1,91 +1,38 @@
 import sqlite3
 import os
+import sys
 from datetime import datetime
 
-def init_database():
+from db_pool import get_pool
+from migrations import current_version, migrate
+import archive
+import search
+import daily_stats
+
+def init_database(sample_data=True):
     """Initialize the healthcare database with all required tables"""
 
-    # Ensure db directory exists
-    os.makedirs('db', exist_ok=True)
+    # Connect to the database (the pool creates the db directory and enables
+    # WAL and foreign key support when it opens the connection)
+    with get_pool().connection() as conn:
+        _init_tables(conn, sample_data)
+
+    print("✅ Database initialized successfully!")
 
-    # Connect to the database (or create it if it doesn't exist)
-    conn = sqlite3.connect('db/healthcare.db')
+def _init_tables(conn, sample_data=True):
     c = conn.cursor()
 
-    # Enable foreign key support
-    c.execute("PRAGMA foreign_keys = ON")
-
-    # Create the "patients" table
-    c.execute('''CREATE TABLE IF NOT EXISTS patients (
-                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                 name TEXT NOT NULL,
-                 email TEXT NOT NULL,
-                 age INTEGER NOT NULL,
-                 symptoms TEXT NOT NULL,
-                 diagnosis TEXT,
-                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                 )''')
-
-    # Create the "consultations" table
-    c.execute('''CREATE TABLE IF NOT EXISTS consultations (
-                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                 name TEXT NOT NULL,
-                 email TEXT NOT NULL,
-                 date TEXT NOT NULL,
-                 status TEXT DEFAULT 'pending',
-                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                 )''')
-
-    # Create the "healthcare_plans" table
-    c.execute('''CREATE TABLE IF NOT EXISTS healthcare_plans (
-                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                 age INTEGER NOT NULL,
-                 goals TEXT NOT NULL,
-                 plan TEXT NOT NULL,
-                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                 )''')
-
-    # Create the "health_data_analysis" table
-    c.execute('''CREATE TABLE IF NOT EXISTS health_data_analysis (
-                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                 filename TEXT NOT NULL,
-                 file_type TEXT NOT NULL,
-                 analysis_result TEXT NOT NULL,
-                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                 )''')
-
-    # Create indexes for better performance (only on existing tables)
-    try:
-        c.execute('''CREATE INDEX IF NOT EXISTS idx_patients_created_at ON patients(created_at)''')
-    except sqlite3.OperationalError:
-        pass  # Column might not exist in older tables
-
-    try:
-        c.execute('''CREATE INDEX IF NOT EXISTS idx_consultations_date ON consultations(date)''')
-        c.execute('''CREATE INDEX IF NOT EXISTS idx_consultations_status ON consultations(status)''')
-    except sqlite3.OperationalError:
-        pass  # Columns might not exist in older tables
-
-    try:
-        c.execute('''CREATE INDEX IF NOT EXISTS idx_healthcare_plans_created_at ON healthcare_plans(created_at)''')
-    except sqlite3.OperationalError:
-        pass  # Column might not exist in older tables
-
-    try:
-        c.execute('''CREATE INDEX IF NOT EXISTS idx_health_data_analysis_created_at ON health_data_analysis(created_at)''')
-    except sqlite3.OperationalError:
-        pass  # Column might not exist in older tables
-
-    # Commit the changes
-    conn.commit()
+    # Create or upgrade all tables and indexes (see migrations.py)
+    applied = migrate(conn)
+    if applied:
+        print(f"🧱 Applied schema migrations: {', '.join(map(str, applied))}")
 
     # Check if tables are empty and add some sample data if needed
-    c.execute("SELECT COUNT(*) FROM patients")
-    if c.fetchone()[0] == 0:
-        add_sample_data(conn, c)
-
-    conn.close()
-    print("✅ Database initialized successfully!")
+    # (--no-sample-data skips it, e.g. once archive.py has moved every patient out)
+    if sample_data:
+        c.execute("SELECT COUNT(*) FROM patients")
+        if c.fetchone()[0] == 0:
+            add_sample_data(conn, c)
 
 def add_sample_data(conn, c):
     """Add sample data for testing purposes"""
@@ -124,18 +71,22 @@ def add_sample_data(conn, c):
 def check_database():
     """Check database status and display information"""
 
-    conn = sqlite3.connect('db/healthcare.db')
+    with get_pool().connection() as conn:
+        _print_status(conn)
+
+def _print_status(conn):
     c = conn.cursor()
 
     print("📋 Database Status:")
     print("=" * 50)
+    print(f"🧱 Schema version: {current_version(conn)}")
 
-    # Check all tables
+    # Check all tables (row counts come from the stats_totals aggregates, not COUNT(*) scans)
     tables = ['patients', 'consultations', 'healthcare_plans', 'health_data_analysis']
+    counts = dict(c.execute("SELECT key, count FROM stats_totals WHERE metric = 'rows'").fetchall())
 
     for table in tables:
-        c.execute(f"SELECT COUNT(*) FROM {table}")
-        count = c.fetchone()[0]
+        count = counts.get(table, 0)
         print(f"📊 {table}: {count} records")
 
         # Show recent records for main tables
@@ -143,7 +94,11 @@ def check_database():
             try:
                 c.execute(f"SELECT * FROM {table} ORDER BY created_at DESC LIMIT 1")
                 recent = c.fetchone()
-                print(f"   Recent: {recent[1]} - {recent[-1]}")
+                if recent is None:
+                    # The counts include rows moved out by archive.py
+                    print("   All records archived")
+                else:
+                    print(f"   Recent: {recent[1]} - {recent[-1]}")
             except sqlite3.OperationalError:
                 # Fallback if created_at column doesn't exist
                 c.execute(f"SELECT * FROM {table} LIMIT 1")
@@ -151,17 +106,59 @@ def check_database():
                 print(f"   Sample: {recent[1]}")
 
     # Database file info
-    db_size = os.path.getsize('db/healthcare.db') if os.path.exists('db/healthcare.db') else 0
+    db_path = get_pool().db_path
+    db_size = os.path.getsize(db_path) if os.path.exists(db_path) else 0
     print(f"💾 Database file size: {db_size} bytes")
 
-    conn.close()
+    # Connection pool counters
+    stats = get_pool().stats()
+    print(f"🔌 Connection pool: {stats['open']} open, {stats['hits']} hits, {stats['misses']} misses")
+
+def rebuild_search_index():
+    """Rebuild the patients full-text search index (e.g. after restoring an old backup)"""
+
+    with get_pool().connection() as conn:
+        migrate(conn)
+        try:
+            count = search.rebuild_index(conn)
+        except search.SearchUnavailable as e:
+            print(f"❌ {e}")
+            return False
+
+    print(f"🔎 Search index rebuilt: {count} patients indexed")
+    return True
+
+def backfill_stats():
+    """Recompute the daily aggregates from the raw rows"""
+
+    with get_pool().connection() as conn:
+        migrate(conn)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            daily_stats.sync_lookups(conn)
+            totals = daily_stats.backfill(conn, archive.archived_rows())
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    print("📈 Statistics rebuilt: " + ", ".join(f"{table} {count}" for table, count in sorted(totals.items())))
 
 if __name__ == "__main__":
     print("🏥 Smart Healthcare Database Setup")
     print("=" * 50)
 
+    # python db_setup.py --rebuild-search
+    if '--rebuild-search' in sys.argv[1:]:
+        sys.exit(0 if rebuild_search_index() else 1)
+
+    # python db_setup.py --backfill-stats
+    if '--backfill-stats' in sys.argv[1:]:
+        backfill_stats()
+        sys.exit(0)
+
     # Initialize database
-    init_database()
+    init_database(sample_data='--no-sample-data' not in sys.argv[1:])
 
     # Check database status
     check_database()
@@ -0,0 +1,90 @@
+"""
+Smart Healthcare Platform - Symptom Rule Engine
+Compiles every diagnosis keyword into one word-boundary regex and scores all
+rule categories in a single pass over the symptom text
+"""
+
+import json
+import os
+import re
+import threading
+
+# Rule definitions (override with HEALTHCARE_DIAGNOSIS_RULES)
+RULES_PATH = os.environ.get(
+    'HEALTHCARE_DIAGNOSIS_RULES',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'diagnosis_rules.json'),
+)
+
+
+class DiagnosisEngine:
+    def __init__(self, rules):
+        self.rules = rules['rules']
+        self.default = rules['default']
+
+        # keyword -> (rule index, keyword); the first rule to claim a keyword keeps it
+        self._keywords = {}
+        for index, rule in enumerate(self.rules):
+            for keyword in rule['keywords']:
+                keyword = ' '.join(keyword.lower().split())
+                self._keywords.setdefault(keyword, (index, keyword))
+
+        # One alternation over every keyword, longest first so "better sleep"
+        # wins over "sleep"; \b on both sides stops "cold" matching "scolding"
+        alternation = '|'.join(
+            re.escape(k).replace(r'\ ', r'\s+')
+            for k in sorted(self._keywords, key=len, reverse=True)
+        )
+        suffixes = '|'.join(re.escape(s) for s in rules.get('suffixes', []))
+        suffix_group = f'(?:{suffixes})?' if suffixes else ''
+        self._pattern = re.compile(rf'\b({alternation}){suffix_group}\b')
+
+    def _scan(self, symptoms):
+        """Return (rule index, keyword) for every keyword found in the text"""
+        keywords = self._keywords
+        hits = []
+        for found in self._pattern.findall(symptoms.lower()):
+            hit = keywords.get(found)
+            if hit is None:
+                # Phrase keyword matched across irregular whitespace
+                hit = keywords[' '.join(found.split())]
+            hits.append(hit)
+        return hits
+
+    @classmethod
+    def from_file(cls, path=RULES_PATH):
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def _best(self, scores):
+        """Highest score wins; ties go to the rule listed first"""
+        best_index, best_score = None, 0
+        for index, score in enumerate(scores):
+            if score > best_score:
+                best_index, best_score = index, score
+        return self.default if best_index is None else self.rules[best_index]
+
+    def diagnose(self, symptoms):
+        """Diagnosis text for one symptom description"""
+        scores = [0] * len(self.rules)
+        for index, _ in self._scan(symptoms):
+            scores[index] += 1
+        return self._best(scores)['diagnosis']
+
+    def diagnose_many(self, symptom_list):
+        """Diagnosis text for each symptom description, in order"""
+        diagnose = self.diagnose
+        return [diagnose(symptoms) for symptoms in symptom_list]
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """Return the process-wide engine, compiling the rules on first use"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = DiagnosisEngine.from_file()
+    return _engine
@@ -0,0 +1,33 @@
+"""
+Smart Healthcare Platform - Gunicorn Configuration
+Used by `python start_servers.py --production`; every setting can be
+overridden with the HEALTHCARE_* environment variables below
+"""
+
+import os
+
+bind = os.environ.get('HEALTHCARE_BIND', '0.0.0.0:5000')
+
+# Processes x threads; gthread workers suit the mix of blocking SQLite
+# I/O and short CPU work in the API handlers
+workers = int(os.environ.get('HEALTHCARE_WORKERS', str((os.cpu_count() or 1) * 2 + 1)))
+threads = int(os.environ.get('HEALTHCARE_THREADS', '4'))
+worker_class = 'gthread'
+
+# No preload_app: each worker imports app.py itself (the schema check is one
+# PRAGMA read), so SIGHUP picks up new code. With preload, HUP would re-fork
+# workers from the master's already-imported app and a deploy would need a restart.
+
+# SIGHUP starts a full set of new workers, then stops the old ones; in-flight
+# requests on an old worker get this long to finish
+graceful_timeout = int(os.environ.get('HEALTHCARE_GRACEFUL_TIMEOUT', '30'))
+timeout = int(os.environ.get('HEALTHCARE_WORKER_TIMEOUT', '60'))
+keepalive = 5
+
+# Recycle workers periodically to cap slow memory growth
+max_requests = int(os.environ.get('HEALTHCARE_MAX_REQUESTS', '5000'))
+max_requests_jitter = max_requests // 10
+
+# Access logging is off unless HEALTHCARE_ACCESS_LOG is set ('-' for stdout)
+accesslog = os.environ.get('HEALTHCARE_ACCESS_LOG') or None
+errorlog = '-'
@@ -0,0 +1,433 @@
+"""
+Smart Healthcare Platform - Streaming Health Data Analyzer
+Reads uploaded CSV/JSON/TXT exports in fixed-size chunks and keeps single-pass
+(Welford) statistics per numeric column, so memory stays flat for any file size
+"""
+
+import codecs
+import csv
+import json
+import math
+import os
+import re
+from functools import lru_cache
+
+from vitals_trends import TrendCollector
+
+# Bump when the result format or the statistics change
+ANALYZER_VERSION = 2
+
+# Bytes read from the upload stream per step
+CHUNK_SIZE = int(os.environ.get('HEALTHCARE_ANALYSIS_CHUNK_SIZE', str(64 * 1024)))
+
+# Columns tracked per file; anything past this is ignored to keep memory bounded
+MAX_COLUMNS = 256
+
+# Largest JSON value held whole (one record, or a file that isn't an array of objects)
+MAX_JSON_VALUE_CHARS = int(os.environ.get('HEALTHCARE_ANALYSIS_MAX_JSON_VALUE', str(16 * 1024 * 1024)))
+
+# Header spellings -> canonical metric names
+METRIC_ALIASES = {
+    'heart_rate': 'heart_rate', 'heartrate': 'heart_rate', 'hr': 'heart_rate',
+    'pulse': 'heart_rate', 'bpm': 'heart_rate', 'resting_heart_rate': 'heart_rate',
+    'blood_pressure': 'blood_pressure', 'bp': 'blood_pressure',
+    'systolic': 'systolic', 'systolic_bp': 'systolic', 'sbp': 'systolic',
+    'diastolic': 'diastolic', 'diastolic_bp': 'diastolic', 'dbp': 'diastolic',
+    'bmi': 'bmi', 'body_mass_index': 'bmi',
+    'weight': 'weight', 'weight_kg': 'weight',
+    'height': 'height', 'height_cm': 'height',
+    'spo2': 'spo2', 'oxygen_saturation': 'spo2',
+    'temperature': 'temperature', 'temp': 'temperature', 'body_temperature': 'temperature',
+    'steps': 'steps', 'step_count': 'steps',
+    'glucose': 'glucose', 'blood_glucose': 'glucose',
+}
+
+HEALTH_METRICS = ('heart_rate', 'systolic', 'diastolic', 'bmi')
+
+
+@lru_cache(maxsize=4096)
+def normalize_column(name):
+    """Lowercase snake_case header, mapped to a canonical metric name if known"""
+    name = str(name).strip().lower()
+    key = re.sub(r'[^a-z0-9]+', '_', name).strip('_')
+    if key in METRIC_ALIASES:
+        return METRIC_ALIASES[key]
+
+    # Nested JSON fields ("vitals.bmi") fall back to their leaf name
+    if '.' in name:
+        leaf = re.sub(r'[^a-z0-9]+', '_', name.rsplit('.', 1)[1]).strip('_')
+        if leaf in METRIC_ALIASES:
+            return METRIC_ALIASES[leaf]
+    return key
+
+
+class RunningStats:
+    """Count, mean, min, max and variance in one pass (Welford's algorithm)"""
+
+    __slots__ = ('count', 'mean', 'm2', 'min', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'mean': round(self.mean, 4),
+            'min': self.min,
+            'max': self.max,
+            'variance': round(self.variance, 4),
+        }
+
+
+class HealthDataAnalyzer:
+    def __init__(self):
+        self.rows = 0
+        self.invalid_values = 0
+        self.columns = {}
+
+    def add_record(self, record):
+        """Fold one row (column -> raw value) into the running statistics
+
+        Returns the parsed numeric values (metric name -> float) for later stages.
+        """
+        self.rows += 1
+        parsed = {}
+        for column, raw in record.items():
+            self.add_value(column, raw, parsed)
+        return parsed
+
+    def add_value(self, column, raw, parsed=None):
+        name = normalize_column(column)
+
+        if isinstance(raw, str):
+            try:
+                value = float(raw)
+            except ValueError:
+                # "120/80" style readings carry both blood pressure numbers
+                if name == 'blood_pressure' and '/' in raw:
+                    systolic, _, diastolic = raw.partition('/')
+                    self.add_value('systolic', systolic, parsed)
+                    self.add_value('diastolic', diastolic, parsed)
+                elif raw.strip():
+                    self.invalid_values += 1
+                return
+        elif isinstance(raw, (int, float)) and not isinstance(raw, bool):
+            value = float(raw)
+        else:
+            return
+
+        if not math.isfinite(value):
+            self.invalid_values += 1
+            return
+
+        stats = self.columns.get(name)
+        if stats is None:
+            if len(self.columns) >= MAX_COLUMNS:
+                return
+            stats = self.columns[name] = RunningStats()
+        stats.add(value)
+        if parsed is not None:
+            parsed[name] = value
+
+    def result(self, file_type):
+        metrics = {name: stats.as_dict() for name, stats in self.columns.items()}
+        return {
+            'analyzer_version': ANALYZER_VERSION,
+            'file_type': file_type,
+            'rows': self.rows,
+            'invalid_values': self.invalid_values,
+            'metrics': metrics,
+            'health_metrics': [m for m in HEALTH_METRICS if m in metrics],
+        }
+
+
+def iter_text(stream, chunk_size=CHUNK_SIZE):
+    """Decode a binary stream chunk by chunk (UTF-8, BOM tolerant)"""
+    decoder = codecs.getincrementaldecoder('utf-8-sig')(errors='replace')
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+def iter_lines(stream, chunk_size=CHUNK_SIZE):
+    """Yield lines (with line endings) without holding more than one chunk"""
+    pending = ''
+    for text in iter_text(stream, chunk_size):
+        pending += text
+        lines = pending.splitlines(keepends=True)
+        # The last piece may be a partial line; keep it for the next chunk
+        pending = lines.pop() if lines and not lines[-1].endswith(('\n', '\r')) else ''
+        yield from lines
+    if pending:
+        yield pending
+
+
+def iter_csv_records(stream, chunk_size=CHUNK_SIZE):
+    """Yield dict rows from a delimited text stream, sniffing the delimiter
+
+    Unreadable CSV (NUL bytes, oversized fields) raises ValueError naming the
+    data row (1-based, header not counted), like malformed JSON does.
+    """
+    lines = iter_lines(stream, chunk_size)
+    header_line = next(lines, None)
+    if header_line is None:
+        return
+    try:
+        dialect = csv.Sniffer().sniff(header_line, delimiters=',;\t|')
+    except csv.Error:
+        dialect = csv.excel
+    try:
+        header = next(csv.reader([header_line], dialect))
+    except csv.Error as e:
+        raise ValueError(f"Malformed CSV health data in the header: {e}")
+    reader = csv.reader(lines, dialect)
+    row_no = 0
+    while True:
+        row_no += 1
+        try:
+            row = next(reader, None)
+        except csv.Error as e:
+            raise ValueError(f"Malformed CSV health data at row {row_no}: {e}")
+        if row is None:
+            return
+        if row:
+            yield dict(zip(header, row))
+
+
+def iter_json_records(stream, chunk_size=CHUNK_SIZE):
+    """Yield flattened object records from a JSON array, NDJSON or a single JSON object"""
+    for value in iter_json_values(stream, chunk_size):
+        yield from _flatten_records(value)
+
+
+def iter_json_values(stream, chunk_size=CHUNK_SIZE):
+    """Yield the elements of a JSON array, or each top-level value of NDJSON/a single value
+
+    Arrays of objects are streamed one element at a time, both at the top level
+    and as members of a top-level object ({"records": [...]}; the wrapper's other
+    members are metadata and skipped). Any other value is held whole, up to
+    MAX_JSON_VALUE_CHARS; past that, ValueError.
+    """
+    decoder = json.JSONDecoder()
+    chunks = iter_text(stream, chunk_size)
+    buffer = ''
+    pos = 0
+    eof = False
+
+    def fill(target=1):
+        """Buffer at least `target` more characters; False once the stream is exhausted"""
+        nonlocal buffer, pos, eof
+        parts = [buffer[pos:]]
+        added = 0
+        while added < target:
+            text = next(chunks, None)
+            if text is None:
+                eof = True
+                break
+            parts.append(text)
+            added += len(text)
+        buffer = ''.join(parts)
+        pos = 0
+        return added > 0
+
+    def peek():
+        """Next non-whitespace character ('' at the end), consuming the whitespace"""
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos < len(buffer) or not fill():
+                return buffer[pos] if pos < len(buffer) else ''
+
+    def lookahead():
+        """First non-whitespace character after the one at pos, consuming nothing"""
+        offset = 1
+        while True:
+            while pos + offset < len(buffer) and buffer[pos + offset].isspace():
+                offset += 1
+            if pos + offset < len(buffer):
+                return buffer[pos + offset]
+            if not fill():
+                return ''
+
+    def decode():
+        """Decode the value at pos. An incomplete value is retried only after the
+        buffer has at least doubled, so each value is parsed a bounded number of times"""
+        nonlocal pos
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                value, end = None, None
+            # A number ending exactly at the buffer end may continue in the next chunk
+            if end is not None and (end < len(buffer) or eof or not isinstance(value, (int, float))):
+                pos = end
+                return value
+            buffered = len(buffer) - pos
+            if buffered > MAX_JSON_VALUE_CHARS:
+                raise ValueError(f"JSON health data value larger than {MAX_JSON_VALUE_CHARS} characters")
+            if not fill(max(buffered, chunk_size)):
+                if end is not None:
+                    pos = end
+                    return value
+                raise ValueError("Malformed JSON health data")
+
+    def expect(char):
+        nonlocal pos
+        if peek() != char:
+            raise ValueError("Malformed JSON health data")
+        pos += 1
+
+    def elements():
+        """Yield the elements of the array whose '[' is at pos"""
+        nonlocal pos
+        pos += 1
+        if peek() == ']':
+            pos += 1
+            return
+        while True:
+            peek()
+            yield decode()
+            char = peek()
+            pos += 1
+            if char == ']':
+                return
+            if char != ',':
+                raise ValueError("Malformed JSON health data")
+
+    def members():
+        """Walk the object whose '{' is at pos member by member, streaming arrays of objects"""
+        nonlocal pos
+        pos += 1
+        rest = {}
+        streamed = False
+        if peek() == '}':
+            pos += 1
+        else:
+            while True:
+                if peek() != '"':
+                    raise ValueError("Malformed JSON health data")
+                key = decode()
+                expect(':')
+                if peek() == '[' and lookahead() == '{':
+                    streamed = True
+                    yield from elements()
+                else:
+                    rest[key] = decode()
+                char = peek()
+                pos += 1
+                if char == '}':
+                    break
+                if char != ',':
+                    raise ValueError("Malformed JSON health data")
+        if not streamed:
+            yield rest
+
+    while True:
+        char = peek()
+        if not char:
+            return
+        if char == '[':
+            yield from elements()
+        elif char == '{':
+            # Small objects (NDJSON lines, short files) decode in one call
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                yield from members()
+                continue
+            pos = end
+            yield from _unwrap(value)
+        else:
+            yield decode()
+
+
+def _unwrap(record):
+    """The elements of a top-level object's arrays of objects, or the object itself (as members() does)"""
+    arrays = [value for value in record.values() if isinstance(value, list) and value and isinstance(value[0], dict)]
+    if not arrays:
+        yield record
+        return
+    for array in arrays:
+        yield from array
+
+
+def _flatten_records(value):
+    if isinstance(value, list):
+        for item in value:
+            yield from _flatten_records(item)
+    elif isinstance(value, dict):
+        yield _flatten(value)
+
+
+def _flatten(record, prefix=''):
+    flat = {}
+    for key, value in record.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def analyze_stream(stream, file_type, chunk_size=CHUNK_SIZE, trends=False):
+    """Analyze a binary stream of the given type ('csv', 'json' or 'txt')
+
+    With trends=True the numeric columns are also collected into contiguous
+    arrays for the vectorized trend/anomaly stage (memory grows with row count).
+    """
+    analyzer = HealthDataAnalyzer()
+    collector = TrendCollector() if trends else None
+    if file_type == 'json':
+        records = iter_json_records(stream, chunk_size)
+    else:
+        records = iter_csv_records(stream, chunk_size)
+    for record in records:
+        parsed = analyzer.add_record(record)
+        if collector is not None:
+            collector.add(parsed)
+
+    result = analyzer.result(file_type)
+    if collector is not None:
+        result['trends'] = collector.analyze()
+    return result
+
+
+def summarize(result):
+    """One-line, human readable summary for the dashboard"""
+    label = {'csv': 'CSV', 'json': 'JSON'}.get(result['file_type'], 'Text')
+    if not result['metrics']:
+        return f"{label} file processed: {result['rows']} records read, no numeric health metrics found."
+
+    shown = result['health_metrics'] or list(result['metrics'])[:4]
+    parts = [
+        f"{name} mean {result['metrics'][name]['mean']:g} "
+        f"(min {result['metrics'][name]['min']:g}, max {result['metrics'][name]['max']:g})"
+        for name in shown
+    ]
+    return f"{label} file processed: {result['rows']} records analyzed. " + "; ".join(parts) + "."
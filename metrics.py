@@ -0,0 +1,310 @@
+"""
+Smart Healthcare Platform - Request and Database Metrics
+Per-route latency histograms, SQL statement counts/times, commit latency and
+error counts, rendered in the Prometheus text format at /metrics.
+
+Counters live in this process only; under gunicorn each worker reports its
+own numbers (scrape workers individually or sum them on the Prometheus side).
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from functools import lru_cache
+
+from flask import Response, g, request
+
+ENABLED = os.environ.get('HEALTHCARE_METRICS', '1') == '1'
+
+REQUEST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter keyed by a fixed tuple of label values"""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values):
+        return self._values.get(label_values, 0)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for label_values, value in sorted(items):
+            yield self.name, _format_labels(self.labels, label_values), value
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is one bisect and three adds under a lock"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=REQUEST_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                # [per-bucket counts (+Inf last), sum, count]
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *label_values):
+        series = self._series.get(label_values)
+        return series[2] if series else 0
+
+    def samples(self):
+        with self._lock:
+            items = [(labels, (list(s[0]), s[1], s[2])) for labels, s in self._series.items()]
+        label_names = self.labels + ('le',)
+        for label_values, (counts, total, count) in sorted(items):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                yield (f'{self.name}_bucket',
+                       _format_labels(label_names, label_values + (_format_value(bound),)), cumulative)
+            labels = _format_labels(self.labels, label_values)
+            yield f'{self.name}_sum', labels, total
+            yield f'{self.name}_count', labels, count
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, name, documentation, collect):
+        """Gauge family computed at scrape time; collect() returns {label value: number}"""
+        self._collectors.append((name, documentation, collect))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{labels} {_format_value(value)}')
+
+        for name, documentation, collect in self._collectors:
+            try:
+                values = collect()
+            except Exception:
+                continue
+            lines.append(f'# HELP {name} {documentation}')
+            lines.append(f'# TYPE {name} gauge')
+            for key, value in sorted(values.items()):
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                lines.append(f'{name}{_format_labels(("stat",), (key,))} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'healthcare_http_request_duration_seconds', "Request latency by route",
+    labels=('method', 'route', 'status')))
+REQUEST_DB_SECONDS = REGISTRY.register(Histogram(
+    'healthcare_http_request_db_seconds', "Time each request spent in SQLite (statements and commits)",
+    labels=('route',), buckets=SQL_BUCKETS))
+REQUEST_ERRORS = REGISTRY.register(Counter(
+    'healthcare_http_errors_total', "Responses with a 5xx status",
+    labels=('method', 'route', 'status')))
+REQUEST_EXCEPTIONS = REGISTRY.register(Counter(
+    'healthcare_http_exceptions_total', "Exceptions raised in route handlers, caught or not",
+    labels=('route', 'exception')))
+SQL_SECONDS = REGISTRY.register(Histogram(
+    'healthcare_db_statement_duration_seconds', "SQL statement execution time by statement type",
+    labels=('statement',), buckets=SQL_BUCKETS))
+SQL_ERRORS = REGISTRY.register(Counter(
+    'healthcare_db_statement_errors_total', "SQL statements that raised",
+    labels=('statement',)))
+COMMIT_SECONDS = REGISTRY.register(Histogram(
+    'healthcare_db_commit_duration_seconds', "Commit latency (direct, or waiting on the group-commit queue)",
+    labels=('mode',), buckets=SQL_BUCKETS))
+
+
+@lru_cache(maxsize=512)
+def statement_kind(sql):
+    """First keyword of a statement (SELECT, INSERT, ...); the route SQL is a small fixed set"""
+    words = sql.split(None, 1)
+    return words[0].upper() if words else 'EMPTY'
+
+
+class RequestTimer:
+    """Per-request accumulator for time spent in the database"""
+
+    __slots__ = ('start', 'db_seconds', 'statements')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.db_seconds = 0.0
+        self.statements = 0
+
+
+def _current_timer():
+    return g.get('metrics_timer') if g else None
+
+
+class InstrumentedConnection:
+    """Times execute/executemany/commit on a pooled sqlite3 connection; everything else passes through"""
+
+    __slots__ = ('_conn', '_timer')
+
+    def __init__(self, conn, timer=None):
+        self._conn = conn
+        self._timer = timer
+
+    def _observe(self, kind, seconds):
+        SQL_SECONDS.observe(seconds, kind)
+        timer = self._timer
+        if timer is not None:
+            timer.db_seconds += seconds
+            timer.statements += 1
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return self._conn.execute(sql, parameters)
+        except Exception:
+            SQL_ERRORS.inc(statement_kind(sql))
+            raise
+        finally:
+            self._observe(statement_kind(sql), time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return self._conn.executemany(sql, seq_of_parameters)
+        except Exception:
+            SQL_ERRORS.inc(statement_kind(sql))
+            raise
+        finally:
+            self._observe(statement_kind(sql), time.perf_counter() - start)
+
+    def commit(self):
+        start = time.perf_counter()
+        try:
+            return self._conn.commit()
+        finally:
+            seconds = time.perf_counter() - start
+            COMMIT_SECONDS.observe(seconds, 'direct')
+            if self._timer is not None:
+                self._timer.db_seconds += seconds
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def instrument(conn):
+    """Wrap a connection for the current request (returned unchanged when metrics are off)"""
+    if not ENABLED:
+        return conn
+    return InstrumentedConnection(conn, _current_timer())
+
+
+def unwrap(conn):
+    return conn._conn if isinstance(conn, InstrumentedConnection) else conn
+
+
+def observe_commit(seconds, mode):
+    """Record a commit made outside an instrumented connection (e.g. the write queue)"""
+    if not ENABLED:
+        return
+    COMMIT_SECONDS.observe(seconds, mode)
+    timer = _current_timer()
+    if timer is not None:
+        timer.db_seconds += seconds
+
+
+def record_exception(exception):
+    """Count an exception a handler caught before turning it into a generic 500"""
+    if ENABLED and request:
+        REQUEST_EXCEPTIONS.inc(_route(), type(exception).__name__)
+
+
+def _route():
+    rule = request.url_rule
+    # Unmatched paths share one label so 404 scans can't blow up the series count
+    return rule.rule if rule is not None else 'unmatched'
+
+
+def init_app(app):
+    """Register the request hooks and the /metrics endpoint"""
+    if not ENABLED:
+        return
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_timer = RequestTimer()
+
+    @app.after_request
+    def _record_request(response):
+        timer = g.get('metrics_timer')
+        if timer is None:
+            return response
+        elapsed = time.perf_counter() - timer.start
+        route = _route()
+        status = response.status_code
+        REQUEST_SECONDS.observe(elapsed, request.method, route, status)
+        REQUEST_DB_SECONDS.observe(timer.db_seconds, route)
+        if status >= 500:
+            REQUEST_ERRORS.inc(request.method, route, status)
+        response.headers['Server-Timing'] = (f'db;dur={timer.db_seconds * 1000:.2f}, '
+                                             f'app;dur={(elapsed - timer.db_seconds) * 1000:.2f}')
+        return response
+
+    @app.teardown_request
+    def _record_exception(exception=None):
+        if exception is not None:
+            REQUEST_EXCEPTIONS.inc(_route(), type(exception).__name__)
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        return Response(REGISTRY.render(), mimetype=CONTENT_TYPE)
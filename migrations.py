@@ -0,0 +1,255 @@
+"""
+Smart Healthcare Platform - Schema Migrations
+Single source of truth for the SQLite schema. The applied version is kept in
+PRAGMA user_version and only missing steps run, so an up-to-date database
+costs one PRAGMA read at startup.
+"""
+
+import sqlite3
+
+
+class MigrationError(Exception):
+    """Raised when a migration step fails; the database stays at the last good version"""
+
+
+def _baseline_tables(conn):
+    conn.execute('''CREATE TABLE IF NOT EXISTS patients (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    email TEXT NOT NULL,
+                    age INTEGER NOT NULL,
+                    symptoms TEXT NOT NULL,
+                    diagnosis TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )''')
+
+    conn.execute('''CREATE TABLE IF NOT EXISTS consultations (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    email TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    status TEXT DEFAULT 'pending',
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )''')
+
+    conn.execute('''CREATE TABLE IF NOT EXISTS healthcare_plans (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    age INTEGER NOT NULL,
+                    goals TEXT NOT NULL,
+                    plan TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )''')
+
+    conn.execute('''CREATE TABLE IF NOT EXISTS health_data_analysis (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    filename TEXT NOT NULL,
+                    file_type TEXT NOT NULL,
+                    analysis_result TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )''')
+
+    # Databases created by early versions have a patients table without
+    # diagnosis/created_at. created_at can't be added with ALTER TABLE (its
+    # default isn't constant), so rebuild the table and keep the rows.
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(patients)")}
+    if not {'diagnosis', 'created_at'} <= columns:
+        conn.execute('''CREATE TABLE patients_new (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        name TEXT NOT NULL,
+                        email TEXT NOT NULL,
+                        age INTEGER NOT NULL,
+                        symptoms TEXT NOT NULL,
+                        diagnosis TEXT,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                        )''')
+        diagnosis = 'diagnosis' if 'diagnosis' in columns else 'NULL'
+        created_at = 'created_at' if 'created_at' in columns else 'CURRENT_TIMESTAMP'
+        conn.execute(f'''INSERT INTO patients_new (id, name, email, age, symptoms, diagnosis, created_at)
+                         SELECT id, name, email, age, symptoms, {diagnosis}, {created_at} FROM patients''')
+        conn.execute('DROP TABLE patients')
+        conn.execute('ALTER TABLE patients_new RENAME TO patients')
+
+
+def fts5_available(conn):
+    return any(row[0] == 'ENABLE_FTS5' for row in conn.execute("PRAGMA compile_options"))
+
+
+def create_patients_fts(conn):
+    """Full-text index over patients.symptoms/diagnosis, kept in sync by triggers.
+
+    Also used by `python db_setup.py --rebuild-search`. Skipped on SQLite
+    builds without FTS5; search then reports itself unavailable.
+    """
+    if not fts5_available(conn):
+        return False
+    # External-content table: the text lives only in patients, the index in patients_fts
+    conn.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS patients_fts USING fts5(
+                    symptoms, diagnosis,
+                    content='patients', content_rowid='id',
+                    tokenize='porter unicode61'
+                    )''')
+    conn.execute('''CREATE TRIGGER IF NOT EXISTS patients_fts_insert AFTER INSERT ON patients BEGIN
+                    INSERT INTO patients_fts(rowid, symptoms, diagnosis)
+                    VALUES (new.id, new.symptoms, COALESCE(new.diagnosis, ''));
+                    END''')
+    conn.execute('''CREATE TRIGGER IF NOT EXISTS patients_fts_delete AFTER DELETE ON patients BEGIN
+                    INSERT INTO patients_fts(patients_fts, rowid, symptoms, diagnosis)
+                    VALUES ('delete', old.id, old.symptoms, COALESCE(old.diagnosis, ''));
+                    END''')
+    conn.execute('''CREATE TRIGGER IF NOT EXISTS patients_fts_update AFTER UPDATE OF symptoms, diagnosis ON patients BEGIN
+                    INSERT INTO patients_fts(patients_fts, rowid, symptoms, diagnosis)
+                    VALUES ('delete', old.id, old.symptoms, COALESCE(old.diagnosis, ''));
+                    INSERT INTO patients_fts(rowid, symptoms, diagnosis)
+                    VALUES (new.id, new.symptoms, COALESCE(new.diagnosis, ''));
+                    END''')
+    return True
+
+
+def _index_existing_patients(conn):
+    if create_patients_fts(conn):
+        conn.execute("INSERT INTO patients_fts(patients_fts) VALUES ('rebuild')")
+
+
+def _daily_stats(conn):
+    import daily_stats  # imports the rule files; only needed when this migration runs
+    daily_stats.create_schema(conn)
+    daily_stats.sync_lookups(conn)
+    daily_stats.backfill(conn)
+
+
+# (version, description, steps); a step is SQL text or a callable(conn).
+# Append new versions at the end, never edit one that has shipped.
+MIGRATIONS = [
+    (1, "baseline tables and indexes", [
+        _baseline_tables,
+        "CREATE INDEX IF NOT EXISTS idx_patients_created_at ON patients(created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_consultations_date ON consultations(date)",
+        "CREATE INDEX IF NOT EXISTS idx_consultations_status ON consultations(status)",
+        "CREATE INDEX IF NOT EXISTS idx_healthcare_plans_created_at ON healthcare_plans(created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_health_data_analysis_created_at ON health_data_analysis(created_at)",
+    ]),
+    (2, "async data-analysis jobs", [
+        '''CREATE TABLE IF NOT EXISTS analysis_jobs (
+           id TEXT PRIMARY KEY,
+           filename TEXT NOT NULL,
+           file_type TEXT NOT NULL,
+           status TEXT NOT NULL DEFAULT 'queued',
+           analysis_id INTEGER,
+           error TEXT,
+           created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+           finished_at TIMESTAMP
+           )''',
+    ]),
+    (3, "keyset pagination indexes", [
+        "CREATE INDEX IF NOT EXISTS idx_patients_email_created_at ON patients(email, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_consultations_created_at ON consultations(created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_consultations_status_created_at ON consultations(status, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_consultations_date_created_at ON consultations(date, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_consultations_date_status_created_at ON consultations(date, status, created_at)",
+        # Prefixes of the composite indexes above; dropping them saves a write per insert
+        "DROP INDEX IF EXISTS idx_consultations_date",
+        "DROP INDEX IF EXISTS idx_consultations_status",
+    ]),
+    (4, "idempotency keys and per-date consultation capacity", [
+        '''CREATE TABLE IF NOT EXISTS idempotency_keys (
+           key TEXT PRIMARY KEY,
+           route TEXT NOT NULL,
+           request_hash TEXT NOT NULL,
+           status_code INTEGER NOT NULL,
+           response TEXT NOT NULL,
+           created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+           expires_at REAL NOT NULL
+           )''',
+        "CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires_at ON idempotency_keys(expires_at)",
+        # Dates without a row use HEALTHCARE_CONSULTATION_CAPACITY; the per-date
+        # booking count itself runs on idx_consultations_date_status_created_at
+        '''CREATE TABLE IF NOT EXISTS consultation_capacity (
+           date TEXT PRIMARY KEY,
+           capacity INTEGER NOT NULL
+           )''',
+    ]),
+    (5, "full-text search over patient symptoms and diagnoses", [
+        _index_existing_patients,
+    ]),
+    (6, "daily aggregates for dashboard statistics", [
+        _daily_stats,
+    ]),
+    (7, "content-hash cache for data-analysis results", [
+        "ALTER TABLE health_data_analysis ADD COLUMN content_hash TEXT",
+        "ALTER TABLE health_data_analysis ADD COLUMN analyzer_version INTEGER",
+        "ALTER TABLE health_data_analysis ADD COLUMN trends INTEGER",
+        "ALTER TABLE health_data_analysis ADD COLUMN last_used_at REAL",
+        # Only cache entries are indexed; plain upload history rows have no hash
+        '''CREATE INDEX IF NOT EXISTS idx_health_data_analysis_content_hash
+           ON health_data_analysis(content_hash, analyzer_version, file_type, trends)
+           WHERE content_hash IS NOT NULL''',
+    ]),
+    (8, "trigger-maintained booked counts per consultation date", [
+        # Bookings per appointment date that hold a slot (status not 'cancelled',
+        # bookings.RELEASED_STATUSES), read by the capacity check and the calendar
+        '''CREATE TABLE IF NOT EXISTS consultation_bookings (
+           date TEXT PRIMARY KEY,
+           booked INTEGER NOT NULL DEFAULT 0
+           ) WITHOUT ROWID''',
+        '''CREATE TRIGGER IF NOT EXISTS consultations_booked_insert AFTER INSERT ON consultations
+           WHEN new.status NOT IN ('cancelled') BEGIN
+           INSERT INTO consultation_bookings (date, booked) VALUES (new.date, 1)
+           ON CONFLICT(date) DO UPDATE SET booked = booked + 1;
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS consultations_booked_delete AFTER DELETE ON consultations
+           WHEN old.status NOT IN ('cancelled') BEGIN
+           UPDATE consultation_bookings SET booked = booked - 1 WHERE date = old.date;
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS consultations_booked_update AFTER UPDATE OF date, status ON consultations BEGIN
+           UPDATE consultation_bookings SET booked = booked - 1
+           WHERE date = old.date AND old.status NOT IN ('cancelled');
+           INSERT INTO consultation_bookings (date, booked) SELECT new.date, 1 WHERE new.status NOT IN ('cancelled')
+           ON CONFLICT(date) DO UPDATE SET booked = booked + 1;
+           END''',
+        '''INSERT OR REPLACE INTO consultation_bookings (date, booked)
+           SELECT date, COUNT(*) FROM consultations WHERE status NOT IN ('cancelled') GROUP BY date''',
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn, target=LATEST_VERSION):
+    """Apply every missing migration up to target; returns the list of versions applied"""
+    applied = []
+    for version, description, steps in MIGRATIONS:
+        if version > target:
+            break
+
+        # IMMEDIATE takes the write lock up front, so concurrent workers
+        # starting together apply each step exactly once
+        if conn.in_transaction:
+            conn.commit()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if current_version(conn) >= version:
+                conn.rollback()
+                continue
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            raise MigrationError(f"Migration {version} ({description}) failed: {e}") from e
+        applied.append(version)
+    return applied
+
+
+def ensure_schema(conn):
+    """Startup check: one PRAGMA read when the schema is already current"""
+    if current_version(conn) >= LATEST_VERSION:
+        return []
+    return migrate(conn)
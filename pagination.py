@@ -0,0 +1,73 @@
+"""
+Smart Healthcare Platform - Keyset Pagination
+Newest-first list pages on (created_at, id) with opaque cursors, so page cost
+stays flat however deep the client scrolls (no OFFSET scans)
+"""
+
+import base64
+import json
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor we didn't issue"""
+
+
+def encode_cursor(created_at, row_id):
+    raw = json.dumps([created_at, row_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursor("Invalid cursor")
+    if not isinstance(created_at, str) or not isinstance(row_id, int):
+        raise InvalidCursor("Invalid cursor")
+    return created_at, row_id
+
+
+def parse_limit(value):
+    """Clamp the ?limit= query value to 1..MAX_LIMIT"""
+    if value in (None, ''):
+        return DEFAULT_LIMIT
+    limit = int(value)  # ValueError surfaces as a 400 in the route
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def fetch_page(conn, table, columns, filters=None, cursor=None, limit=DEFAULT_LIMIT):
+    """Return (rows, next_cursor) for one newest-first page
+
+    filters is a dict of column -> value equality conditions; table, columns
+    and filter names come from code, never from the client.
+    """
+    where = []
+    params = []
+    for column, value in (filters or {}).items():
+        where.append(f"{column} = ?")
+        params.append(value)
+
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        # Row-value comparison lets SQLite seek straight into the index
+        where.append("(created_at, id) < (?, ?)")
+        params.extend([created_at, row_id])
+
+    sql = f"SELECT {', '.join(columns)} FROM {table}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+    params.append(limit + 1)
+
+    rows = [dict(row) for row in conn.execute(sql, params).fetchall()]
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last['created_at'], last['id'])
+    return rows, next_cursor
@@ -0,0 +1,110 @@
+"""
+Smart Healthcare Platform - Healthcare Plan Builder
+Assembles plans from precomputed text fragments and caches finished plans
+by (age, goal flags)
+"""
+
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+
+# Plan sections (override with HEALTHCARE_PLAN_SECTIONS)
+SECTIONS_PATH = os.environ.get(
+    'HEALTHCARE_PLAN_SECTIONS',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'plan_sections.json'),
+)
+
+# Maximum number of finished plans kept in memory
+PLAN_CACHE_SIZE = int(os.environ.get('HEALTHCARE_PLAN_CACHE_SIZE', '1024'))
+
+
+class PlanBuilder:
+    def __init__(self, sections, cache_size=PLAN_CACHE_SIZE):
+        self.header = sections['header']
+        self.cache_size = cache_size
+
+        # flag -> fragment, in table order so plans always list sections the same way
+        self.flags = []
+        self._fragments = {}
+        keyword_flag = {}
+        for goal in sections['goals']:
+            self.flags.append(goal['flag'])
+            self._fragments[goal['flag']] = ''.join(f"- {line}\n" for line in goal['lines'])
+            for keyword in goal['keywords']:
+                keyword_flag[keyword.lower()] = goal['flag']
+
+        general = sections['general']
+        self._footer = general['title'] + ''.join(f"- {line}\n" for line in general['lines'])
+
+        # Plain substring match (no word boundaries), same as the original checks
+        self._keyword_flag = keyword_flag
+        self._pattern = re.compile('|'.join(
+            re.escape(k) for k in sorted(keyword_flag, key=len, reverse=True)
+        ))
+
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @classmethod
+    def from_file(cls, path=SECTIONS_PATH):
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def detect(self, goals):
+        """Return the goal flags mentioned in the text, in table order"""
+        found = {self._keyword_flag[m] for m in self._pattern.findall(goals.lower())}
+        return tuple(flag for flag in self.flags if flag in found)
+
+    def build(self, age, goals):
+        """Return the plan text for this age and goal description"""
+        key = (age, self.detect(goals))
+
+        with self._lock:
+            plan = self._cache.get(key)
+            if plan is not None:
+                self._cache.move_to_end(key)
+                self._hits += 1
+                return plan
+            self._misses += 1
+
+        parts = [self.header.format(age=age)]
+        parts.extend(self._fragments[flag] for flag in key[1])
+        parts.append(self._footer)
+        plan = ''.join(parts)
+
+        with self._lock:
+            self._cache[key] = plan
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return plan
+
+    def stats(self):
+        """Cache hit/miss counters"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': self._hits / lookups if lookups else 0.0,
+                'size': len(self._cache),
+                'max_size': self.cache_size,
+            }
+
+
+_builder = None
+_builder_lock = threading.Lock()
+
+
+def get_plan_builder():
+    """Return the process-wide plan builder, loading the sections on first use"""
+    global _builder
+    if _builder is None:
+        with _builder_lock:
+            if _builder is None:
+                _builder = PlanBuilder.from_file()
+    return _builder
@@ -0,0 +1,291 @@
+"""
+Smart Healthcare Platform - On-demand Profiler
+Admin-only endpoints for profiling a running worker without a restart:
+
+- a sampling profiler that snapshots the stacks of threads serving requests
+  every few milliseconds for a set window
+- a single-request tracer, switched on per request with the X-Profile header
+
+Both return collapsed stacks ("frame;frame;frame count" per line), which
+flamegraph.pl, speedscope and inferno read directly. Everything is disabled
+unless HEALTHCARE_ADMIN_TOKEN is set; requests must send it as X-Admin-Token.
+Under gunicorn each call reaches one worker, so a window profiles that worker.
+"""
+
+import hmac
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from flask import Blueprint, Response, abort, g, jsonify, request
+
+ADMIN_TOKEN = os.environ.get('HEALTHCARE_ADMIN_TOKEN', '')
+ENABLED = bool(ADMIN_TOKEN)
+
+DEFAULT_INTERVAL_MS = float(os.environ.get('HEALTHCARE_PROFILER_INTERVAL_MS', '10'))
+DEFAULT_SECONDS = 30
+MAX_SECONDS = 600
+MAX_DEPTH = 128
+KEPT_REQUEST_PROFILES = 20
+
+profiler_bp = Blueprint('profiler', __name__, url_prefix='/admin/profiler')
+
+# thread ident -> "METHOD /route" for threads currently serving a request
+_active_requests = {}
+
+_labels = {}
+
+
+def frame_label(code):
+    """module:qualname for a code object, cached"""
+    label = _labels.get(code)
+    if label is None:
+        name = getattr(code, 'co_qualname', code.co_name)
+        module = os.path.splitext(os.path.basename(code.co_filename))[0]
+        label = _labels[code] = f"{module}:{name}".replace(';', ',').replace(' ', '_')
+    return label
+
+
+def collapse(counts):
+    """Render {stack: weight} as collapsed-stack text, heaviest first"""
+    lines = [f"{stack} {weight}" for stack, weight in sorted(counts.items(), key=lambda item: -item[1])]
+    return '\n'.join(lines) + ('\n' if lines else '')
+
+
+class Sampler:
+    """Snapshots request-thread stacks at a fixed interval on a background thread"""
+
+    def __init__(self, seconds=DEFAULT_SECONDS, interval_ms=DEFAULT_INTERVAL_MS, all_threads=False):
+        self.seconds = seconds
+        self.interval = interval_ms / 1000.0
+        self.all_threads = all_threads
+        self.counts = {}
+        self.samples = 0
+        self.started_at = None
+        self.stopped_at = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='healthcare-profiler', daemon=True)
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    def start(self):
+        self.started_at = time.time()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        deadline = time.monotonic() + self.seconds
+        counts = self.counts
+        while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+            active = dict(_active_requests)
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                root = active.get(ident)
+                if root is None:
+                    if not self.all_threads:
+                        continue
+                    root = 'thread'
+                stack = []
+                while frame is not None and len(stack) < MAX_DEPTH:
+                    stack.append(frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(root.replace(' ', '_'))
+                key = ';'.join(reversed(stack))
+                counts[key] = counts.get(key, 0) + 1
+            self.samples += 1
+        self.stopped_at = time.time()
+
+    def status(self):
+        end = self.stopped_at or time.time()
+        return {
+            "running": self.running,
+            "seconds": self.seconds,
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "stacks": len(self.counts),
+            "elapsed_seconds": round(end - self.started_at, 3) if self.started_at else 0,
+        }
+
+
+class RequestTracer:
+    """sys.setprofile hook for one thread; weights are microseconds of self time per stack"""
+
+    def __init__(self, root):
+        self.root = root.replace(' ', '_')
+        self.paths = [self.root]
+        self.totals = {}
+        self.last = time.perf_counter()
+
+    def __call__(self, frame, event, arg):
+        now = time.perf_counter()
+        current = self.paths[-1]
+        self.totals[current] = self.totals.get(current, 0.0) + (now - self.last)
+
+        if event == 'call':
+            self.paths.append(f"{current};{frame_label(frame.f_code)}")
+        elif event == 'c_call':
+            name = getattr(arg, '__qualname__', None) or getattr(arg, '__name__', 'builtin')
+            self.paths.append(f"{current};builtin:{name}".replace(' ', '_'))
+        elif len(self.paths) > 1:
+            # return / c_return / c_exception; returns above the starting frame are ignored
+            self.paths.pop()
+        self.last = time.perf_counter()
+
+    def result(self):
+        return {stack: int(seconds * 1e6) for stack, seconds in self.totals.items() if seconds >= 1e-6}
+
+
+class ProfilerState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sampler = None
+        self.requests = OrderedDict()
+
+    def keep_request_profile(self, profile_id, profile):
+        with self.lock:
+            self.requests[profile_id] = profile
+            while len(self.requests) > KEPT_REQUEST_PROFILES:
+                self.requests.popitem(last=False)
+
+
+_state = ProfilerState()
+
+
+def authorized():
+    token = request.headers.get('X-Admin-Token', '')
+    return ENABLED and hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+
+@profiler_bp.before_request
+def require_admin():
+    if not ENABLED:
+        abort(404)
+    if not authorized():
+        return jsonify({"error": "Admin token required"}), 403
+
+
+def _wants_format():
+    return request.args.get('format', 'collapsed').lower()
+
+
+def _sampler_response(sampler):
+    if _wants_format() == 'json':
+        return jsonify({"status": sampler.status(), "stacks": sampler.counts})
+    return Response(collapse(sampler.counts), mimetype='text/plain')
+
+
+# Start a sampling window (?seconds=30&interval_ms=10&all_threads=0)
+@profiler_bp.route('/start', methods=['POST'])
+def start():
+    try:
+        seconds = min(float(request.args.get('seconds', DEFAULT_SECONDS)), MAX_SECONDS)
+        interval_ms = max(float(request.args.get('interval_ms', DEFAULT_INTERVAL_MS)), 1.0)
+    except ValueError:
+        return jsonify({"error": "seconds and interval_ms must be numbers"}), 400
+    if seconds <= 0:
+        return jsonify({"error": "seconds must be positive"}), 400
+    all_threads = request.args.get('all_threads', '0').lower() in ('1', 'true', 'yes', 'on')
+
+    with _state.lock:
+        if _state.sampler is not None and _state.sampler.running:
+            return jsonify({"error": "Profiler already running", "status": _state.sampler.status()}), 409
+        _state.sampler = Sampler(seconds=seconds, interval_ms=interval_ms, all_threads=all_threads)
+        _state.sampler.start()
+        status = _state.sampler.status()
+
+    status["pid"] = os.getpid()
+    return jsonify(status), 202
+
+
+# Stop the window early and return what was collected
+@profiler_bp.route('/stop', methods=['POST'])
+def stop():
+    sampler = _state.sampler
+    if sampler is None:
+        return jsonify({"error": "Profiler has not been started"}), 404
+    sampler.stop()
+    return _sampler_response(sampler)
+
+
+@profiler_bp.route('/status', methods=['GET'])
+def status():
+    sampler = _state.sampler
+    result = sampler.status() if sampler is not None else {"running": False}
+    result["pid"] = os.getpid()
+    result["request_profiles"] = list(_state.requests)
+    return jsonify(result)
+
+
+# Latest window's stacks (?format=collapsed|json); partial while still running
+@profiler_bp.route('/result', methods=['GET'])
+def result():
+    sampler = _state.sampler
+    if sampler is None:
+        return jsonify({"error": "Profiler has not been started"}), 404
+    return _sampler_response(sampler)
+
+
+# Stacks of one request profiled with X-Profile: 1 (id from the X-Profile-Id response header)
+@profiler_bp.route('/requests/<profile_id>', methods=['GET'])
+def request_profile(profile_id):
+    profile = _state.requests.get(profile_id)
+    if profile is None:
+        return jsonify({"error": "Request profile not found"}), 404
+    if _wants_format() == 'json':
+        return jsonify(profile)
+    return Response(collapse(profile['stacks']), mimetype='text/plain')
+
+
+def _request_root():
+    rule = request.url_rule
+    return f"{request.method} {rule.rule if rule is not None else 'unmatched'}"
+
+
+def init_app(app):
+    """Register the blueprint and the hooks that track/trace request threads"""
+    if not ENABLED:
+        return
+
+    app.register_blueprint(profiler_bp)
+
+    @app.before_request
+    def _track_request():
+        root = _request_root()
+        _active_requests[threading.get_ident()] = root
+        if request.headers.get('X-Profile') == '1' and authorized():
+            g.profiler_tracer = RequestTracer(root)
+            g.profiler_started = time.perf_counter()
+            sys.setprofile(g.profiler_tracer)
+
+    @app.after_request
+    def _finish_trace(response):
+        tracer = g.pop('profiler_tracer', None)
+        if tracer is not None:
+            sys.setprofile(None)
+            profile_id = uuid.uuid4().hex[:12]
+            _state.keep_request_profile(profile_id, {
+                "route": tracer.root,
+                "status": response.status_code,
+                "elapsed_ms": round((time.perf_counter() - g.pop('profiler_started')) * 1000, 3),
+                "unit": "microseconds",
+                "stacks": tracer.result(),
+            })
+            response.headers['X-Profile-Id'] = profile_id
+        return response
+
+    @app.teardown_request
+    def _untrack_request(exception=None):
+        if g.pop('profiler_tracer', None) is not None:
+            sys.setprofile(None)
+        _active_requests.pop(threading.get_ident(), None)
@@ -0,0 +1,305 @@
+"""
+Smart Healthcare Platform - Rate Limiting and Load Shedding
+Token buckets per (client IP, route) in front of the expensive endpoints,
+and adaptive 503s when the process is already overloaded.
+
+- Limits are per route; HEALTHCARE_RATE_LIMITS overrides them, e.g.
+  "/api/diagnosis=10:40,/api/data-analysis=off" (tokens per second : burst)
+- Buckets live in memory (per process) or, with HEALTHCARE_RATE_LIMIT_DB set,
+  in a small SQLite file shared by every worker on the host
+- Load shedding (HEALTHCARE_LOAD_SHEDDING=1) answers limited routes with
+  503 + Retry-After while queue time (X-Request-Start from the proxy) or the
+  recent SQLite time of the small interactive routes (busy waits included)
+  is over its threshold; bulk loads and admin work don't feed that average
+"""
+
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from flask import g, jsonify, request
+
+ENABLED = os.environ.get('HEALTHCARE_RATE_LIMIT', '0') == '1'
+SHEDDING_ENABLED = os.environ.get('HEALTHCARE_LOAD_SHEDDING', '0') == '1'
+
+# Shared bucket store; empty keeps buckets in process memory
+RATE_LIMIT_DB = os.environ.get('HEALTHCARE_RATE_LIMIT_DB', '')
+
+# Use the first X-Forwarded-For address as the client IP (only behind a trusted proxy)
+TRUST_PROXY = os.environ.get('HEALTHCARE_TRUST_PROXY', '0') == '1'
+
+# Shed load when requests waited longer than this in the proxy/server queue...
+SHED_QUEUE_MS = float(os.environ.get('HEALTHCARE_SHED_QUEUE_MS', '1000'))
+# ...or when recent requests spent longer than this in SQLite (moving average)
+SHED_DB_MS = float(os.environ.get('HEALTHCARE_SHED_DB_MS', '500'))
+SHED_RETRY_AFTER = int(os.environ.get('HEALTHCARE_SHED_RETRY_AFTER', '2'))
+# The DB-time average halves every this many seconds without new samples
+SHED_HALF_LIFE = 5.0
+
+# Routes whose SQLite time feeds the average. Each does a few small statements,
+# so a rising average means lock or I/O contention; batch/bulk imports and admin
+# tools spend their time on their own work and would shed everyone else
+SHED_SAMPLE_ROUTES = frozenset((
+    '/api/diagnosis',
+    '/api/consultation',
+    '/api/healthcare-plan',
+    '/api/data-analysis',
+    '/api/patients/search',
+))
+
+MAX_MEMORY_KEYS = 100000
+STALE_BUCKET_SECONDS = 3600
+
+# Route (Flask rule) -> (tokens per second, burst) for each client IP
+DEFAULT_LIMITS = {
+    '/api/diagnosis': (5.0, 20),
+    '/api/diagnosis/batch': (2.0, 10),
+    '/api/consultation': (2.0, 10),
+    '/api/healthcare-plan': (5.0, 20),
+    '/api/data-analysis': (1.0, 5),
+    '/api/patients/bulk': (0.1, 2),
+    '/api/patients/search': (5.0, 20),
+}
+
+
+def parse_limits(spec, defaults=DEFAULT_LIMITS):
+    """Apply "route=rate:burst,route=off" overrides to the default table"""
+    limits = dict(defaults)
+    for item in filter(None, (part.strip() for part in (spec or '').split(','))):
+        route, _, value = item.partition('=')
+        route, value = route.strip(), value.strip().lower()
+        if value == 'off':
+            limits.pop(route, None)
+            continue
+        rate, _, burst = value.partition(':')
+        rate = float(rate)
+        limits[route] = (rate, int(burst) if burst else max(1, math.ceil(rate)))
+    return limits
+
+
+LIMITS = parse_limits(os.environ.get('HEALTHCARE_RATE_LIMITS', ''))
+
+
+def _refill(tokens, updated, rate, burst, now):
+    if tokens is None:
+        return float(burst)
+    return min(float(burst), tokens + max(0.0, now - updated) * rate)
+
+
+def _decision(tokens, rate):
+    """(allowed, tokens left, seconds until the next token)"""
+    if tokens >= 1.0:
+        return True, tokens - 1.0, 0.0
+    return False, tokens, (1.0 - tokens) / rate if rate > 0 else float('inf')
+
+
+class MemoryBackend:
+    """Buckets in a bounded LRU dict; each worker process counts on its own"""
+
+    def __init__(self, max_keys=MAX_MEMORY_KEYS):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (None, now))
+            allowed, left, retry_after = _decision(_refill(tokens, updated, rate, burst, now), rate)
+            self._buckets[key] = (left, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, left, retry_after
+
+
+class SQLiteBackend:
+    """Buckets in a separate SQLite file so all workers share one budget per client"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._pruned_at = 0.0
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode = WAL')
+            # Losing a few bucket updates in a crash is harmless
+            conn.execute('PRAGMA synchronous = OFF')
+            conn.execute('''CREATE TABLE IF NOT EXISTS rate_buckets (
+                            key TEXT PRIMARY KEY,
+                            tokens REAL NOT NULL,
+                            updated REAL NOT NULL
+                            ) WITHOUT ROWID''')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def take(self, key, rate, burst, now=None):
+        # Wall clock: the timestamps are compared across processes
+        now = time.time() if now is None else now
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT tokens, updated FROM rate_buckets WHERE key = ?', (key,)).fetchone()
+            tokens = _refill(row[0] if row else None, row[1] if row else now, rate, burst, now)
+            allowed, left, retry_after = _decision(tokens, rate)
+            conn.execute('''INSERT INTO rate_buckets (key, tokens, updated) VALUES (?, ?, ?)
+                            ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated''',
+                         (key, left, now))
+            if now - self._pruned_at > STALE_BUCKET_SECONDS:
+                conn.execute('DELETE FROM rate_buckets WHERE updated < ?', (now - STALE_BUCKET_SECONDS,))
+                self._pruned_at = now
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return allowed, left, retry_after
+
+
+class LoadShedder:
+    """Time-decayed average of per-request SQLite time plus the proxy queue time"""
+
+    def __init__(self, db_threshold_ms=SHED_DB_MS, queue_threshold_ms=SHED_QUEUE_MS, half_life=SHED_HALF_LIFE):
+        self.db_threshold = db_threshold_ms / 1000.0
+        self.queue_threshold = queue_threshold_ms / 1000.0
+        self.half_life = half_life
+        self.db_average = 0.0
+        self.shed = 0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _decayed(self, now):
+        return self.db_average * 0.5 ** ((now - self._updated) / self.half_life)
+
+    def observe_db(self, seconds):
+        now = time.monotonic()
+        with self._lock:
+            # Weight each sample ~10%; idle time decays the average toward zero
+            self.db_average = self._decayed(now) * 0.9 + seconds * 0.1
+            self._updated = now
+
+    def overloaded(self, queue_seconds=None):
+        """Reason string when the request should be shed, else None"""
+        if queue_seconds is not None and queue_seconds > self.queue_threshold:
+            return 'queue'
+        if self._decayed(time.monotonic()) > self.db_threshold:
+            return 'database'
+        return None
+
+    def stats(self):
+        return {
+            "db_average_ms": round(self._decayed(time.monotonic()) * 1000, 3),
+            "db_threshold_ms": self.db_threshold * 1000,
+            "queue_threshold_ms": self.queue_threshold * 1000,
+            "shed": self.shed,
+        }
+
+
+def queue_seconds(header):
+    """Age of the request from X-Request-Start ("t=<epoch>" in s, ms or µs, as nginx/Heroku send it)"""
+    if not header:
+        return None
+    try:
+        started = float(header.strip().lstrip('t='))
+    except ValueError:
+        return None
+    # Scale by magnitude: seconds ~1e9, milliseconds ~1e12, microseconds ~1e15
+    while started > 1e11:
+        started /= 1000.0
+    return max(0.0, time.time() - started)
+
+
+def client_ip(remote_addr, forwarded=None):
+    if TRUST_PROXY and forwarded:
+        return forwarded.split(',')[0].strip()
+    return remote_addr or 'unknown'
+
+
+_backend = None
+_shedder = LoadShedder()
+_rejected = {'rate_limited': 0}
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = SQLiteBackend(RATE_LIMIT_DB) if RATE_LIMIT_DB else MemoryBackend()
+    return _backend
+
+
+def stats():
+    result = _shedder.stats()
+    result["rate_limited"] = _rejected['rate_limited']
+    return result
+
+
+def check(route, client, request_start=None, limits=None):
+    """-> (rejection, limit): rejection is None or (status, payload, headers) to answer with;
+    limit is the (burst, tokens left) pair for the X-RateLimit headers when a bucket was charged
+    """
+    limit = (LIMITS if limits is None else limits).get(route)
+    if limit is None:
+        return None, None
+
+    if SHEDDING_ENABLED:
+        reason = _shedder.overloaded(queue_seconds(request_start))
+        if reason is not None:
+            _shedder.shed += 1
+            return (503, {"error": "Server is busy, please retry shortly", "reason": reason},
+                    {'Retry-After': str(SHED_RETRY_AFTER)}), None
+
+    if not ENABLED:
+        return None, None
+    rate, burst = limit
+    allowed, remaining, retry_after = get_backend().take(f"{client}|{route}", rate, burst)
+    if not allowed:
+        _rejected['rate_limited'] += 1
+        return (429, {"error": "Too many requests, please slow down"},
+                {'Retry-After': str(max(1, math.ceil(retry_after))),
+                 'X-RateLimit-Limit': str(burst), 'X-RateLimit-Remaining': '0'}), None
+    return None, (burst, remaining)
+
+
+def init_app(app, limits=None):
+    """Check limits and overload before limited routes; feed the shedder after each request"""
+    if not (ENABLED or SHEDDING_ENABLED):
+        return
+
+    @app.before_request
+    def _limit_request():
+        rule = request.url_rule
+        if rule is None or request.method == 'OPTIONS':
+            return None
+        rejection, g.rate_limit = check(rule.rule,
+                                        client_ip(request.remote_addr, request.headers.get('X-Forwarded-For')),
+                                        request.headers.get('X-Request-Start'), limits)
+        if rejection is None:
+            return None
+        status, payload, headers = rejection
+        response = jsonify(payload)
+        response.status_code = status
+        response.headers.update(headers)
+        return response
+
+    @app.after_request
+    def _after_request(response):
+        limit = g.pop('rate_limit', None)
+        if limit is not None:
+            response.headers['X-RateLimit-Limit'] = str(limit[0])
+            response.headers['X-RateLimit-Remaining'] = str(int(limit[1]))
+        # metrics.py's per-request SQLite time (statements + commits, busy waits included)
+        timer = g.get('metrics_timer')
+        rule = request.url_rule
+        if (SHEDDING_ENABLED and timer is not None and timer.db_seconds
+                and rule is not None and rule.rule in SHED_SAMPLE_ROUTES):
+            _shedder.observe_db(timer.db_seconds)
+        return response
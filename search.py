@@ -0,0 +1,100 @@
+"""
+Smart Healthcare Platform - Patient Search
+Ranked full-text search over patients.symptoms and diagnosis using the
+patients_fts FTS5 index (migration 5), with highlighted matches and an
+optional created_at date range
+"""
+
+import html
+import re
+
+from migrations import create_patients_fts
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+MAX_OFFSET = 1000
+MAX_TERMS = 16
+
+# bm25 column weights: a hit in the symptoms counts for more than one in the diagnosis text
+SYMPTOMS_WEIGHT = 2.0
+DIAGNOSIS_WEIGHT = 1.0
+
+# Control characters as highlight markers; the text is HTML-escaped before
+# they become <mark> tags, so patient input can't inject markup
+_OPEN, _CLOSE = '\x02', '\x03'
+
+_TERM_RE = re.compile(r'[\w]+\*?', re.UNICODE)
+
+
+class SearchUnavailable(Exception):
+    """The SQLite build has no FTS5 or the index hasn't been built"""
+
+
+class InvalidQuery(ValueError):
+    """The search text has no searchable terms"""
+
+
+def build_match(text):
+    """Turn free text into an FTS5 query: every word must match, 'word*' matches a prefix"""
+    terms = []
+    for term in _TERM_RE.findall(text or '')[:MAX_TERMS]:
+        prefix = term.endswith('*')
+        word = term.rstrip('*')
+        if word:
+            terms.append(f'"{word}"*' if prefix else f'"{word}"')
+    if not terms:
+        raise InvalidQuery("Search query must contain at least one word")
+    return ' '.join(terms)
+
+
+def _mark(text):
+    if text is None:
+        return None
+    return html.escape(text).replace(_OPEN, '<mark>').replace(_CLOSE, '</mark>')
+
+
+def index_exists(conn):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'patients_fts'").fetchone() is not None
+
+
+def search_patients(conn, text, date_from=None, date_to=None, limit=DEFAULT_LIMIT, offset=0):
+    """Best matches first; returns (rows, has_more). Dates are inclusive YYYY-MM-DD strings."""
+    if not index_exists(conn):
+        raise SearchUnavailable("Full-text search index is not available")
+
+    sql = f'''SELECT p.id, p.name, p.email, p.age, p.symptoms, p.diagnosis, p.created_at,
+                     highlight(patients_fts, 0, ?, ?) AS symptoms_highlight,
+                     highlight(patients_fts, 1, ?, ?) AS diagnosis_highlight,
+                     bm25(patients_fts, {SYMPTOMS_WEIGHT}, {DIAGNOSIS_WEIGHT}) AS rank
+              FROM patients_fts
+              JOIN patients p ON p.id = patients_fts.rowid
+              WHERE patients_fts MATCH ?'''
+    params = [_OPEN, _CLOSE, _OPEN, _CLOSE, build_match(text)]
+    if date_from:
+        sql += " AND p.created_at >= ?"
+        params.append(date_from)
+    if date_to:
+        sql += " AND p.created_at < date(?, '+1 day')"
+        params.append(date_to)
+    sql += " ORDER BY rank LIMIT ? OFFSET ?"
+    params += [limit + 1, offset]
+
+    rows = []
+    for row in conn.execute(sql, params).fetchall():
+        item = dict(row)
+        item['symptoms_highlight'] = _mark(item['symptoms_highlight'])
+        item['diagnosis_highlight'] = _mark(item['diagnosis_highlight'])
+        # bm25 is lower-is-better; flip it so clients can sort descending
+        item['score'] = round(-item.pop('rank'), 4)
+        rows.append(item)
+    return rows[:limit], len(rows) > limit
+
+
+def rebuild_index(conn):
+    """Create the index and triggers if missing and re-index every patient; returns the row count"""
+    if not create_patients_fts(conn):
+        raise SearchUnavailable("This SQLite build has no FTS5 support")
+    conn.execute("INSERT INTO patients_fts(patients_fts) VALUES ('rebuild')")
+    conn.execute("INSERT INTO patients_fts(patients_fts) VALUES ('optimize')")
+    conn.commit()
+    return conn.execute("SELECT COUNT(*) FROM patients").fetchone()[0]
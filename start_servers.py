@@ -4,20 +4,73 @@ Smart Healthcare Platform - Server Startup Script
 This script starts both the Flask backend and Node.js blog server
 """
 
+import argparse
 import subprocess
 import sys
 import os
 import time
 import signal
 import threading
+import urllib.request
 from pathlib import Path
 
+import backup
+import child_logs
+
+# Address the Flask backend listens on; gunicorn.conf.py and app.py read the same variable
+FLASK_BIND = os.environ.get('HEALTHCARE_BIND', '0.0.0.0:5000')
+
+
+def local_url(bind, path=''):
+    """URL for reaching a host:port bind from this machine (None for a unix: socket)"""
+    if bind.startswith('unix:'):
+        return None
+    host, _, port = bind.rpartition(':')
+    host = host.strip('[]')
+    if host in ('', '0.0.0.0', '::'):
+        host = '127.0.0.1'
+    elif ':' in host:
+        host = f'[{host}]'
+    return f"http://{host}:{port}{path}"
+
+
+# Health endpoints polled by monitor_servers (no HTTP check for a unix: socket)
+FLASK_URL = local_url(FLASK_BIND)
+FLASK_HEALTH_URL = local_url(FLASK_BIND, '/healthz')
+NODE_HEALTH_URL = "http://127.0.0.1:5001/api/health"
+
+# Seconds between health checks, and failed checks in a row before a respawn
+HEALTH_CHECK_INTERVAL = 5
+HEALTH_CHECK_FAILURES = 3
+
+# Seconds a freshly started server gets before it is health checked
+STARTUP_GRACE = 10
+
+# Longest wait between repeated respawns of a crashing server
+RESTART_BACKOFF_MAX = 60
+
 class ServerManager:
-    def __init__(self):
+    def __init__(self, production=False, workers=None, threads=None, log_dir=child_logs.LOG_DIR,
+                 backup_every=None):
         self.flask_process = None
         self.node_process = None
         self.running = False
 
+        # Production mode runs app.py under gunicorn (see gunicorn.conf.py)
+        self.production = production
+        self.workers = workers
+        self.threads = threads
+
+        self.started_at = {'flask': 0.0, 'node': 0.0}
+        self.restarts = {'flask': 0, 'node': 0}
+        self.lock = threading.Lock()
+
+        # Child stdout/stderr are drained into logs/flask.log and logs/node.log
+        self.logs = child_logs.LogPipeline(log_dir)
+
+        # Optional online database backups every backup_every hours (see backup.py)
+        self.backup_scheduler = backup.BackupScheduler(backup_every * 3600) if backup_every else None
+
     def check_requirements(self):
         """Check if all requirements are installed"""
         print("🔍 Checking requirements...")
@@ -32,6 +85,15 @@ class ServerManager:
             print("💡 Run: pip install -r requirements.txt")
             return False
 
+        if self.production:
+            try:
+                import gunicorn
+                print("✅ Gunicorn (production mode): OK")
+            except ImportError:
+                print("❌ Production mode needs gunicorn")
+                print("💡 Run: pip install -r requirements.txt")
+                return False
+
         # Check Node.js dependencies
         if not Path("healthcare-blog/node_modules").exists():
             print("❌ Node.js dependencies not installed")
@@ -61,13 +123,28 @@ class ServerManager:
             print(f"❌ Database setup error: {e}")
             return False
 
+    def flask_command(self):
+        """Command line for the Flask backend in the current mode"""
+        if not self.production:
+            return [sys.executable, "app.py"]
+
+        command = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py"]
+        if self.workers:
+            command += ["--workers", str(self.workers)]
+        if self.threads:
+            command += ["--threads", str(self.threads)]
+        return command + ["app:app"]
+
     def start_flask_server(self):
         """Start the Flask server"""
-        print("🚀 Starting Flask server...")
+        mode = "production (gunicorn)" if self.production else "development"
+        print(f"🚀 Starting Flask server ({mode})...")
         try:
-            self.flask_process = subprocess.Popen([
-                sys.executable, "app.py"
-            ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            self.flask_process = subprocess.Popen(
+                self.flask_command(),
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            self.logs.attach('flask', self.flask_process)
+            self.started_at['flask'] = time.time()
             print("✅ Flask server started (PID: {})".format(self.flask_process.pid))
             return True
         except Exception as e:
@@ -80,29 +157,107 @@ class ServerManager:
         try:
             self.node_process = subprocess.Popen([
                 "node", "healthcare-blog/server.js"
-            ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            ], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            self.logs.attach('node', self.node_process)
+            self.started_at['node'] = time.time()
             print("✅ Node.js server started (PID: {})".format(self.node_process.pid))
             return True
         except Exception as e:
             print(f"❌ Failed to start Node.js server: {e}")
             return False
 
-    def monitor_servers(self):
-        """Monitor server processes"""
-        def check_flask():
-            if self.flask_process and self.flask_process.poll() is not None:
-                print("❌ Flask server has stopped")
-                self.running = False
+    def is_healthy(self, url):
+        """True if the health endpoint answers 200 within 2 seconds"""
+        try:
+            with urllib.request.urlopen(url, timeout=2) as response:
+                return response.status == 200
+        except Exception:
+            return False
 
-        def check_node():
-            if self.node_process and self.node_process.poll() is not None:
-                print("❌ Node.js server has stopped")
-                self.running = False
+    def stop_process(self, process, timeout=10):
+        """Terminate a child process, killing it if it doesn't exit in time"""
+        process.terminate()
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+    def restart_server(self, name):
+        """Stop (if needed) and start one server, backing off on repeated crashes"""
+        label = "Flask" if name == 'flask' else "Node.js"
+        with self.lock:
+            if not self.running:
+                return
+            process = self.flask_process if name == 'flask' else self.node_process
+
+            # Back off only when the server keeps dying soon after starting
+            if time.time() - self.started_at[name] < STARTUP_GRACE * 3:
+                self.restarts[name] += 1
+            else:
+                self.restarts[name] = 0
+            delay = min(2 ** self.restarts[name], RESTART_BACKOFF_MAX) if self.restarts[name] else 0
+
+            if process and process.poll() is None:
+                self.stop_process(process)
+
+        if delay:
+            print(f"⏳ Restarting {label} server in {delay}s")
+            time.sleep(delay)
+
+        with self.lock:
+            if not self.running:
+                return
+            print(f"🔄 Restarting {label} server...")
+            if name == 'flask':
+                self.start_flask_server()
+            else:
+                self.start_node_server()
+
+    def reload(self):
+        """Graceful reload (SIGHUP): new gunicorn workers with the current code in production mode"""
+        if self.production and self.flask_process and self.flask_process.poll() is None:
+            # Gunicorn starts a new set of workers (which import app.py afresh, see
+            # gunicorn.conf.py) and retires the old ones after their in-flight requests
+            print("🔄 Reloading Flask workers...")
+            self.flask_process.send_signal(signal.SIGHUP)
+        else:
+            self.restart_server('flask')
+
+    def monitor_servers(self):
+        """Health-check both servers and respawn any that die or stop answering"""
+        checks = {
+            'flask': (lambda: self.flask_process, FLASK_HEALTH_URL, "Flask"),
+            'node': (lambda: self.node_process, NODE_HEALTH_URL, "Node.js"),
+        }
+        failures = {name: 0 for name in checks}
 
         while self.running:
-            check_flask()
-            check_node()
-            time.sleep(2)
+            for name, (get_process, url, label) in checks.items():
+                process = get_process()
+                if process is None or not self.running:
+                    continue
+
+                if process.poll() is not None:
+                    print(f"❌ {label} server has stopped (exit code {process.returncode})")
+                    failures[name] = 0
+                    self.restart_server(name)
+                    continue
+
+                if time.time() - self.started_at[name] < STARTUP_GRACE:
+                    continue
+
+                if url is None or self.is_healthy(url):
+                    failures[name] = 0
+                    continue
+
+                failures[name] += 1
+                print(f"⚠️ {label} health check failed ({failures[name]}/{HEALTH_CHECK_FAILURES})")
+                if failures[name] >= HEALTH_CHECK_FAILURES:
+                    failures[name] = 0
+                    self.restart_server(name)
+
+            time.sleep(HEALTH_CHECK_INTERVAL)
 
     def print_status(self):
         """Print server status and URLs"""
@@ -110,17 +265,25 @@ class ServerManager:
         print("🏥 SMART HEALTHCARE PLATFORM - SERVER STATUS")
         print("="*60)
         print("✅ Flask Backend Server:")
-        print("   - URL: http://localhost:5000")
-        print("   - Health: http://localhost:5000/api/diagnosis")
+        print("   - URL: {}".format(FLASK_URL or FLASK_BIND))
+        print("   - Health: {}".format(FLASK_HEALTH_URL or "process checks only (unix socket)"))
+        print("   - Mode: {}".format("production (gunicorn)" if self.production else "development"))
         print("   - Status: {}".format("Running" if self.flask_process and self.flask_process.poll() is None else "Stopped"))
+        print("   - Logs: {}".format(self.logs.log('flask').path))
         print()
         print("✅ Node.js Blog Server:")
         print("   - URL: http://localhost:5001")
         print("   - Health: http://localhost:5001/api/health")
         print("   - Status: {}".format("Running" if self.node_process and self.node_process.poll() is None else "Stopped"))
+        print("   - Logs: {}".format(self.logs.log('node').path))
         print()
+        if self.backup_scheduler:
+            print("💾 Database Backups:")
+            print("   - Every {:g}h into {} (keeping {})".format(
+                self.backup_scheduler.interval / 3600, backup.BACKUP_DIR, backup.KEEP))
+            print()
         print("🌐 Frontend:")
-        print("   - Dashboard: http://localhost:5000")
+        print("   - Dashboard: {}".format(FLASK_URL or FLASK_BIND))
         print("   - Blog Integration: Available in dashboard")
         print("="*60)
 
@@ -153,6 +316,9 @@ class ServerManager:
         monitor_thread = threading.Thread(target=self.monitor_servers, daemon=True)
         monitor_thread.start()
 
+        if self.backup_scheduler:
+            self.backup_scheduler.start()
+
         # Print status
         self.print_status()
 
@@ -161,12 +327,9 @@ class ServerManager:
         print()
 
         try:
-            # Wait for processes
+            # Servers are respawned by the monitor thread, so just wait
             while self.running:
-                if self.flask_process and self.flask_process.poll() is None:
-                    time.sleep(1)
-                else:
-                    break
+                time.sleep(1)
         except KeyboardInterrupt:
             print("\n🛑 Shutting down servers...")
             self.stop_all()
@@ -175,35 +338,63 @@ class ServerManager:
         """Stop all servers"""
         self.running = False
 
-        if self.flask_process:
-            print("🛑 Stopping Flask server...")
-            self.flask_process.terminate()
-            try:
-                self.flask_process.wait(timeout=10)
-            except subprocess.TimeoutExpired:
-                self.flask_process.kill()
+        if self.backup_scheduler:
+            self.backup_scheduler.stop(timeout=0)
 
-        if self.node_process:
-            print("🛑 Stopping Node.js server...")
-            self.node_process.terminate()
-            try:
-                self.node_process.wait(timeout=10)
-            except subprocess.TimeoutExpired:
-                self.node_process.kill()
+        with self.lock:
+            if self.flask_process:
+                print("🛑 Stopping Flask server...")
+                self.stop_process(self.flask_process)
+
+            if self.node_process:
+                print("🛑 Stopping Node.js server...")
+                self.stop_process(self.node_process)
 
+        # Let the writers flush what the children printed on the way out
+        self.logs.close()
         print("✅ All servers stopped")
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Start the Smart Healthcare servers")
+    parser.add_argument('--production', action='store_true',
+                        help="Run the Flask app under gunicorn instead of the development server")
+    parser.add_argument('--workers', type=int, help="Gunicorn worker processes (production mode)")
+    parser.add_argument('--threads', type=int, help="Threads per gunicorn worker (production mode)")
+    parser.add_argument('--log-dir', default=child_logs.LOG_DIR, help="Directory for flask.log and node.log")
+    parser.add_argument('--tail', choices=['flask', 'node'],
+                        help="Print the end of a server's log instead of starting the servers")
+    parser.add_argument('-n', '--lines', type=int, default=50, help="Lines shown by --tail")
+    parser.add_argument('--backup-every', type=float, metavar='HOURS',
+                        help="Take an online database backup every HOURS hours while the servers run")
+    parser.add_argument('-f', '--follow', action='store_true', help="Keep printing new lines (--tail)")
+    return parser.parse_args(argv)
+
 def main():
-    manager = ServerManager()
+    args = parse_args()
+    if args.tail:
+        try:
+            found = child_logs.tail(args.tail, args.lines, args.follow, args.log_dir)
+        except KeyboardInterrupt:
+            found = True
+        sys.exit(0 if found else 1)
+
+    manager = ServerManager(production=args.production, workers=args.workers, threads=args.threads,
+                            log_dir=args.log_dir, backup_every=args.backup_every)
 
     def signal_handler(signum, frame):
         print(f"\n🛑 Received signal {signum}")
         manager.stop_all()
         sys.exit(0)
 
+    def reload_handler(signum, frame):
+        print(f"\n🔄 Received signal {signum}")
+        threading.Thread(target=manager.reload, daemon=True).start()
+
     # Register signal handlers
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
+    if hasattr(signal, 'SIGHUP'):
+        signal.signal(signal.SIGHUP, reload_handler)
 
     # Start servers
     success = manager.start_all()
@@ -34,6 +34,9 @@ document.getElementById('diagnosisForm').addEventListener('submit', function(eve
 });
 
 // Consultation Booking Form Submission
+// One Idempotency-Key per booking attempt, so a double submit or retry can't book twice
+let consultationKey = null;
+
 document.getElementById('consultationForm').addEventListener('submit', function(event) {
     event.preventDefault();
     const name = document.getElementById('name').value;
@@ -45,16 +48,24 @@ document.getElementById('consultationForm').addEventListener('submit', function(
     formData.append('email', email);
     formData.append('date', date);
 
+    if (!consultationKey) {
+        consultationKey = `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+    }
+
     fetch('/api/consultation', {
         method: 'POST',
+        headers: { 'Idempotency-Key': consultationKey },
         body: formData
     })
     .then(response => response.json())
     .then(data => {
+        if (data.status === 'success') {
+            consultationKey = null;
+        }
         document.getElementById('consultationResult').innerHTML = `
             <div class="result-box">
                 <h3>Booking Confirmation</h3>
-                <p>${data.message}</p>
+                <p>${data.message || data.error}</p>
                 <p><strong>Details:</strong></p>
                 <p>Name: ${name}</p>
                 <p>Email: ${email}</p>
@@ -155,7 +166,7 @@ const blogsPerPage = 5;
 
 // Load blog posts
 function loadBlogPosts() {
-    fetch(`http://localhost:5001/api/blogs?limit=${blogsPerPage}&offset=${blogOffset}`)
+    fetch(`/api/blogs?limit=${blogsPerPage}&offset=${blogOffset}`)
     .then(response => response.json())
     .then(data => {
         const blogContainer = document.getElementById('blogPosts');
@@ -195,7 +206,7 @@ function loadBlogPosts() {
         console.error('Error loading blogs:', error);
         document.getElementById('blogPosts').innerHTML = `
             <div class="error-box">
-                <p>Error loading blog posts. Make sure the blog server is running on port 5001.</p>
+                <p>Error loading blog posts. The blog service may be temporarily unavailable.</p>
             </div>
         `;
     });
@@ -208,7 +219,7 @@ document.getElementById('loadMoreBlogs').addEventListener('click', function() {
 
 // Read more function
 function readMore(postId) {
-    fetch(`http://localhost:5001/api/blogs/${postId}`)
+    fetch(`/api/blogs/${postId}`)
     .then(response => response.json())
     .then(post => {
         const blogContainer = document.getElementById('blogPosts');
@@ -0,0 +1,222 @@
+"""
+Smart Healthcare Platform - Page and Static Asset Caching
+- The rendered dashboard is kept in memory and re-rendered only when its
+  template (or an asset it links to) changes on disk
+- Static URLs carry a content hash (?v=<hash>); hashed URLs are served with a
+  far-future immutable Cache-Control, unhashed ones must revalidate
+- Responses have strong ETags and answer If-None-Match with 304
+- Text bodies are compressed once (gzip, and brotli when installed) and the
+  variant matching Accept-Encoding is served
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+import time
+
+from flask import Response, render_template, request, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Seconds a hashed static URL may be cached (one year)
+IMMUTABLE_MAX_AGE = int(os.environ.get('HEALTHCARE_STATIC_MAX_AGE', str(365 * 24 * 3600)))
+
+# How often (seconds) files are re-stat'ed for changes; 0 checks on every request
+CHECK_INTERVAL = float(os.environ.get('HEALTHCARE_STATIC_CHECK_INTERVAL', '1'))
+
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+MIN_COMPRESS_BYTES = 512
+MAX_CACHED_ASSET_BYTES = 1024 * 1024
+HASH_LENGTH = 12
+
+
+def compress_variants(body, mimetype):
+    """{content-encoding: bytes} for a body; 'identity' is always present"""
+    variants = {'identity': body}
+    if len(body) >= MIN_COMPRESS_BYTES and mimetype.startswith(COMPRESSIBLE_TYPES):
+        variants['gzip'] = gzip.compress(body, compresslevel=9, mtime=0)
+        if brotli is not None:
+            variants['br'] = brotli.compress(body, quality=11)
+    return variants
+
+
+def choose_encoding(variants):
+    """Best encoding the client accepts (br, then gzip, then identity)"""
+    accepted = request.accept_encodings
+    for encoding in ('br', 'gzip'):
+        if encoding in variants and accepted[encoding]:
+            return encoding
+    return 'identity'
+
+
+def send_cached(variants, etag, mimetype, cache_control):
+    """Response for pre-encoded variants with strong ETag / If-None-Match handling"""
+    encoding = choose_encoding(variants)
+    # Each encoding is a different representation, so it needs its own ETag
+    tag = etag if encoding == 'identity' else f"{etag}-{encoding}"
+
+    if request.if_none_match.contains(tag):
+        response = Response(status=304)
+    else:
+        response = Response(variants[encoding], mimetype=mimetype)
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+
+    response.set_etag(tag)
+    response.headers['Cache-Control'] = cache_control
+    if len(variants) > 1:
+        response.vary.add('Accept-Encoding')
+    return response
+
+
+class Asset:
+    __slots__ = ('path', 'signature', 'digest', 'mimetype', '_variants')
+
+    def __init__(self, path, signature, digest, mimetype):
+        self.path = path
+        self.signature = signature
+        self.digest = digest
+        self.mimetype = mimetype
+        self._variants = None
+
+    def variants(self):
+        if self._variants is None:
+            with open(self.path, 'rb') as f:
+                self._variants = compress_variants(f.read(), self.mimetype)
+        return self._variants
+
+
+class AssetManifest:
+    """Content hashes for the files in the static folder, refreshed when they change"""
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self.assets = {}
+        self.version = ''
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._checked < CHECK_INTERVAL:
+            return
+        with self._lock:
+            if not force and now - self._checked < CHECK_INTERVAL:
+                return
+            assets = {}
+            for directory, _, files in os.walk(self.root):
+                for name in files:
+                    path = os.path.join(directory, name)
+                    filename = os.path.relpath(path, self.root).replace(os.sep, '/')
+                    stat = os.stat(path)
+                    signature = (stat.st_mtime_ns, stat.st_size)
+                    previous = self.assets.get(filename)
+                    if previous is not None and previous.signature == signature:
+                        assets[filename] = previous
+                        continue
+                    with open(path, 'rb') as f:
+                        digest = hashlib.sha256(f.read()).hexdigest()[:HASH_LENGTH]
+                    mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+                    assets[filename] = Asset(path, signature, digest, mimetype)
+            self.assets = assets
+            self.version = hashlib.sha256(
+                ''.join(f"{k}={a.digest};" for k, a in sorted(assets.items())).encode()).hexdigest()[:HASH_LENGTH]
+            self._checked = time.monotonic()
+
+    def get(self, filename):
+        self.refresh()
+        return self.assets.get(filename)
+
+
+class PageCache:
+    """Rendered templates, keyed by template mtime and the asset manifest version"""
+
+    def __init__(self, app, manifest):
+        self.app = app
+        self.manifest = manifest
+        self.pages = {}
+        self.renders = 0
+        self.hits = 0
+        self._lock = threading.Lock()
+
+    def _template_signature(self, template):
+        path = os.path.join(self.app.root_path, self.app.template_folder, template)
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size, self.manifest.version)
+
+    def get(self, template):
+        self.manifest.refresh()
+        signature = self._template_signature(template)
+        cached = self.pages.get(template)
+        if cached is not None and cached[0] == signature:
+            self.hits += 1
+            return cached[1], cached[2]
+
+        # Jinja caches compiled templates; make sure an edited file is reloaded
+        if self.app.jinja_env.cache is not None:
+            self.app.jinja_env.cache.clear()
+        body = render_template(template).encode('utf-8')
+        etag = hashlib.sha256(body).hexdigest()[:HASH_LENGTH * 2]
+        variants = compress_variants(body, 'text/html')
+        with self._lock:
+            self.pages[template] = (signature, variants, etag)
+            self.renders += 1
+        return variants, etag
+
+    def stats(self):
+        return {"pages": len(self.pages), "renders": self.renders, "hits": self.hits}
+
+
+_page_cache = None
+_manifest = None
+
+
+def render_cached(template):
+    """Serve a rendered template from memory (revalidated with ETag on every load)"""
+    variants, etag = _page_cache.get(template)
+    return send_cached(variants, etag, 'text/html', 'no-cache')
+
+
+def stats():
+    result = _page_cache.stats() if _page_cache is not None else {}
+    result["static_assets"] = len(_manifest.assets) if _manifest is not None else 0
+    result["brotli"] = brotli is not None
+    return result
+
+
+def init_app(app):
+    """Hash static URLs and replace the static view with the caching one"""
+    global _page_cache, _manifest
+    _manifest = AssetManifest(app.static_folder)
+    _manifest.refresh(force=True)
+    _page_cache = PageCache(app, _manifest)
+
+    @app.url_defaults
+    def _hash_static_urls(endpoint, values):
+        if endpoint == 'static' and 'v' not in values:
+            asset = _manifest.get(values.get('filename', ''))
+            if asset is not None:
+                values['v'] = asset.digest
+
+    def static(filename):
+        asset = _manifest.get(filename)
+        if asset is None:
+            return send_from_directory(app.static_folder, filename)
+
+        if request.args.get('v') == asset.digest:
+            cache_control = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+        else:
+            cache_control = 'no-cache'
+
+        if asset.signature[1] > MAX_CACHED_ASSET_BYTES:
+            response = send_from_directory(app.static_folder, filename, etag=asset.digest)
+            response.headers['Cache-Control'] = cache_control
+            return response
+        return send_cached(asset.variants(), asset.digest, asset.mimetype, cache_control)
+
+    app.view_functions['static'] = static
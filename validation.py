@@ -0,0 +1,74 @@
+"""
+Smart Healthcare Platform - Request Validation
+Form checks shared by the Flask views (app.py) and the ASGI entry point
+(asgi_app.py), so both accept and reject exactly the same input. `form` is
+any mapping with .get(); a ValidationError's message goes back with a 400.
+"""
+
+from datetime import datetime
+
+ALLOWED_UPLOAD_EXTENSIONS = {'csv', 'json', 'txt'}
+
+
+class ValidationError(ValueError):
+    """Invalid request input"""
+
+
+def _field(form, name):
+    return (form.get(name) or '').strip()
+
+
+def flag(value, default=False):
+    """Boolean form value ("1", "true", "yes", "on")"""
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def diagnosis_form(form):
+    """-> (patient_name, symptoms)"""
+    patient_name = _field(form, 'patient_name')
+    symptoms = _field(form, 'symptoms')
+    if not patient_name or not symptoms:
+        raise ValidationError("Patient name and symptoms are required")
+    return patient_name, symptoms
+
+
+def consultation_form(form):
+    """-> (name, email, date)"""
+    name = _field(form, 'name')
+    email = _field(form, 'email')
+    date = _field(form, 'date')
+    if not name or not email or not date:
+        raise ValidationError("Name, email, and date are required")
+
+    try:
+        datetime.strptime(date, '%Y-%m-%d')
+    except ValueError:
+        raise ValidationError("Invalid date format. Use YYYY-MM-DD")
+    return name, email, date
+
+
+def healthcare_plan_form(form):
+    """-> (age, goals)"""
+    age = _field(form, 'age')
+    goals = _field(form, 'goals')
+    if not age or not goals:
+        raise ValidationError("Age and goals are required")
+
+    try:
+        age = int(age)
+    except ValueError:
+        raise ValidationError("Age must be a valid number")
+    if age < 1 or age > 150:
+        raise ValidationError("Age must be between 1 and 150")
+    return age, goals
+
+
+def upload_file_type(filename):
+    """-> lower-case extension of an accepted upload"""
+    if not filename:
+        raise ValidationError("No file selected")
+    if '.' not in filename or filename.rsplit('.', 1)[1].lower() not in ALLOWED_UPLOAD_EXTENSIONS:
+        raise ValidationError("File type not supported. Please upload CSV, JSON, or TXT files")
+    return filename.rsplit('.', 1)[1].lower()
@@ -0,0 +1,201 @@
+"""
+Smart Healthcare Platform - Vitals Trend and Anomaly Analysis
+Rolling averages, linear trend slopes and z-score outliers for every numeric
+column of an upload. Uses NumPy when it is installed and a pure-Python path
+otherwise; both return the same result format.
+"""
+
+import math
+import os
+from array import array
+from collections import deque
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional
+    np = None
+
+# Rows in the rolling-average window
+ROLLING_WINDOW = int(os.environ.get('HEALTHCARE_TREND_WINDOW', '60'))
+
+# |z| above this marks a reading as an outlier
+Z_THRESHOLD = float(os.environ.get('HEALTHCARE_TREND_Z_THRESHOLD', '3'))
+
+# Outlier row numbers reported per column
+MAX_OUTLIER_ROWS = 10
+
+NAN = float('nan')
+
+
+class TrendCollector:
+    """Collects parsed rows into one contiguous float64 array per column
+
+    Missing readings are stored as NaN so every column stays aligned by row.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.columns = {}
+
+    def add(self, values):
+        for name, value in values.items():
+            column = self.columns.get(name)
+            if column is None:
+                column = self.columns[name] = array('d', [NAN]) * self.rows
+            column.append(value)
+        self.rows += 1
+        for column in self.columns.values():
+            if len(column) < self.rows:
+                column.append(NAN)
+
+    def analyze(self, window=ROLLING_WINDOW, z_threshold=Z_THRESHOLD, backend=None):
+        """Run the trend stage; backend is 'numpy', 'python' or None for the best available"""
+        if backend is None:
+            backend = 'numpy' if np is not None else 'python'
+        if backend == 'numpy':
+            metrics = numpy_trends(self.columns, self.rows, window, z_threshold)
+        else:
+            metrics = python_trends(self.columns, self.rows, window, z_threshold)
+        return {
+            'backend': backend,
+            'window': min(window, self.rows),
+            'z_threshold': z_threshold,
+            'metrics': metrics,
+        }
+
+
+def _round(value):
+    return None if value is None or math.isnan(value) else round(float(value), 6)
+
+
+def numpy_trends(columns, rows, window=ROLLING_WINDOW, z_threshold=Z_THRESHOLD):
+    """Vectorized pass over an (rows x columns) matrix"""
+    if np is None:
+        raise RuntimeError("NumPy is not installed")
+    names = list(columns)
+    if not names or rows == 0:
+        return {}
+
+    window = max(1, min(window, rows))
+    data = np.empty((rows, len(names)), dtype=np.float64)
+    for j, name in enumerate(names):
+        data[:, j] = np.frombuffer(columns[name], dtype=np.float64)
+
+    mask = ~np.isnan(data)
+    values = np.where(mask, data, 0.0)
+    counts = mask.sum(axis=0)
+    safe_counts = np.maximum(counts, 1)
+    mean = values.sum(axis=0) / safe_counts
+
+    # Rolling mean from running sums (NaN-aware)
+    csum = np.vstack([np.zeros(len(names)), np.cumsum(values, axis=0)])
+    ccount = np.vstack([np.zeros(len(names)), np.cumsum(mask, axis=0)])
+    roll_count = ccount[window:] - ccount[:-window]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rolling = (csum[window:] - csum[:-window]) / roll_count
+    rolling[roll_count == 0] = np.nan
+
+    # Least-squares slope against row number
+    x = np.arange(rows, dtype=np.float64)[:, None]
+    x_mean = (x * mask).sum(axis=0) / safe_counts
+    dx = np.where(mask, x - x_mean, 0.0)
+    dy = np.where(mask, data - mean, 0.0)
+    sxx = (dx * dx).sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slope = np.where(sxx > 0, (dx * dy).sum(axis=0) / sxx, 0.0)
+
+    # Population z-scores
+    std = np.sqrt((dy * dy).sum(axis=0) / safe_counts)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z = np.where(std > 0, dy / std, 0.0)
+    outliers = (np.abs(z) > z_threshold) & mask
+
+    result = {}
+    for j, name in enumerate(names):
+        if counts[j] == 0:
+            continue
+        column_rolling = rolling[:, j]
+        has_rolling = not np.isnan(column_rolling).all()
+        outlier_rows = np.flatnonzero(outliers[:, j])
+        result[name] = {
+            'rolling_mean_last': _round(column_rolling[-1]),
+            'rolling_mean_min': _round(np.nanmin(column_rolling)) if has_rolling else None,
+            'rolling_mean_max': _round(np.nanmax(column_rolling)) if has_rolling else None,
+            'slope_per_row': _round(slope[j]),
+            'outliers': int(outlier_rows.size),
+            'outlier_rows': outlier_rows[:MAX_OUTLIER_ROWS].tolist(),
+        }
+    return result
+
+
+def python_trends(columns, rows, window=ROLLING_WINDOW, z_threshold=Z_THRESHOLD):
+    """Pure-Python fallback, one column at a time"""
+    if rows == 0:
+        return {}
+    window = max(1, min(window, rows))
+
+    result = {}
+    for name, column in columns.items():
+        # Pass 1: mean, slope sums and rolling window
+        count = 0
+        sum_x = sum_y = 0.0
+        win = deque()
+        win_sum = 0.0
+        win_count = 0
+        roll_last = roll_min = roll_max = None
+        for i, y in enumerate(column):
+            present = not math.isnan(y)
+            win.append(y)
+            if present:
+                win_sum += y
+                win_count += 1
+                count += 1
+                sum_x += i
+                sum_y += y
+            if len(win) > window:
+                old = win.popleft()
+                if not math.isnan(old):
+                    win_sum -= old
+                    win_count -= 1
+            if len(win) == window:
+                roll_last = win_sum / win_count if win_count else None
+                if roll_last is not None:
+                    roll_min = roll_last if roll_min is None else min(roll_min, roll_last)
+                    roll_max = roll_last if roll_max is None else max(roll_max, roll_last)
+        if count == 0:
+            continue
+
+        mean_x = sum_x / count
+        mean_y = sum_y / count
+
+        # Pass 2: centered sums for slope and standard deviation
+        sxx = sxy = syy = 0.0
+        for i, y in enumerate(column):
+            if not math.isnan(y):
+                dx = i - mean_x
+                dy = y - mean_y
+                sxx += dx * dx
+                sxy += dx * dy
+                syy += dy * dy
+        slope = sxy / sxx if sxx > 0 else 0.0
+        std = math.sqrt(syy / count)
+
+        # Pass 3: outliers
+        outlier_count = 0
+        outlier_rows = []
+        if std > 0:
+            for i, y in enumerate(column):
+                if not math.isnan(y) and abs((y - mean_y) / std) > z_threshold:
+                    outlier_count += 1
+                    if len(outlier_rows) < MAX_OUTLIER_ROWS:
+                        outlier_rows.append(i)
+
+        result[name] = {
+            'rolling_mean_last': _round(roll_last),
+            'rolling_mean_min': _round(roll_min),
+            'rolling_mean_max': _round(roll_max),
+            'slope_per_row': _round(slope),
+            'outliers': outlier_count,
+            'outlier_rows': outlier_rows,
+        }
+    return result
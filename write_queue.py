@@ -0,0 +1,154 @@
+"""
+Smart Healthcare Platform - Group-Commit Write Queue
+Collects INSERTs from request threads and flushes them in one transaction
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from db_pool import get_pool
+
+# Group commit is opt-in (HEALTHCARE_GROUP_COMMIT=1)
+ENABLED = os.environ.get('HEALTHCARE_GROUP_COMMIT', '0') == '1'
+
+# Flush after this many rows...
+MAX_BATCH_ROWS = int(os.environ.get('HEALTHCARE_GROUP_COMMIT_ROWS', '64'))
+
+# ...or after the oldest queued row has waited this many milliseconds
+MAX_BATCH_DELAY_MS = float(os.environ.get('HEALTHCARE_GROUP_COMMIT_DELAY_MS', '5'))
+
+# Seconds a request thread waits for its row to be committed
+COMMIT_TIMEOUT = float(os.environ.get('HEALTHCARE_GROUP_COMMIT_TIMEOUT', '10'))
+
+
+class WriteQueue:
+    def __init__(self, max_batch_rows=MAX_BATCH_ROWS, max_batch_delay_ms=MAX_BATCH_DELAY_MS, pool=None):
+        self.max_batch_rows = max_batch_rows
+        self.max_batch_delay = max_batch_delay_ms / 1000.0
+        self.pool = pool or get_pool()
+        self.pid = os.getpid()
+
+        self._queue = queue.Queue()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._stats = {
+            'batches': 0,
+            'rows': 0,
+            'failed_rows': 0,
+            'last_batch_size': 0,
+            'max_batch_size': 0,
+            'max_queue_depth': 0,
+            'flush_time_total': 0.0,
+        }
+        self._thread = threading.Thread(target=self._run, name='write-queue', daemon=True)
+        self._thread.start()
+
+    def submit(self, sql, params):
+        """Queue one INSERT and return a Future resolved once it is committed"""
+        future = Future()
+        self._queue.put((sql, tuple(params), future))
+        depth = self._queue.qsize()
+        with self._lock:
+            if depth > self._stats['max_queue_depth']:
+                self._stats['max_queue_depth'] = depth
+        return future
+
+    def write(self, sql, params, timeout=COMMIT_TIMEOUT):
+        """Queue one INSERT and block until it is durable"""
+        return self.submit(sql, params).result(timeout=timeout)
+
+    def _run(self):
+        with self.pool.connection() as conn:
+            while not self._stop.is_set() or not self._queue.empty():
+                batch = self._collect()
+                if batch:
+                    self._flush(conn, batch)
+
+    def _collect(self):
+        """Block for the first row, then gather until the row or time limit"""
+        try:
+            first = self._queue.get(timeout=0.5)
+        except queue.Empty:
+            return []
+
+        batch = [first]
+        deadline = time.perf_counter() + self.max_batch_delay
+        while len(batch) < self.max_batch_rows:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, conn, batch):
+        start = time.perf_counter()
+
+        # Same statement text goes through a single executemany call
+        grouped = {}
+        for sql, params, future in batch:
+            grouped.setdefault(sql, []).append((params, future))
+
+        failed = 0
+        try:
+            with conn:
+                for sql, rows in grouped.items():
+                    conn.executemany(sql, [params for params, _ in rows])
+        except Exception:
+            # One bad row shouldn't fail its neighbours; retry row by row
+            for sql, rows in grouped.items():
+                for params, future in rows:
+                    try:
+                        with conn:
+                            conn.execute(sql, params)
+                    except Exception as e:
+                        failed += 1
+                        future.set_exception(e)
+                    else:
+                        future.set_result(True)
+        else:
+            for rows in grouped.values():
+                for _, future in rows:
+                    future.set_result(True)
+
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._stats['batches'] += 1
+            self._stats['rows'] += len(batch) - failed
+            self._stats['failed_rows'] += failed
+            self._stats['last_batch_size'] = len(batch)
+            self._stats['max_batch_size'] = max(self._stats['max_batch_size'], len(batch))
+            self._stats['flush_time_total'] += elapsed
+
+    def stats(self):
+        """Snapshot of batching counters"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['queue_depth'] = self._queue.qsize()
+        stats['avg_batch_size'] = stats['rows'] / stats['batches'] if stats['batches'] else 0.0
+        stats['max_batch_rows'] = self.max_batch_rows
+        stats['max_batch_delay_ms'] = self.max_batch_delay * 1000.0
+        return stats
+
+    def close(self, timeout=5.0):
+        """Flush whatever is queued and stop the writer thread"""
+        self._stop.set()
+        self._thread.join(timeout)
+
+
+_write_queue = None
+_write_queue_lock = threading.Lock()
+
+
+def get_write_queue():
+    """Return the process-wide write queue, restarting it after a fork"""
+    global _write_queue
+    with _write_queue_lock:
+        if _write_queue is None or _write_queue.pid != os.getpid():
+            _write_queue = WriteQueue()
+        return _write_queue